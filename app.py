@@ -1,48 +1,124 @@
 # gesture_controller.py
+import time
+import argparse
 import cv2
-import time 
-import mediapipe as mp
-import pyautogui
 import numpy as np
+from detector_backend import BACKENDS, model_problem
 from hand_detector import HandDetector
-
-# Screen dimensions
-screen_width, screen_height = pyautogui.size()
+from process_detector import ProcessDetector
+from frame_pool import ScratchBuffers
+from hud import HudLayer
+from console_controls import ConsoleControls
+from frame_capture import open_capture
+from input_backend import PyAutoGuiBackend
+from input_injector import InputInjector
+from profiler import Profiler
+from idle_monitor import IdleMonitor
+from quality_governor import QualityGovernor
+from cursor_filter import make_filter
+from calibration import Calibration, DesktopLayout
+from gesture_engine import MASK_WEIGHTS, GestureContext, default_engine, default_two_hand_engine, finger_mask
+from hand_ids import HandIdTracker
+from hand_detector import landmark_distance
+from landmark_trace import TraceRecorder
+from startup import BackgroundTask, StartupReport, process_origin
 
 class GestureController:
-    def __init__(self):
-        self.cap = cv2.VideoCapture(0)
-        self.detector = HandDetector(max_hands=1)
+    camera_size = (640, 480)
+    
+    def __init__(self, capture_mode="thread", source=None, backend=None, display=True,
+                 detector=None, async_input=True, profiler=None, profile_overlay=False,
+                 idle_monitor=None, cursor_filter="none", prediction_lead=0.0, recorder=None,
+                 display_fps=None, controls=None, startup=None, latency_target_ms=None,
+                 calibration=None):
+        # Frame settings
+        self.frame_reduction = 80  # Reduced for more sensitive movement
+        self.cam_width, self.cam_height = self.camera_size
+        if source is not None:
+            # Recorded clip, image directory or synthetic frames instead of the webcam
+            self.cap = source
+        else:
+            # Camera is read on its own thread/process so the loop never waits on exposure
+            self.cap = open_capture(0, self.cam_width, self.cam_height, mode=capture_mode)
+        self.display = display
+        # Window refresh can run slower than processing (None = every frame)
+        self.display_interval = 1.0 / display_fps if display_fps else 0.0
+        self.next_display_time = 0.0
+        # Key controls from another channel (e.g. stdin) when there is no window
+        self.controls = controls
+        # Cold-start timings, printed once the first landmarks are out
+        self.startup = startup
+        self.static_hud = HudLayer(self._render_static_hud)
+        self.status_hud = HudLayer(self._render_status_hud)
+        
+        # Input injection (pyautogui by default, a recording stub for benchmarks)
+        # Per-stage timing, nearly free while disabled
+        self.profiler = profiler if profiler is not None else Profiler(enabled=False)
+        self.profile_overlay = profile_overlay
+        
+        # Low-power idle state when nobody is in front of the camera
+        self.idle_monitor = idle_monitor
+        
+        self.backend = backend if backend is not None else PyAutoGuiBackend()
+        self.injector = None
+        if async_input:
+            # Inject on a worker thread so slow OS input calls never stall the next frame
+            self.injector = self.backend = InputInjector(self.backend, profiler=self.profiler)
+        
+        # Optional landmark/action trace of the session
+        self.recorder = recorder
+        if recorder is not None:
+            self.backend = recorder.wrap(self.backend)
+        # Monitors of the virtual desktop, re-checked every few seconds while the cursor moves
+        self.desktop = DesktopLayout(self.backend.monitors)
+        self.detector = detector if detector is not None else HandDetector(max_hands=1, mirror=True)
+        # Trades detection quality for latency to stay within the budget
+        self.governor = None
+        if latency_target_ms:
+            self.governor = QualityGovernor(self.detector, target_ms=latency_target_ms)
+        # Reused frame for the flipped/annotated image, so the loop allocates no frames
+        self.buffers = ScratchBuffers()
         
         # Ultra-responsive cursor movement
         self.last_finger_pos = None
         self.velocity_x, self.velocity_y = 0, 0
         self.cursor_speed_factor = 2.0  # Adjust cursor speed (1.0-3.0)
         self.movement_threshold = 2  # Minimum pixel movement to trigger cursor
-        
-        # Frame settings
-        self.frame_reduction = 80  # Reduced for more sensitive movement
-        self.cam_width, self.cam_height = 640, 480
-        self.cap.set(3, self.cam_width)
-        self.cap.set(4, self.cam_height)
+        self.cursor_filter = make_filter(cursor_filter)
+        # Camera-to-desktop mapping; without a calibration the frame_reduction box covers the desktop
+        if calibration is None:
+            calibration = Calibration(margin_px=self.frame_reduction)
+        self.calibration = calibration
+        self.cursor_map = None
+        self.prediction_lead = prediction_lead  # Seconds to extrapolate, None = measured latency
+        self.pipeline_latency = 0.0  # Smoothed frame capture -> gesture handled time
+        self.frame_timestamp = time.time()
+        self.cursor_mapping_key = None
         
         # Scrolling
         self.scroll_speed = 15
-        self.last_scroll_time = 0
         self.scroll_delay = 0.05  # Faster scrolling
-        self.scroll_direction = None
         
         # Click detection
         self.click_threshold = 35
-        self.last_click_time = 0
         self.click_delay = 0.3
         
         # Gesture duration for minimize/maximize
-        self.gesture_start_time = 0
         self.gesture_hold_duration = 1.2  # 1.2 seconds hold
         self.min_gesture_duration = 0.5   # Minimum 0.5s to start showing progress
-        self.is_holding_gesture = False
-        self.current_hold_gesture = None
+        
+        # Two-hand gestures
+        self.zoom_step = 0.15  # Relative change of the pinch spread per zoom step
+        self.drag_gain = 0.3  # Scroll clicks per pixel the fists move
+        
+        # Gesture recognizers keyed by finger mask; each keeps its own timers and baselines
+        self.gesture_engine = default_engine()
+        self.gesture_context = GestureContext(self)
+        # With several hands: stable IDs, recognizer state per ID, and the two-hand gestures
+        self.hand_ids = HandIdTracker()
+        self.hand_engines = {}
+        self.primary_hand = None
+        self.two_hand_engine = default_two_hand_engine()
         
         # Recent gestures memory
         self.gesture_history = []
@@ -53,272 +129,133 @@ class GestureController:
         self.frame_count = 0
         self.fps = 0
         
-    def calculate_cursor_position(self, finger_x, finger_y, img_width, img_height):
+    def _update_cursor_mapping(self, img_width, img_height):
+        """Compile the calibration for this frame size and monitor layout when either changes"""
+        self.desktop.refresh(time.time())
+        key = (img_width, img_height, self.desktop.version)
+        if key == self.cursor_mapping_key:
+            return
+        self.cursor_map = self.calibration.compile((img_width, img_height), self.desktop)
+        self.cursor_mapping_key = key
+    
+    def calculate_cursor_position(self, finger_x, finger_y, img_width, img_height, timestamp=None):
         """Convert finger position to exact screen position with speed matching"""
-        # Map camera coordinates to screen coordinates
-        screen_x = np.interp(finger_x, 
-                           [self.frame_reduction, img_width - self.frame_reduction],
-                           [0, screen_width])
-        screen_y = np.interp(finger_y,
-                           [self.frame_reduction, img_height - self.frame_reduction],
-                           [0, screen_height])
+        self._update_cursor_mapping(img_width, img_height)
+        timestamp = timestamp if timestamp is not None else self.frame_timestamp
+        
+        # Smooth the fingertip and extrapolate it over the measured pipeline delay
+        finger = self.cursor_filter(np.array([finger_x, finger_y], dtype=np.float64), timestamp)
+        if self.prediction_lead is None:
+            lead = self.pipeline_latency
+        else:
+            lead = self.prediction_lead
+        if lead:
+            finger = self.cursor_filter.predict(lead)
+        
+        # Map camera coordinates to desktop coordinates in one step
+        screen = self.cursor_map(finger)
         
         # Calculate movement velocity for instant response
-        if self.last_finger_pos:
-            delta_x = (finger_x - self.last_finger_pos[0]) * self.cursor_speed_factor
-            delta_y = (finger_y - self.last_finger_pos[1]) * self.cursor_speed_factor
-            
-            # Apply velocity directly (no smoothing for instant response)
-            screen_x += delta_x
-            screen_y += delta_y
+        if self.last_finger_pos is not None:
+            # Apply velocity directly on top of the mapped position
+            screen += (finger - self.last_finger_pos) * self.cursor_speed_factor
         
         # Store current position for next frame
-        self.last_finger_pos = (finger_x, finger_y)
+        self.last_finger_pos = finger.copy()
         
-        # Boundary checking
-        screen_x = np.clip(screen_x, 0, screen_width - 1)
-        screen_y = np.clip(screen_y, 0, screen_height - 1)
+        # Boundary checking, onto the nearest monitor
+        screen = self.desktop.clamp(screen)
         
-        return int(screen_x), int(screen_y)
+        return int(screen[0]), int(screen[1])
     
-    def execute_gesture(self, fingers, lm_list, img):
-        """Execute actions based on hand gestures"""
-        current_time = time.time()
-        h, w, _ = img.shape
-        
-        # 1. CURSOR MOVE: Index finger only - ULTRA RESPONSIVE
-        if fingers == [0, 1, 0, 0, 0]:
-            self.is_holding_gesture = False
-            if len(lm_list) > 8:
-                x1, y1 = lm_list[8][1], lm_list[8][2]
-                
-                # Visual feedback
-                cv2.circle(img, (x1, y1), 10, (0, 255, 255), cv2.FILLED)
-                cv2.circle(img, (x1, y1), 15, (0, 255, 255), 2)
-                
-                # Calculate and move cursor instantly
-                cursor_x, cursor_y = self.calculate_cursor_position(x1, y1, w, h)
-                pyautogui.moveTo(cursor_x, cursor_y, _pause=False)
-                
-                # Display movement trail
-                if hasattr(self, 'last_cursor_pos'):
-                    cv2.line(img, (x1, y1), self.last_cursor_pos, (0, 255, 255), 2)
-                self.last_cursor_pos = (x1, y1)
-        
-        # 2. SCROLL: Index + Middle fingers
-        elif fingers == [0, 1, 1, 0, 0]:
-            self.is_holding_gesture = False
-            if len(lm_list) > 12 and current_time - self.last_scroll_time > self.scroll_delay:
-                # Get finger positions
-                x1, y1 = lm_list[8][1], lm_list[8][2]  # Index finger
-                x2, y2 = lm_list[12][1], lm_list[12][2]  # Middle finger
-                
-                # Calculate center point
-                center_x = (x1 + x2) // 2
-                center_y = (y1 + y2) // 2
-                
-                # Determine scroll direction based on finger orientation
-                dx = x2 - x1
-                dy = y2 - y1
-                
-                # Horizontal scroll (left-right)
-                if abs(dx) > abs(dy):
-                    scroll_x = int(np.interp(dx, [-100, 100], [-self.scroll_speed, self.scroll_speed]))
-                    pyautogui.hscroll(scroll_x)
-                    direction = "LEFT" if scroll_x < 0 else "RIGHT"
-                # Vertical scroll (up-down)
-                else:
-                    scroll_y = int(np.interp(dy, [-100, 100], [self.scroll_speed, -self.scroll_speed]))
-                    pyautogui.scroll(scroll_y)
-                    direction = "UP" if scroll_y > 0 else "DOWN"
-                
-                self.last_scroll_time = current_time
-                
-                # Visual feedback
-                cv2.putText(img, f"SCROLL {direction}", (center_x - 50, center_y - 20),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                cv2.line(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.circle(img, (center_x, center_y), 8, (0, 255, 0), cv2.FILLED)
-        
-        # 3. LEFT CLICK: Index finger tap (while both index and middle are open)
-        elif fingers == [0, 1, 1, 0, 0] and current_time - self.last_click_time > self.click_delay:
-            if len(lm_list) > 8 and len(lm_list) > 12:
-                # Check if index finger is significantly lower than middle finger (tap gesture)
-                index_y = lm_list[8][2]
-                middle_y = lm_list[12][2]
-                
-                if index_y > middle_y + 20:  # Index finger is lower (tap position)
-                    distance = np.linalg.norm(
-                        np.array(lm_list[8][1:]) - np.array(lm_list[12][1:])
-                    )
-                    if distance < self.click_threshold:
-                        pyautogui.click()
-                        self.last_click_time = current_time
-                        cv2.putText(img, "LEFT CLICK", (50, 100),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-        
-        # 4. RIGHT CLICK: Middle finger tap (while both index and middle are open)
-        elif fingers == [0, 1, 1, 0, 0] and current_time - self.last_click_time > self.click_delay:
-            if len(lm_list) > 8 and len(lm_list) > 12:
-                # Check if middle finger is significantly lower than index finger
-                index_y = lm_list[8][2]
-                middle_y = lm_list[12][2]
-                
-                if middle_y > index_y + 20:  # Middle finger is lower (right click gesture)
-                    distance = np.linalg.norm(
-                        np.array(lm_list[8][1:]) - np.array(lm_list[12][1:])
-                    )
-                    if distance < self.click_threshold:
-                        pyautogui.rightClick()
-                        self.last_click_time = current_time
-                        cv2.putText(img, "RIGHT CLICK", (50, 150),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-        
-        # 5. MINIMIZE ALL TABS: All fingers closed with DURATION
-        elif fingers == [0, 0, 0, 0, 0]:
-            if self.current_hold_gesture != "minimize":
-                self.current_hold_gesture = "minimize"
-                self.gesture_start_time = current_time
-                self.is_holding_gesture = True
-            
-            hold_duration = current_time - self.gesture_start_time
-            
-            # Show progress after minimum duration
-            if hold_duration >= self.min_gesture_duration:
-                progress = min(hold_duration / self.gesture_hold_duration, 1.0)
-                
-                # Draw progress bar
-                bar_x, bar_y = 50, 200
-                bar_width = int(200 * progress)
-                cv2.rectangle(img, (bar_x, bar_y), (bar_x + bar_width, bar_y + 20), 
-                            (0, int(255 * progress), 0), cv2.FILLED)
-                cv2.rectangle(img, (bar_x, bar_y), (bar_x + 200, bar_y + 20), 
-                            (255, 255, 255), 2)
-                cv2.putText(img, f"MINIMIZE: {int(progress * 100)}%", 
-                           (bar_x, bar_y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 
-                           (0, 165, 255), 2)
-                
-                # Execute when hold duration reached
-                if hold_duration >= self.gesture_hold_duration:
-                    pyautogui.hotkey('win', 'd')
-                    cv2.putText(img, "ALL TABS MINIMIZED!", (50, 250),
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                    self.current_hold_gesture = None
-                    self.is_holding_gesture = False
-        
-        # 6. MAXIMIZE ALL TABS: All fingers open with DURATION
-        elif fingers == [1, 1, 1, 1, 1]:
-            if self.current_hold_gesture != "maximize":
-                self.current_hold_gesture = "maximize"
-                self.gesture_start_time = current_time
-                self.is_holding_gesture = True
-            
-            hold_duration = current_time - self.gesture_start_time
-            
-            # Show progress after minimum duration
-            if hold_duration >= self.min_gesture_duration:
-                progress = min(hold_duration / self.gesture_hold_duration, 1.0)
-                
-                # Draw progress bar
-                bar_x, bar_y = 50, 300
-                bar_width = int(200 * progress)
-                cv2.rectangle(img, (bar_x, bar_y), (bar_x + bar_width, bar_y + 20), 
-                            (0, int(255 * progress), 0), cv2.FILLED)
-                cv2.rectangle(img, (bar_x, bar_y), (bar_x + 200, bar_y + 20), 
-                            (255, 255, 255), 2)
-                cv2.putText(img, f"MAXIMIZE: {int(progress * 100)}%", 
-                           (bar_x, bar_y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 
-                           (0, 165, 255), 2)
-                
-                # Execute when hold duration reached
-                if hold_duration >= self.gesture_hold_duration:
-                    pyautogui.hotkey('win', 'shift', 'm')
-                    cv2.putText(img, "ALL TABS MAXIMIZED!", (50, 350),
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                    self.current_hold_gesture = None
-                    self.is_holding_gesture = False
+    def _set_context(self, img, now, frame_size):
+        ctx = self.gesture_context
+        ctx.img = img
+        # Only frames that will be shown are drawn on
+        ctx.draw = self.display and img is not None
+        ctx.now = now if now is not None else time.time()
+        if img is not None:
+            ctx.h, ctx.w = img.shape[:2]
+        else:
+            # Replayed landmarks and headless runs come without an image
+            ctx.w, ctx.h = frame_size
+        return ctx
+    
+    def execute_gesture(self, fingers, lm_list, img, now=None, frame_size=None, engine=None):
+        """Execute actions based on hand gestures; returns the name of the action fired, if any"""
+        ctx = self._set_context(img, now, frame_size)
+        ctx.lm = np.asarray(lm_list)
         
-        # 7. SHIFT TAB: Three fingers (index, middle, ring) - right-left
-        elif fingers == [0, 1, 1, 1, 0]:
-            self.is_holding_gesture = False
-            if len(lm_list) > 16:  # Need up to ring finger tip
-                # Get horizontal position of three fingers
-                x_positions = [lm_list[8][1], lm_list[12][1], lm_list[16][1]]
-                x_avg = sum(x_positions) / 3
-                
-                # Determine swipe direction
-                if hasattr(self, 'last_three_finger_x'):
-                    if x_avg > self.last_three_finger_x + 30:  # Swipe right
-                        pyautogui.hotkey('shift', 'tab')
-                        cv2.putText(img, "SHIFT+TAB (PREVIOUS)", (50, 400),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
-                    elif x_avg < self.last_three_finger_x - 30:  # Swipe left
-                        pyautogui.hotkey('ctrl', 'tab')
-                        cv2.putText(img, "CTRL+TAB (NEXT)", (50, 400),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
-                
-                self.last_three_finger_x = x_avg
-                
-                # Visual feedback
-                for x, y in [(lm_list[8][1], lm_list[8][2]),
-                           (lm_list[12][1], lm_list[12][2]),
-                           (lm_list[16][1], lm_list[16][2])]:
-                    cv2.circle(img, (int(x), int(y)), 8, (255, 255, 0), cv2.FILLED)
+        # O(1) dispatch on the finger mask to the registered recognizers
+        engine = engine if engine is not None else self.gesture_engine
+        self._remember(engine.process(finger_mask(fingers), ctx))
+        return ctx.fired
+    
+    def execute_hands(self, img, fingers=None, now=None, frame_size=None):
+        """Execute the gestures of every detected hand; returns the name of the action fired, if any
         
-        # 8. SHIFT APPLICATIONS: Four fingers - right-left
-        elif fingers == [0, 1, 1, 1, 1]:
-            self.is_holding_gesture = False
-            if len(lm_list) > 20:  # Need up to little finger tip
-                # Get horizontal position of four fingers
-                x_positions = [lm_list[8][1], lm_list[12][1], lm_list[16][1], lm_list[20][1]]
-                x_avg = sum(x_positions) / 4
-                
-                # Determine swipe direction
-                if hasattr(self, 'last_four_finger_x'):
-                    if x_avg > self.last_four_finger_x + 30:  # Swipe right
-                        pyautogui.hotkey('alt', 'shift', 'tab')
-                        cv2.putText(img, "ALT+SHIFT+TAB (PREV APP)", (50, 450),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 255), 2)
-                    elif x_avg < self.last_four_finger_x - 30:  # Swipe left
-                        pyautogui.hotkey('alt', 'tab')
-                        cv2.putText(img, "ALT+TAB (NEXT APP)", (50, 450),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 255), 2)
-                
-                self.last_four_finger_x = x_avg
-                
-                # Visual feedback
-                for x, y in [(lm_list[8][1], lm_list[8][2]),
-                           (lm_list[12][1], lm_list[12][2]),
-                           (lm_list[16][1], lm_list[16][2]),
-                           (lm_list[20][1], lm_list[20][2])]:
-                    cv2.circle(img, (int(x), int(y)), 8, (255, 0, 255), cv2.FILLED)
+        All hands are handled as one batch of arrays. Two hands holding a two-hand pose
+        (both pinching, both fists) own the frame; otherwise the hand tracked longest
+        drives the one-hand gestures. Each hand ID keeps its own recognizer state, so
+        timers and baselines follow the hand, not the detector's order.
+        """
+        d = self.detector
+        n = d.num_hands
+        ctx = self._set_context(img, now, frame_size)
+        ids = self.hand_ids.update(d.landmarks[:n], d.handedness[:n], ctx.now)
+        self._drop_hand_engines()
+        fingers = fingers if fingers is not None else d.fingers_up_all()
         
-        # 9. RECENT TABS OPEN/CLOSE: Four fingers bottom-up-down
-        elif fingers == [0, 1, 1, 1, 1]:
-            if len(lm_list) > 20:
-                # Get vertical position of four fingers
-                y_positions = [lm_list[8][2], lm_list[12][2], lm_list[16][2], lm_list[20][2]]
-                y_avg = sum(y_positions) / 4
-                
-                # Determine vertical swipe direction
-                if hasattr(self, 'last_four_finger_y'):
-                    if y_avg < self.last_four_finger_y - 40:  # Swipe up (bottom to top)
-                        pyautogui.hotkey('ctrl', 'shift', 't')  # Reopen closed tab
-                        cv2.putText(img, "REOPEN TAB (Ctrl+Shift+T)", (50, 500),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
-                    elif y_avg > self.last_four_finger_y + 40:  # Swipe down (top to bottom)
-                        pyautogui.hotkey('ctrl', 'w')  # Close current tab
-                        cv2.putText(img, "CLOSE TAB (Ctrl+W)", (50, 500),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
-                
-                self.last_four_finger_y = y_avg
+        if n >= 2:
+            pair = np.argsort(ids)[:2]  # The two hands tracked longest
+            px = d.landmarks_px[pair]
+            ctx.hands = d.positions[pair]
+            ctx.masks = fingers[pair] @ MASK_WEIGHTS
+            ctx.pinch = landmark_distance(px, 4, 8) / np.maximum(landmark_distance(px, 0, 9), 1.0)
+            gesture_name = self.two_hand_engine.process(ctx)
+            if gesture_name:
+                # One-hand gestures in progress start over once the pair lets go
+                for engine in self.hand_engines.values():
+                    engine.reset()
+                self._remember(gesture_name)
+                return ctx.fired
+        else:
+            self.two_hand_engine.reset()
         
-        # Reset holding gesture if hand changes
-        if not self.is_holding_gesture:
-            self.current_hold_gesture = None
+        primary = int(ids.argmin())
+        hand_id = int(ids[primary])
+        if hand_id != self.primary_hand:
+            # The cursor is now steered by another hand; don't carry the old one's motion over
+            self.primary_hand = hand_id
+            self.last_finger_pos = None
+            self.cursor_filter.reset()
+        engine = self.hand_engines.get(hand_id)
+        if engine is None:
+            engine = self.hand_engines[hand_id] = default_engine()
+        return self.execute_gesture(fingers[primary].tolist(), d.get_positions(primary), img,
+                                    now=ctx.now, frame_size=frame_size, engine=engine)
+    
+    def _drop_hand_engines(self):
+        # Recognizer state goes with the hand IDs that expired
+        for hand_id in self.hand_ids.dropped:
+            self.hand_engines.pop(hand_id, None)
+    
+    def release_hands(self, now=None):
+        """A frame without hands: gestures in progress start over once a hand is back
         
+        Otherwise a returning hand is measured against the swipe baselines and hold timers
+        it left behind. Hand IDs still expire while nobody is in view, so a hand arriving
+        later is a new one.
+        """
+        self.hand_ids.expire(now if now is not None else time.time())
+        self._drop_hand_engines()
+        self.gesture_engine.reset()
+        for engine in self.hand_engines.values():
+            engine.reset()
+        self.two_hand_engine.reset()
+    
+    def _remember(self, gesture_name):
         # Store gesture in history
-        gesture_name = self.get_gesture_name(fingers)
         if gesture_name and (not self.gesture_history or self.gesture_history[-1] != gesture_name):
             self.gesture_history.append(gesture_name)
             if len(self.gesture_history) > self.max_history:
@@ -326,19 +263,120 @@ class GestureController:
     
     def get_gesture_name(self, fingers):
         """Convert finger array to gesture name"""
-        if fingers == [0, 1, 0, 0, 0]:
-            return "CURSOR"
-        elif fingers == [0, 1, 1, 0, 0]:
-            return "SCROLL"
-        elif fingers == [0, 0, 0, 0, 0]:
-            return "MINIMIZE"
-        elif fingers == [1, 1, 1, 1, 1]:
-            return "MAXIMIZE"
-        elif fingers == [0, 1, 1, 1, 0]:
-            return "SHIFT_TAB"
-        elif fingers == [0, 1, 1, 1, 1]:
-            return "FOUR_FINGER"
-        return None
+        return self.gesture_engine.pose_names[finger_mask(fingers)]
+    
+    def detect(self, frame, draw=None):
+        """Run hand detection on a raw camera frame
+        
+        Returns the mirrored frame that gestures and overlays are drawn on, or None when
+        nothing needs it (a mirroring detector on a frame that isn't shown).
+        """
+        draw = self.display if draw is None else draw
+        if getattr(self.detector, "mirror", False):
+            # Landmarks come back mirrored; only the display needs a flipped image
+            self.detector.find_hands(frame, draw=False)
+            view = self.mirror_frame(frame) if draw else None
+        else:
+            view = self.mirror_frame(frame)
+            self.detector.find_hands(view, draw=False)
+        if view is not None and draw and self.detector.num_hands:
+            self.detector.draw_hands(view)
+        return view if draw else None
+    
+    def mirror_frame(self, frame):
+        return cv2.flip(frame, 1, dst=self.buffers.get("view", frame.shape))
+    
+    def _render_static_hud(self, canvas, frame_reduction, speed, hold):
+        h, w = canvas.shape[:2]
+        cv2.putText(canvas, f"Speed: {speed:.1f}x", (10, 60),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+        cv2.putText(canvas, f"Hold: {hold:.1f}s", (10, 90),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+        
+        # Draw interaction area
+        cv2.rectangle(canvas, (frame_reduction, frame_reduction),
+                     (w - frame_reduction, h - frame_reduction),
+                     (255, 0, 255), 2)
+        
+        # Display instructions
+        instructions = [
+            "CONTROLS:",
+            "1 Finger   : Cursor Move (Fast)",
+            "2 Fingers  : Scroll",
+            "Index Tap  : Left Click",
+            "Middle Tap : Right Click",
+            "Fist Hold  : Minimize All",
+            "Open Hold  : Maximize All",
+            "3 Fingers  : Shift Tab",
+            "4 Fingers  : Switch Apps",
+            "4 Up/Down  : Recent Tabs"
+        ]
+        
+        y_offset = 50
+        for instruction in instructions:
+            cv2.putText(canvas, instruction, (w - 250, y_offset),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+            y_offset += 25
+    
+    def _render_status_hud(self, canvas, fps, idle, history, quality):
+        # Display FPS and status
+        cv2.putText(canvas, f"FPS: {fps}", (10, 30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        if quality:
+            cv2.putText(canvas, f"Q: {quality}", (130, 30),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        if idle:
+            cv2.putText(canvas, "IDLE", (canvas.shape[1] // 2 - 30, 30),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 165, 255), 2)
+        
+        # Display gesture history
+        y_offset = 120
+        for gesture in reversed(history):
+            cv2.putText(canvas, f"Last: {gesture}", (10, y_offset),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+            y_offset += 25
+    
+    def handle_key(self, key):
+        """Apply one control key; False when the user asked to quit"""
+        if key == ord('q'):
+            return False
+        elif key == ord('+') or key == ord('='):
+            self.cursor_speed_factor = min(3.0, self.cursor_speed_factor + 0.1)
+            print(f"Cursor speed: {self.cursor_speed_factor:.1f}x")
+        elif key == ord('-') or key == ord('_'):
+            self.cursor_speed_factor = max(0.5, self.cursor_speed_factor - 0.1)
+            print(f"Cursor speed: {self.cursor_speed_factor:.1f}x")
+        elif key == ord('['):
+            self.gesture_hold_duration = max(0.5, self.gesture_hold_duration - 0.1)
+            print(f"Hold duration: {self.gesture_hold_duration:.1f}s")
+        elif key == ord(']'):
+            self.gesture_hold_duration = min(2.5, self.gesture_hold_duration + 0.1)
+            print(f"Hold duration: {self.gesture_hold_duration:.1f}s")
+        return True
+    
+    def _display_due(self, now):
+        """Whether this frame is shown, keeping the window at its own refresh rate"""
+        if not self.display or now < self.next_display_time:
+            return False
+        self.next_display_time += self.display_interval
+        if self.next_display_time < now:
+            self.next_display_time = now + self.display_interval
+        return True
+    
+    def _update_pipeline_latency(self):
+        """Smoothed capture-to-injection delay, used as the cursor prediction lead"""
+        now = time.time()
+        latency = now - self.frame_timestamp
+        if self.injector is not None:
+            latency += self.injector.latency_ewma
+        self.pipeline_latency += 0.1 * (latency - self.pipeline_latency)
+        if self.governor is not None:
+            self.governor.update(latency, now)
+    
+    def _apply_idle_rate(self):
+        """Match the camera read rate to the idle monitor state"""
+        if hasattr(self.cap, "set_read_interval"):
+            self.cap.set_read_interval(self.idle_monitor.frame_interval())
     
     def run(self):
         print("=" * 60)
@@ -358,6 +396,8 @@ class GestureController:
         print("  '+'  : Increase cursor speed")
         print("  '-'  : Decrease cursor speed")
         print("  'q'  : Quit application")
+        if self.controls is not None:
+            print("  (headless: type the keys into this console and press Enter)")
         print("=" * 60)
         
         while True:
@@ -369,83 +409,195 @@ class GestureController:
                 self.frame_count = 0
                 self.last_frame_time = current_time
             
-            success, img = self.cap.read()
+            with self.profiler.span("capture"):
+                success, frame = self.cap.read()
             if not success:
                 print("Failed to capture video feed")
                 break
+            # Capture stages stamp frames when they leave the camera
+            self.frame_timestamp = getattr(self.cap, "last_timestamp", None) or time.time()
+            if self.startup is not None:
+                self.startup.mark("first_frame")
+            frame_size = (frame.shape[1], frame.shape[0])
+            # Frames that won't be shown skip the flip and every bit of drawing
+            show = self._display_due(current_time)
             
-            img = cv2.flip(img, 1)
-            img = self.detector.find_hands(img)
-            lm_list = self.detector.find_position(img, draw=False)
-            
-            if lm_list:
-                fingers = self.detector.fingers_up(lm_list)
-                self.execute_gesture(fingers, lm_list, img)
-            
-            # Display FPS and status
-            cv2.putText(img, f"FPS: {self.fps}", (10, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            cv2.putText(img, f"Speed: {self.cursor_speed_factor:.1f}x", (10, 60),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-            cv2.putText(img, f"Hold: {self.gesture_hold_duration:.1f}s", (10, 90),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-            
-            # Display gesture history
-            y_offset = 120
-            for gesture in reversed(self.gesture_history[-3:]):
-                cv2.putText(img, f"Last: {gesture}", (10, y_offset),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-                y_offset += 25
-            
-            # Draw interaction area
-            h, w, _ = img.shape
-            cv2.rectangle(img, (self.frame_reduction, self.frame_reduction),
-                         (w - self.frame_reduction, h - self.frame_reduction),
-                         (255, 0, 255), 2)
+            # While idle, only a tiny motion check runs until something moves
+            idle = self.idle_monitor is not None and \
+                self.idle_monitor.skip_frame(frame, current_time, self.frame_timestamp)
+            if idle:
+                img = self.mirror_frame(frame) if show else None
+            else:
+                with self.profiler.span("inference"):
+                    img = self.detect(frame, draw=show)
+                # Pipelined detectors return landmarks of an earlier frame
+                self.frame_timestamp -= getattr(self.detector, "result_lag", 0.0)
+                if self.startup is not None and not self.startup.printed and \
+                        getattr(self.detector, "inference_frames", 1):
+                    self.startup.mark("first_landmarks")
+                    self.startup.print()
+                if self.idle_monitor is not None:
+                    self.idle_monitor.update(current_time, self.detector.num_hands > 0)
+                    self._apply_idle_rate()
             
-            # Display instructions
-            instructions = [
-                "CONTROLS:",
-                "1 Finger   : Cursor Move (Fast)",
-                "2 Fingers  : Scroll",
-                "Index Tap  : Left Click",
-                "Middle Tap : Right Click",
-                "Fist Hold  : Minimize All",
-                "Open Hold  : Maximize All",
-                "3 Fingers  : Shift Tab",
-                "4 Fingers  : Switch Apps",
-                "4 Up/Down  : Recent Tabs"
-            ]
+            if not idle and self.detector.num_hands:
+                with self.profiler.span("landmarks"):
+                    # Finger states of all hands in one batch, no per-frame list building
+                    fingers = self.detector.fingers_up_all()
+                with self.profiler.span("gestures"):
+                    self.execute_hands(img, fingers, frame_size=frame_size)
+                self._update_pipeline_latency()
+            else:
+                self.release_hands()
+            if not idle and self.recorder is not None:
+                self.recorder.record_frame(self.frame_timestamp, self.detector, frame_size)
             
-            y_offset = 50
-            for instruction in instructions:
-                cv2.putText(img, instruction, (w - 250, y_offset),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                y_offset += 25
+            self.profiler.maybe_export()
+            if idle:
+                # Reduced rate while idle; cameras on a capture thread are throttled directly
+                if not hasattr(self.cap, "set_read_interval"):
+                    time.sleep(self.idle_monitor.frame_interval())
             
-            cv2.imshow("Gesture Control v2.0", img)
-            
-            # Keyboard controls
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):
+            if show:
+                with self.profiler.span("render"):
+                    # Cached HUD layers, redrawn only when what they show changes
+                    quality = self.governor.name if self.governor is not None else None
+                    self.status_hud.composite(img, (self.fps, idle, tuple(self.gesture_history[-3:]),
+                                                    quality))
+                    self.static_hud.composite(img, (self.frame_reduction, self.cursor_speed_factor,
+                                                    self.gesture_hold_duration))
+                    if self.profile_overlay:
+                        self.profiler.draw(img)
+                    cv2.imshow("Gesture Control v2.0", img)
+                
+                # Keyboard controls
+                with self.profiler.span("wait_key"):
+                    key = cv2.waitKey(1) & 0xFF
+            elif self.controls is not None:
+                key = self.controls.poll()
+            else:
+                continue
+            if not self.handle_key(key):
                 break
-            elif key == ord('+') or key == ord('='):
-                self.cursor_speed_factor = min(3.0, self.cursor_speed_factor + 0.1)
-                print(f"Cursor speed: {self.cursor_speed_factor:.1f}x")
-            elif key == ord('-') or key == ord('_'):
-                self.cursor_speed_factor = max(0.5, self.cursor_speed_factor - 0.1)
-                print(f"Cursor speed: {self.cursor_speed_factor:.1f}x")
-            elif key == ord('['):
-                self.gesture_hold_duration = max(0.5, self.gesture_hold_duration - 0.1)
-                print(f"Hold duration: {self.gesture_hold_duration:.1f}s")
-            elif key == ord(']'):
-                self.gesture_hold_duration = min(2.5, self.gesture_hold_duration + 0.1)
-                print(f"Hold duration: {self.gesture_hold_duration:.1f}s")
         
+        if hasattr(self.cap, "stats"):
+            stats = self.cap.stats()
+            print(f"Capture: {stats['delivered']} frames used, {stats['dropped']} stale frames dropped, "
+                  f"avg frame age {stats['avg_age_ms']:.1f} ms")
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"Trace: {self.recorder.frames} frames written to {self.recorder.path}")
+        if self.injector is not None:
+            self.injector.close()
+            metrics = self.injector.metrics()
+            print(f"Input: {metrics['applied']} actions applied, {metrics['coalesced']} coalesced, "
+                  f"p95 injection latency {metrics['latency_p95_ms']:.1f} ms")
+        if self.idle_monitor is not None:
+            stats = self.idle_monitor.stats()
+            print(f"Idle: active {stats['active_s']:.0f}s at {stats['active_cpu_pct']:.0f}% CPU, "
+                  f"idle {stats['idle_s']:.0f}s at {stats['idle_cpu_pct']:.0f}% CPU, "
+                  f"{stats['wakes']} wakes, wake latency {stats['wake_latency_mean_ms']:.0f} ms avg")
+        if self.governor is not None:
+            stats = self.governor.stats(time.time())
+            parts = [f"ended at {stats['level']} after {stats['changes']} changes"]
+            times = ", ".join(f"{name} {s:.0f}s" for name, s in stats["level_s"].items() if s)
+            if times:
+                parts.append(times)
+            print("Quality: " + "; ".join(parts))
+        if self.profiler.enabled:
+            self.profiler.export()
+            for stage, st in self.profiler.snapshot().items():
+                print(f"  {stage:<10} p50 {st['p50_ms']:6.2f} ms  p95 {st['p95_ms']:6.2f} ms  "
+                      f"p99 {st['p99_ms']:6.2f} ms  max {st['max_ms']:6.2f} ms")
         self.cap.release()
-        cv2.destroyAllWindows()
+        if hasattr(self.detector, "close"):
+            self.detector.close()
+        if self.display:
+            cv2.destroyAllWindows()
         print("\nGesture Controller stopped. Thank you!")
 
 if __name__ == "__main__":
-    controller = GestureController()
+    parser = argparse.ArgumentParser(description="Hand gesture mouse controller")
+    parser.add_argument("--capture", choices=["thread", "process", "sync"], default="thread",
+                        help="how frames are read from the camera")
+    parser.add_argument("--roi", action="store_true",
+                        help="crop inference to the area around the last detected hand")
+    parser.add_argument("--roi-size", type=int, help="downscale ROI crops to this square size")
+    parser.add_argument("--sparse", type=int, default=1,
+                        help="run MediaPipe every N frames and track landmarks with optical flow in between")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="run detection in this many worker processes fed through shared memory")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="solutions",
+                        help="inference backend: the blocking solutions graph or the async Tasks landmarker")
+    parser.add_argument("--hands", type=int, default=1,
+                        help="hands to track; with 2, pinch-zoom and two-fist drag work")
+    parser.add_argument("--model", default="hand_landmarker.task", help="model bundle for the tasks backend")
+    parser.add_argument("--cursor-filter", choices=["none", "one_euro", "kalman"], default="none",
+                        help="smoothing filter for the fingertip before it is mapped to the screen")
+    parser.add_argument("--prediction-lead", type=float, default=0.0,
+                        help="seconds to extrapolate the cursor ahead")
+    parser.add_argument("--predict-latency", action="store_true",
+                        help="extrapolate the cursor by the measured capture-to-injection latency")
+    parser.add_argument("--headless", action="store_true",
+                        help="no window and no drawing; the key controls are read from stdin")
+    parser.add_argument("--display-fps", type=float,
+                        help="refresh the window at most this often (default: every processed frame)")
+    parser.add_argument("--latency-target", type=float,
+                        help="adapt model, inference size and cadence to keep capture-to-injection "
+                             "latency under this many ms (e.g. 40; overrides --sparse)")
+    parser.add_argument("--calibration",
+                        help="cursor calibration file written by calibration.py (default: the camera box)")
+    parser.add_argument("--record", help="write a landmark/action trace of the session to this file")
+    parser.add_argument("--idle-after", type=float, default=5.0,
+                        help="seconds without a hand before dropping to motion-only idle mode (0 = never)")
+    parser.add_argument("--profile", action="store_true", help="time every stage of the loop")
+    parser.add_argument("--profile-jsonl", help="append periodic latency snapshots to this file")
+    parser.add_argument("--profile-prom", help="keep a Prometheus text file with stage latencies")
+    parser.add_argument("--profile-overlay", action="store_true",
+                        help="draw the latency breakdown on the video window")
+    args = parser.parse_args()
+    if args.latency_target and args.workers:
+        parser.error("--latency-target adjusts an in-process detector and can't be combined "
+                     "with --workers")
+    if args.backend == "tasks":
+        problem = model_problem(args.model)
+        if problem:
+            parser.error(f"{problem} (or pass --model)")
+    
+    startup = StartupReport(origin=process_origin())
+    startup.mark("imports")
+    # The camera opens on its own thread (OpenCV releases the GIL while it waits on the
+    # driver) while MediaPipe is imported, built and run once on a blank frame
+    width, height = GestureController.camera_size
+    camera = BackgroundTask(startup, "camera_open", lambda: open_capture(0, width, height, mode=args.capture))
+    
+    profiler = Profiler(enabled=args.profile or args.profile_overlay or bool(args.profile_jsonl)
+                        or bool(args.profile_prom),
+                        jsonl_path=args.profile_jsonl, prom_path=args.profile_prom)
+    detector_args = dict(max_hands=args.hands, roi_tracking=args.roi, roi_size=args.roi_size,
+                         inference_interval=args.sparse, mirror=True, backend=args.backend)
+    if args.backend == "tasks":
+        detector_args["model_path"] = args.model
+    with startup.phase("model_load"):
+        if args.workers:
+            detector = ProcessDetector(workers=args.workers, **detector_args)
+        else:
+            detector = HandDetector(**detector_args)
+    with startup.phase("model_warmup"):
+        detector.warm_up((height, width, 3))
+    with startup.phase("input_backend"):
+        backend = PyAutoGuiBackend()
+    idle_monitor = IdleMonitor(idle_after=args.idle_after) if args.idle_after > 0 else None
+    calibration = Calibration.load(args.calibration) if args.calibration else None
+    cap = camera.result()
+    with startup.phase("controller"):
+        controller = GestureController(source=cap, backend=backend, detector=detector,
+                                       profiler=profiler, profile_overlay=args.profile_overlay,
+                                       idle_monitor=idle_monitor, cursor_filter=args.cursor_filter,
+                                       prediction_lead=None if args.predict_latency else args.prediction_lead,
+                                       recorder=TraceRecorder(args.record) if args.record else None,
+                                       display=not args.headless, display_fps=args.display_fps,
+                                       controls=ConsoleControls().start() if args.headless else None,
+                                       startup=startup, latency_target_ms=args.latency_target,
+                                       calibration=calibration)
     controller.run()
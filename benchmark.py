@@ -0,0 +1,324 @@
+# benchmark.py
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from app import GestureController
+from detector_backend import BACKENDS, model_problem
+from hand_detector import HandDetector
+from process_detector import ProcessDetector
+from frame_source import open_source
+from input_backend import RecordingBackend
+
+STAGES = ["capture", "flip", "find_hands", "landmarks", "fingers_up", "execute_gesture", "total", "latency"]
+
+
+def summarize(samples):
+    """Turn per-stage latency samples (seconds) into ms statistics"""
+    stats = {}
+    for stage, values in samples.items():
+        if not values:
+            continue
+        ms = np.asarray(values) * 1000
+        stats[stage] = {
+            "count": len(ms),
+            "mean_ms": float(ms.mean()),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "p99_ms": float(np.percentile(ms, 99)),
+            "max_ms": float(ms.max()),
+        }
+    return stats
+
+
+def _max_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def _backend_results(detector):
+    """Results the inference backend finished; an async backend skips frames while it is busy"""
+    hands = getattr(detector, "hands", None)
+    if hands is None:
+        return None
+    return {"submitted": hands.submitted, "completed": hands.completed}
+
+
+def run_benchmark(source, max_frames=0, warmup=5, detector=None, async_input=False,
+                  reference=None, memory=False, pace=0.0):
+    """Run the detection-to-action pipeline over `source` as fast as possible
+
+    With a `reference` detector, every frame is also run through it (outside the
+    timings) and the landmark error of `detector` against it is reported. With
+    `memory`, tracemalloc measures the bytes each frame allocates and keeps. With
+    `pace`, frames are released at that rate like a camera would deliver them.
+    """
+    backend = RecordingBackend()
+    controller = GestureController(source=source, backend=backend, display=False,
+                                   detector=detector, async_input=async_input)
+    detector = controller.detector
+    samples = {stage: [] for stage in STAGES}
+    clock = time.perf_counter
+
+    frames = 0
+    hands_found = 0
+    start = None
+    reference_time = 0.0
+    errors = {"tracked": [], "inferred": []}
+    mirrored = getattr(detector, "mirror", False)
+    allocated, retained = [], []
+    results_start = None
+    next_frame_time = clock()
+    if memory:
+        tracemalloc.start()
+    while not max_frames or frames < max_frames + warmup:
+        if pace:
+            next_frame_time += 1.0 / pace
+            delay = next_frame_time - clock()
+            if delay > 0:
+                time.sleep(delay)
+        if memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        t0 = clock()
+        success, raw = controller.cap.read()
+        if not success:
+            break
+        t1 = clock()
+        controller.frame_timestamp = getattr(controller.cap, "last_timestamp", None) or time.time()
+        frame_size = (raw.shape[1], raw.shape[0])
+        # Same path as the app: a mirroring detector takes the raw frame, no flip needed
+        img = None if mirrored else controller.mirror_frame(raw)
+        t2 = clock()
+        tracked_before = detector.tracked_frames
+        detector.find_hands(raw if mirrored else img, draw=False)
+        t3 = clock()
+        # Pipelined detectors return landmarks of an earlier frame
+        controller.frame_timestamp -= getattr(detector, "result_lag", 0.0)
+        found = detector.num_hands > 0
+        detector.get_landmarks()
+        t4 = clock()
+        t5 = t6 = t4
+        if found:
+            fingers = detector.fingers_up_all()
+            t5 = clock()
+            controller.execute_hands(img, fingers, frame_size=frame_size)
+            t6 = clock()
+        else:
+            controller.release_hands()
+        frames += 1
+        if memory:
+            current, peak = tracemalloc.get_traced_memory()
+
+        reference_dt = 0.0
+        if reference is not None:
+            # The unflipped frame is never drawn on, so the reference sees a clean copy
+            r0 = clock()
+            reference.find_hands(cv2.flip(raw, 1), draw=False)
+            n = min(reference.num_hands, detector.num_hands)
+            if n:
+                # Mean per-landmark pixel distance to full inference
+                delta = detector.landmarks_px[:n, :, :2] - reference.landmarks_px[:n, :, :2]
+                error = float(np.sqrt((delta * delta).sum(axis=-1)).mean())
+                kind = "tracked" if detector.tracked_frames > tracked_before else "inferred"
+                errors[kind].append(error)
+            reference_dt = clock() - r0
+
+        # Skip the first frames while MediaPipe initializes its graph
+        if frames <= warmup:
+            continue
+        if start is None:
+            start = t0
+            results_start = _backend_results(detector)
+        reference_time += reference_dt
+        hands_found += found
+        if memory:
+            allocated.append(peak - base)
+            retained.append(current - base)
+        samples["capture"].append(t1 - t0)
+        samples["flip"].append(t2 - t1)
+        samples["find_hands"].append(t3 - t2)
+        samples["landmarks"].append(t4 - t3)
+        if found:
+            samples["fingers_up"].append(t5 - t4)
+            samples["execute_gesture"].append(t6 - t5)
+        samples["total"].append(t6 - t0)
+        # Capture to landmarks; a pipelined detector adds the frames its result trails by
+        samples["latency"].append(t3 - t0 + getattr(detector, "result_lag", 0.0))
+
+    elapsed = clock() - start - reference_time if start is not None else 0
+    if memory:
+        tracemalloc.stop()
+    controller.cap.release()
+    if hasattr(detector, "close"):
+        detector.close()
+    backend_results = _backend_results(detector)
+    if backend_results is not None and results_start is not None:
+        backend_results = {k: v - results_start[k] for k, v in backend_results.items()}
+        backend_results["per_second"] = backend_results["completed"] / elapsed if elapsed > 0 else 0.0
+    injector = None
+    if async_input:
+        controller.injector.close()
+        injector = controller.injector.metrics()
+    measured = max(frames - warmup, 0)
+    return {
+        "frames": measured,
+        "hands_found": hands_found,
+        "fps": measured / elapsed if elapsed > 0 else 0.0,
+        "stages": summarize(samples),
+        "actions": backend.counts(),
+        "roi_frames": detector.roi_frames,
+        "full_frames": detector.full_frames,
+        "inference_frames": detector.inference_frames,
+        "tracked_frames": detector.tracked_frames,
+        "backend_results": backend_results,
+        "landmark_error_px": {
+            kind: {"frames": len(values), "mean": float(np.mean(values)), "p95": float(np.percentile(values, 95))}
+            for kind, values in errors.items() if values
+        },
+        "injector": injector,
+        "memory": {
+            "peak_alloc_kb_mean": float(np.mean(allocated)) / 1024,
+            "peak_alloc_kb_p95": float(np.percentile(allocated, 95)) / 1024,
+            "retained_bytes_per_frame": float(np.mean(retained)),
+            "max_rss_mb": _max_rss_mb(),
+        } if allocated else None,
+    }
+
+
+def make_detector(args, workers=0, backend=None):
+    detector_args = dict(max_hands=args.hands, roi_tracking=args.roi, roi_size=args.roi_size,
+                         inference_interval=args.sparse, mirror=True, backend=backend or args.backend)
+    if detector_args["backend"] == "tasks":
+        detector_args["model_path"] = args.model
+    if workers:
+        return ProcessDetector(workers=workers, **detector_args)
+    return HandDetector(**detector_args)
+
+
+def print_comparison(reports):
+    # "blocked" is how long find_hands holds up the loop, "latency" how old the landmarks are
+    print(f"{'pipeline':<18}{'FPS':>8}{'blocked p50':>13}{'latency p50':>13}{'latency p95':>13}"
+          f"{'results/s':>11}")
+    for name, report in reports.items():
+        blocked = report["stages"].get("find_hands", {})
+        latency = report["stages"].get("latency", {})
+        results = report["backend_results"]
+        per_second = f"{results['per_second']:.1f}" if results else "-"
+        print(f"{name:<18}{report['fps']:>8.1f}{blocked.get('p50_ms', 0):>11.2f}ms"
+              f"{latency.get('p50_ms', 0):>11.2f}ms{latency.get('p95_ms', 0):>11.2f}ms{per_second:>11}")
+
+
+def print_report(report):
+    print(f"Frames: {report['frames']}  Hands found: {report['hands_found']}  FPS: {report['fps']:.1f}")
+    print(f"{'stage':<18}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+    for stage, s in report["stages"].items():
+        print(f"{stage:<18}{s['p50_ms']:>9.2f}{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}{s['max_ms']:>9.2f}")
+    if report["roi_frames"]:
+        print(f"ROI crops: {report['roi_frames']}  Full frames: {report['full_frames']}")
+    results = report["backend_results"]
+    if results and results["completed"] != results["submitted"]:
+        print(f"Backend: {results['completed']} of {results['submitted']} frames produced a result "
+              f"({results['per_second']:.1f}/s)")
+    if report["tracked_frames"]:
+        print(f"Inference frames: {report['inference_frames']}  Optical-flow frames: {report['tracked_frames']}")
+    for kind, e in report["landmark_error_px"].items():
+        print(f"Landmark error vs full inference ({kind}): mean {e['mean']:.2f} px, "
+              f"p95 {e['p95']:.2f} px over {e['frames']} frames")
+    if report["injector"]:
+        inj = report["injector"]
+        print(f"Injector: {inj['applied']} applied, {inj['coalesced']} coalesced, "
+              f"max depth {inj['max_queue_depth']}, p95 latency {inj['latency_p95_ms']:.2f} ms")
+    if report["memory"]:
+        mem = report["memory"]
+        rss = f", max RSS {mem['max_rss_mb']:.0f} MB" if mem["max_rss_mb"] is not None else ""
+        print(f"Memory per frame: peak allocation {mem['peak_alloc_kb_mean']:.1f} KB mean, "
+              f"{mem['peak_alloc_kb_p95']:.1f} KB p95, {mem['retained_bytes_per_frame']:.0f} B retained{rss}")
+    if report["actions"]:
+        print("Actions: " + ", ".join(f"{k}={v}" for k, v in sorted(report["actions"].items())))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless benchmark of the gesture pipeline")
+    parser.add_argument("--source", default="synthetic",
+                        help="video file, image directory or 'synthetic[:frames]'")
+    parser.add_argument("--frames", type=int, default=0, help="stop after this many frames (0 = whole source)")
+    parser.add_argument("--warmup", type=int, default=5, help="frames excluded from the statistics")
+    parser.add_argument("--roi", action="store_true", help="enable ROI-cropped inference")
+    parser.add_argument("--roi-size", type=int, help="downscale ROI crops to this square size")
+    parser.add_argument("--sparse", type=int, default=1,
+                        help="run MediaPipe every N frames and optical flow in between")
+    parser.add_argument("--landmark-error", action="store_true",
+                        help="compare landmarks against full inference on every frame")
+    parser.add_argument("--async-input", action="store_true",
+                        help="inject actions through the background InputInjector")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="run detection in this many worker processes fed through shared memory")
+    parser.add_argument("--compare", action="store_true",
+                        help="run the source once single-threaded and once with --workers, and compare")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="solutions",
+                        help="inference backend: the blocking solutions graph or the async Tasks landmarker")
+    parser.add_argument("--hands", type=int, default=1, help="hands to track")
+    parser.add_argument("--model", default="hand_landmarker.task", help="model bundle for the tasks backend")
+    parser.add_argument("--compare-backends", action="store_true",
+                        help="run the source once with each backend, and compare")
+    parser.add_argument("--pace", type=float, default=0.0,
+                        help="release frames at this rate like a camera (default: as fast as possible)")
+    parser.add_argument("--memory", action="store_true",
+                        help="trace per-frame allocations with tracemalloc (slows the run down)")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--max-p95-ms", type=float,
+                        help="exit with status 1 if total p95 latency exceeds this budget")
+    args = parser.parse_args(argv)
+    if args.backend == "tasks" or args.compare_backends:
+        problem = model_problem(args.model)
+        if problem:
+            parser.error(f"{problem} (or pass --model)")
+
+    if args.compare or args.compare_backends:
+        reports = {}
+        if args.compare_backends:
+            for backend in BACKENDS:
+                reports[backend] = run_benchmark(open_source(args.source), args.frames, args.warmup,
+                                                 make_detector(args, args.workers, backend), args.async_input,
+                                                 pace=args.pace)
+        else:
+            for workers in (0, args.workers or 2):
+                name = f"{workers} workers" if workers else "single thread"
+                reports[name] = run_benchmark(open_source(args.source), args.frames, args.warmup,
+                                              make_detector(args, workers), args.async_input,
+                                              pace=args.pace)
+        print_comparison(reports)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(reports, f, indent=2)
+        return 0
+
+    detector = make_detector(args, args.workers)
+    # The reference sees flipped frames, so the error also covers landmark mirroring
+    reference = HandDetector(max_hands=args.hands) if args.landmark_error else None
+    report = run_benchmark(open_source(args.source), args.frames, args.warmup, detector,
+                           args.async_input, reference, args.memory, args.pace)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    total = report["stages"].get("total")
+    if args.max_p95_ms is not None and total and total["p95_ms"] > args.max_p95_ms:
+        print(f"FAIL: total p95 {total['p95_ms']:.2f} ms exceeds budget {args.max_p95_ms:.2f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+# calibration.py
+import argparse
+import json
+import sys
+import time
+
+import cv2
+import numpy as np
+
+LUT_STEPS = 4  # Piecewise table entries per camera pixel, so the cursor still moves in ~1 px steps
+
+
+class DesktopLayout:
+    """Monitor rectangles of the virtual desktop, re-queried lazily
+
+    `query` returns (x, y, width, height) per monitor. refresh() is cheap to call every
+    frame: it only asks the OS again once `recheck_interval` seconds have passed.
+    """
+
+    def __init__(self, query, recheck_interval=5.0):
+        self.query = query
+        self.recheck_interval = recheck_interval
+        self.version = 0  # Bumped on every change, for caches keyed on the layout
+        self.checked_at = time.time()
+        self._set(query())
+
+    def _set(self, monitors):
+        self.monitors = [tuple(int(v) for v in m) for m in monitors]
+        rects = np.array(self.monitors, dtype=np.float64)
+        self.lo = rects[:, :2]
+        self.hi = rects[:, :2] + rects[:, 2:] - 1  # Last pixel of each monitor
+        self.origin = self.lo.min(axis=0)
+        self.size = (rects[:, :2] + rects[:, 2:]).max(axis=0) - self.origin
+        self.version += 1
+
+    def refresh(self, now):
+        """Re-query the monitors if the last check is old enough; True when the layout changed"""
+        if now - self.checked_at < self.recheck_interval:
+            return False
+        self.checked_at = now
+        monitors = [tuple(int(v) for v in m) for m in self.query()]
+        if monitors == self.monitors:
+            return False
+        self._set(monitors)
+        print(f"Monitor layout changed: {len(monitors)} monitor(s), "
+              f"desktop {self.size[0]:.0f}x{self.size[1]:.0f}")
+        return True
+
+    def clamp(self, point):
+        """Nearest on-screen pixel, so the cursor never lands in a gap between monitors"""
+        if len(self.monitors) == 1:
+            return np.clip(point, self.lo[0], self.hi[0])
+        candidates = np.clip(point, self.lo, self.hi)
+        return candidates[((candidates - point) ** 2).sum(axis=1).argmin()]
+
+    def monitor_at(self, point):
+        """Index of the monitor showing a desktop pixel, or None"""
+        inside = np.all((self.lo <= point) & (point <= self.hi), axis=1)
+        return int(inside.argmax()) if inside.any() else None
+
+
+class CursorMap:
+    """A calibration compiled for one frame size and monitor layout: camera pixels to desktop pixels
+
+    Either a 3x3 matrix or one lookup table per axis; both take (..., 2) points in one step.
+    """
+
+    def __init__(self, lo, hi, matrix=None, luts=None):
+        self.lo = lo
+        self.hi = hi
+        self.matrix = matrix
+        self.luts = luts
+        if luts is not None:
+            self.last = np.array([len(luts[0]) - 1, len(luts[1]) - 1])
+
+    def __call__(self, points):
+        points = np.asarray(points, dtype=np.float64)
+        if self.luts is not None:
+            idx = np.clip((points * LUT_STEPS + 0.5).astype(np.intp), 0, self.last)
+            out = np.stack([self.luts[0][idx[..., 0]], self.luts[1][idx[..., 1]]], axis=-1)
+        else:
+            p = points @ self.matrix[:, :2].T + self.matrix[:, 2]
+            out = p[..., :2] / p[..., 2:]
+        return np.clip(out, self.lo, self.hi)
+
+
+class Calibration:
+    """Camera-to-desktop mapping in normalized coordinates
+
+    Camera points are in the mirrored frame, desktop points relative to the bounding box of
+    all monitors, both in [0, 1].
+    - "linear": the camera box inside `margin_px` covers the whole desktop (the uncalibrated default)
+    - "homography": a perspective fit to the calibration targets
+    - "piecewise": per-axis knots through the targets, extended to the desktop edges and
+      pinned beyond them (the dead zone at the camera edges). `acceleration` bends the curve so
+      the cursor is gentler in the middle and faster towards the edges.
+    """
+
+    def __init__(self, kind="linear", margin_px=80, homography=None, knots=None, acceleration=0.0,
+                 monitors=None):
+        self.kind = kind
+        self.margin_px = margin_px
+        self.homography = np.asarray(homography, dtype=np.float64) if homography is not None else None
+        self.knots = knots  # Per axis: [camera positions, desktop positions]
+        self.acceleration = acceleration
+        self.monitors = [tuple(m) for m in monitors] if monitors else None  # Layout it was fitted on
+        self.warned_layout = False
+
+    @classmethod
+    def fit(cls, camera, desktop, kind="homography", acceleration=0.0, monitors=None):
+        """Fit to (targets, 2) normalized camera points and the desktop points they were aimed at"""
+        camera = np.asarray(camera, dtype=np.float64)
+        desktop = np.asarray(desktop, dtype=np.float64)
+        if kind == "homography":
+            if len(camera) < 4:
+                raise ValueError("A homography needs at least 4 targets")
+            # RANSAC, so one target that was pointed at sloppily doesn't skew the rest
+            homography, _ = cv2.findHomography(camera, desktop, cv2.RANSAC, 0.05)
+            if homography is None:
+                raise ValueError("The calibration targets are degenerate; redo the calibration")
+            return cls("homography", homography=homography, monitors=monitors)
+
+        knots = []
+        for axis in (0, 1):
+            # Targets in one column (row) share a desktop x (y); their median camera x (y) is a knot
+            values = np.unique(desktop[:, axis])
+            cam = [float(np.median(camera[desktop[:, axis] == v, axis])) for v in values]
+            if len(values) < 2 or np.any(np.diff(cam) <= 0):
+                raise ValueError(f"The calibration targets along {'xy'[axis]} are out of order; "
+                                 "redo the calibration")
+            knots.append([cam, values.tolist()])
+        return cls("piecewise", knots=knots, acceleration=acceleration, monitors=monitors)
+
+    def _curve(self, axis, positions):
+        """Piecewise mapping of normalized camera positions along one axis"""
+        cam, scr = (list(k) for k in self.knots[axis])
+        # Extend the outer segments to the desktop edges; np.interp pins everything beyond
+        slope = (scr[1] - scr[0]) / (cam[1] - cam[0])
+        cam.insert(0, cam[0] - scr[0] / slope)
+        scr.insert(0, 0.0)
+        slope = (scr[-1] - scr[-2]) / (cam[-1] - cam[-2])
+        cam.append(cam[-1] + (1.0 - scr[-1]) / slope)
+        scr.append(1.0)
+        v = np.interp(positions, cam, scr)
+        if self.acceleration:
+            u = 2 * v - 1
+            v = (u * (1 + self.acceleration * np.abs(u)) / (1 + self.acceleration) + 1) / 2
+        return v
+
+    def compile(self, frame_size, layout):
+        """CursorMap from camera pixels of `frame_size` frames to pixels of the `layout` desktop"""
+        if self.monitors and self.monitors != layout.monitors and not self.warned_layout:
+            print("Calibration was made on another monitor layout; stretching it over the current desktop")
+            self.warned_layout = True
+        w, h = frame_size
+        origin, size = layout.origin, layout.size
+        lo, hi = origin, origin + size
+        if self.kind == "piecewise":
+            luts = []
+            for axis, n in ((0, w), (1, h)):
+                positions = np.arange(n * LUT_STEPS + 1) / (n * LUT_STEPS)
+                luts.append(origin[axis] + self._curve(axis, positions) * size[axis])
+            return CursorMap(lo, hi, luts=luts)
+        if self.kind == "linear":
+            r = self.margin_px
+            scale = size / np.array([w - 2 * r, h - 2 * r])
+            offset = origin - r * scale
+            matrix = np.array([[scale[0], 0, offset[0]], [0, scale[1], offset[1]], [0, 0, 1]])
+            return CursorMap(lo, hi, matrix=matrix)
+        to_desktop = np.array([[size[0], 0, origin[0]], [0, size[1], origin[1]], [0, 0, 1]])
+        from_camera = np.diag([1.0 / w, 1.0 / h, 1.0])
+        return CursorMap(lo, hi, matrix=to_desktop @ self.homography @ from_camera)
+
+    def save(self, path):
+        data = {
+            "kind": self.kind,
+            "margin_px": self.margin_px,
+            "homography": self.homography.tolist() if self.homography is not None else None,
+            "knots": self.knots,
+            "acceleration": self.acceleration,
+            "monitors": self.monitors,
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(**json.load(f))
+
+
+def calibration_targets(layout, grid=3, margin=0.1):
+    """Desktop pixels of a grid x grid pattern over the desktop, keeping those on a monitor"""
+    steps = np.linspace(margin, 1 - margin, grid)
+    targets = []
+    for fy in steps:
+        for fx in steps:
+            point = np.round(layout.origin + (fx, fy) * layout.size)
+            if layout.monitor_at(point) is not None:
+                targets.append(point)
+    return targets
+
+
+def run_calibration(detector, cap, layout, kind="homography", grid=3, acceleration=0.0,
+                    dwell=0.8, max_spread=0.015):
+    """Show each target fullscreen on its monitor and record where the index fingertip points
+
+    A target is taken once the fingertip has held still (within `max_spread`, normalized)
+    for `dwell` seconds. Returns the fitted Calibration and the targets' fit error in
+    desktop pixels, or None if the user quits with q or Esc.
+    """
+    window = "Calibration"
+    camera_points, desktop_points = [], []
+    shown_monitor = None
+    previous = None
+    for target in calibration_targets(layout, grid):
+        monitor = layout.monitor_at(target)
+        mx, my, mw, mh = layout.monitors[monitor]
+        if monitor != shown_monitor:
+            cv2.destroyAllWindows()
+            cv2.namedWindow(window, cv2.WINDOW_NORMAL)
+            cv2.moveWindow(window, mx, my)
+            cv2.setWindowProperty(window, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+            shown_monitor = monitor
+        canvas = np.zeros((mh, mw, 3), dtype=np.uint8)
+        center = (int(target[0]) - mx, int(target[1]) - my)
+        samples = []
+        hold_start = None
+        while True:
+            success, frame = cap.read()
+            if not success:
+                raise RuntimeError("Failed to capture video feed")
+            detector.find_hands(frame, draw=False)
+            now = time.time()
+            tip = detector.landmarks[0, 8, :2].copy() if detector.num_hands else None
+            if tip is None or (previous is not None and np.abs(tip - previous).max() < 3 * max_spread):
+                # No hand, or still resting where the last target was taken
+                samples.clear()
+            elif samples and np.abs(tip - samples[0]).max() > max_spread:
+                samples = [tip]
+                hold_start = now
+            else:
+                if not samples:
+                    hold_start = now
+                samples.append(tip)
+            progress = min((now - hold_start) / dwell, 1.0) if samples else 0.0
+
+            canvas[:] = 0
+            cv2.putText(canvas, f"Point at the target and hold still  ({len(camera_points) + 1})",
+                        (40, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+            cv2.circle(canvas, center, 20, (0, 255, 255), 2)
+            cv2.circle(canvas, center, 4, (0, 255, 255), cv2.FILLED)
+            if progress:
+                cv2.ellipse(canvas, center, (32, 32), -90, 0, 360 * progress, (0, 255, 0), 4)
+            cv2.imshow(window, canvas)
+            key = cv2.waitKey(1) & 0xFF
+            if key in (ord('q'), 27):
+                cv2.destroyAllWindows()
+                return None
+            if progress >= 1.0:
+                previous = np.median(samples, axis=0)
+                camera_points.append(previous)
+                desktop_points.append((target - layout.origin) / layout.size)
+                break
+    cv2.destroyAllWindows()
+
+    calibration = Calibration.fit(camera_points, desktop_points, kind, monitors=layout.monitors)
+    # How far the compiled mapping lands from each target, before acceleration bends it on purpose
+    w, h = detector.scale[0], detector.scale[1]
+    mapped = calibration.compile((int(w), int(h)), layout)(np.asarray(camera_points) * (w, h))
+    errors = np.sqrt(((mapped - (np.asarray(desktop_points) * layout.size + layout.origin)) ** 2).sum(axis=1))
+    calibration.acceleration = acceleration
+    return calibration, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit the camera-to-desktop cursor mapping")
+    parser.add_argument("--output", default="calibration.json", help="where to save the calibration")
+    parser.add_argument("--kind", choices=["homography", "piecewise"], default="homography",
+                        help="perspective fit, or per-axis curve with edge dead zones")
+    parser.add_argument("--grid", type=int, default=3, help="targets per row and column")
+    parser.add_argument("--acceleration", type=float, default=0.0,
+                        help="piecewise only: extra cursor gain towards the screen edges (0 = none)")
+    args = parser.parse_args(argv)
+
+    from frame_capture import open_capture
+    from hand_detector import HandDetector
+    from input_backend import PyAutoGuiBackend
+
+    layout = DesktopLayout(PyAutoGuiBackend().monitors)
+    cap = open_capture(0, 640, 480)
+    detector = HandDetector(max_hands=1, mirror=True)
+    try:
+        result = run_calibration(detector, cap, layout, args.kind, args.grid, args.acceleration)
+    finally:
+        cap.release()
+        detector.close()
+    if result is None:
+        print("Calibration cancelled")
+        return 1
+    calibration, errors = result
+    calibration.save(args.output)
+    print(f"Calibration saved to {args.output}: {len(errors)} targets, "
+          f"error {errors.mean():.1f} px mean, {errors.max():.1f} px max")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
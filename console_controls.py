@@ -0,0 +1,35 @@
+# console_controls.py
+import queue
+import sys
+import threading
+
+
+class ConsoleControls:
+    """The window's single-key controls read from stdin, for headless runs
+
+    Every character of a line is one key press, so "+++" followed by Enter is three
+    speed steps and "q" quits.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdin
+        self.keys = queue.SimpleQueue()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._reader, name="console-controls", daemon=True)
+        self.thread.start()
+        return self
+
+    def _reader(self):
+        # Stops quietly at EOF, e.g. when stdin is closed under a service manager
+        for line in self.stream:
+            for ch in line.strip():
+                self.keys.put(ord(ch))
+
+    def poll(self):
+        """Next key code, or -1 when nothing was typed (like cv2.waitKey)"""
+        try:
+            return self.keys.get_nowait()
+        except queue.Empty:
+            return -1
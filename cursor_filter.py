@@ -0,0 +1,201 @@
+# cursor_filter.py
+import argparse
+import math
+
+import numpy as np
+
+
+class OneEuroFilter:
+    """One Euro filter over any number of points at once, e.g. (points, 2) arrays"""
+
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff  # Hz, lower = less jitter at rest
+        self.beta = beta  # Cutoff increase with speed, higher = less lag when moving
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.velocity = None
+        self.last_time = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, x, t):
+        x = np.asarray(x, dtype=np.float64)
+        if self.value is None:
+            self.value = x.copy()
+            self.velocity = np.zeros_like(x)
+            self.last_time = t
+            return self.value.copy()
+        if t <= self.last_time:
+            # Same capture tick or a stale sample: keep the smoothing state as it is
+            return self.value.copy()
+        dt = t - self.last_time
+        self.last_time = t
+
+        raw_velocity = (x - self.value) / dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        self.velocity += a_d * (raw_velocity - self.velocity)
+
+        # Per-point cutoff from that point's speed
+        speed = np.sqrt((self.velocity * self.velocity).sum(axis=-1, keepdims=True))
+        cutoff = self.min_cutoff + self.beta * speed
+        tau = 1.0 / (2 * np.pi * cutoff)
+        a = 1.0 / (1.0 + tau / dt)
+        self.value += a * (x - self.value)
+        return self.value.copy()
+
+    def predict(self, lead):
+        """Extrapolate the filtered points `lead` seconds ahead"""
+        return self.value + self.velocity * lead
+
+
+class KalmanFilter:
+    """Constant-velocity Kalman filter, each axis of each point filtered independently"""
+
+    def __init__(self, process_noise=5000.0, measurement_noise=4.0):
+        self.q = process_noise  # Acceleration variance (px/s^2)^2
+        self.r = measurement_noise  # Measurement variance px^2
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.velocity = None
+        self.last_time = None
+
+    def __call__(self, z, t):
+        z = np.asarray(z, dtype=np.float64)
+        if self.value is None:
+            self.value = z.copy()
+            self.velocity = np.zeros_like(z)
+            # Covariance terms [[p00, p01], [p01, p11]] per axis
+            self.p00 = np.full_like(z, self.r)
+            self.p01 = np.zeros_like(z)
+            self.p11 = np.full_like(z, 1e4)
+            self.last_time = t
+            return self.value.copy()
+        if t <= self.last_time:
+            return self.value.copy()
+        dt = t - self.last_time
+        self.last_time = t
+
+        # Predict
+        self.value += self.velocity * dt
+        dt2, dt3, dt4 = dt * dt, dt ** 3, dt ** 4
+        p00 = self.p00 + dt * (2 * self.p01 + dt * self.p11) + self.q * dt4 / 4
+        p01 = self.p01 + dt * self.p11 + self.q * dt3 / 2
+        p11 = self.p11 + self.q * dt2
+
+        # Update with the position measurement
+        s = p00 + self.r
+        k0, k1 = p00 / s, p01 / s
+        innovation = z - self.value
+        self.value += k0 * innovation
+        self.velocity += k1 * innovation
+        self.p00 = (1 - k0) * p00
+        self.p01 = (1 - k0) * p01
+        self.p11 = p11 - k1 * p01
+        return self.value.copy()
+
+    def predict(self, lead):
+        return self.value + self.velocity * lead
+
+
+class PassthroughFilter:
+    """No smoothing; velocity from the last two samples so prediction still works"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.velocity = None
+        self.last_time = None
+
+    def __call__(self, x, t):
+        x = np.asarray(x, dtype=np.float64)
+        if self.value is None or t <= self.last_time:
+            self.velocity = np.zeros_like(x)
+        else:
+            self.velocity = (x - self.value) / (t - self.last_time)
+        self.value = x.copy()
+        self.last_time = t
+        return self.value.copy()
+
+    def predict(self, lead):
+        return self.value + self.velocity * lead
+
+
+FILTERS = {
+    "none": PassthroughFilter,
+    "one_euro": OneEuroFilter,
+    "kalman": KalmanFilter,
+}
+
+
+def make_filter(name, **params):
+    return FILTERS[name](**params)
+
+
+def evaluate_filter(cursor_filter, timestamps, points, lead=0.0, rest_speed=30.0):
+    """Offline jitter/lag metrics for a (frames, 2) trace of raw fingertip positions
+
+    jitter_px: RMS frame-to-frame movement of the output while the raw input is at rest.
+    lag_ms: time shift that best aligns the output with the input.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    points = np.asarray(points, dtype=np.float64)
+    cursor_filter.reset()
+    out = np.empty_like(points)
+    for i, (t, p) in enumerate(zip(timestamps, points)):
+        cursor_filter(p, t)
+        out[i] = cursor_filter.predict(lead) if lead else cursor_filter.value
+
+    dt = np.diff(timestamps)
+    raw_speed = np.linalg.norm(np.diff(points, axis=0), axis=1) / np.maximum(dt, 1e-6)
+    out_step = np.linalg.norm(np.diff(out, axis=0), axis=1)
+    at_rest = raw_speed < rest_speed
+    jitter = float(np.sqrt(np.mean(out_step[at_rest] ** 2))) if at_rest.any() else 0.0
+
+    # Lag: shift (in frames) minimizing the squared error between output and input
+    frame_dt = float(np.median(dt)) if len(dt) else 0.0
+    best_shift, best_error = 0, np.inf
+    for shift in range(0, min(15, len(points) // 2)):
+        error = np.mean(np.sum((out[shift:] - points[:len(points) - shift]) ** 2, axis=1))
+        if error < best_error:
+            best_shift, best_error = shift, error
+    return {
+        "jitter_px": jitter,
+        "lag_ms": best_shift * frame_dt * 1000,
+        "rmse_px": float(np.sqrt(np.mean(np.sum((out - points) ** 2, axis=1)))),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare cursor filters on a recorded fingertip trace")
+    parser.add_argument("trace", help="CSV with columns timestamp,x,y (pixels)")
+    parser.add_argument("--lead", type=float, default=0.0, help="prediction lead in seconds")
+    args = parser.parse_args(argv)
+
+    data = np.loadtxt(args.trace, delimiter=",", ndmin=2)
+    timestamps, points = data[:, 0], data[:, 1:3]
+    candidates = [("none", {})]
+    for min_cutoff in (0.5, 1.0, 2.0):
+        for beta in (0.005, 0.01, 0.05):
+            candidates.append(("one_euro", {"min_cutoff": min_cutoff, "beta": beta}))
+    for q in (1000.0, 5000.0, 20000.0):
+        candidates.append(("kalman", {"process_noise": q}))
+
+    print(f"{'filter':<40}{'jitter px':>10}{'lag ms':>9}{'rmse px':>9}")
+    for name, params in candidates:
+        m = evaluate_filter(make_filter(name, **params), timestamps, points, lead=args.lead)
+        label = name + (" " + ", ".join(f"{k}={v}" for k, v in params.items()) if params else "")
+        print(f"{label:<40}{m['jitter_px']:>10.2f}{m['lag_ms']:>9.1f}{m['rmse_px']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# detector_backend.py
+import os
+import threading
+import time
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+TASK_MODEL_URL = ("https://storage.googleapis.com/mediapipe-models/hand_landmarker/"
+                  "hand_landmarker/float16/latest/hand_landmarker.task")
+
+
+def model_problem(model_path):
+    """Why the Tasks model bundle at `model_path` can't be loaded, or None if it can"""
+    if not os.path.exists(model_path):
+        return f"Hand landmarker model not found at {model_path}; download it from {TASK_MODEL_URL}"
+    return None
+
+
+class HandResult:
+    """Hands found in one image, whichever backend produced them
+
+    Landmarks are normalized to that image, and handedness is MediaPipe's label
+    (1 = "Right", 0 = "Left", -1 = unknown), which assumes a mirrored image.
+    `timestamp` is the time the image was submitted.
+    """
+
+    __slots__ = ("landmarks", "handedness", "scores", "timestamp")
+
+    def __init__(self, landmarks, handedness, scores, timestamp):
+        self.landmarks = landmarks  # (hands, 21, 3) float32
+        self.handedness = handedness  # (hands,) int8
+        self.scores = scores  # (hands,) float32
+        self.timestamp = timestamp
+
+    @property
+    def num_hands(self):
+        return len(self.landmarks)
+
+
+def _hand_result(hands, labels, timestamp):
+    """HandResult from per-hand landmark sequences and (label, score) pairs"""
+    n = len(hands)
+    landmarks = np.empty((n, NUM_LANDMARKS, 3), dtype=np.float32)
+    handedness = np.full(n, -1, dtype=np.int8)
+    scores = np.ones(n, dtype=np.float32)
+    for i, hand in enumerate(hands):
+        landmarks[i] = [(lm.x, lm.y, lm.z) for lm in hand]
+    for i, (label, score) in enumerate(labels[:n]):
+        handedness[i] = label == "Right"
+        scores[i] = score
+    return HandResult(landmarks, handedness, scores, timestamp)
+
+
+class SolutionsBackend:
+    """The legacy mp.solutions.hands graph; process() blocks until the image's result is ready"""
+
+    synchronous = True
+
+    def __init__(self, max_hands=2, static_image_mode=False, detection_conf=0.7, track_conf=0.7,
+                 model_complexity=1):
+        import mediapipe as mp
+        self.hands = mp.solutions.hands.Hands(
+            static_image_mode=static_image_mode,
+            max_num_hands=max_hands,
+            model_complexity=model_complexity,
+            min_detection_confidence=detection_conf,
+            min_tracking_confidence=track_conf
+        )
+        self.submitted = 0
+        self.completed = 0
+
+    def process(self, rgb, timestamp):
+        results = self.hands.process(rgb)
+        self.submitted += 1
+        self.completed += 1
+        return _hand_result(
+            [hand.landmark for hand in results.multi_hand_landmarks or ()],
+            [(c.classification[0].label, c.classification[0].score) for c in results.multi_handedness or ()],
+            timestamp)
+
+    def warm_up(self, rgb):
+        self.hands.process(rgb)
+
+    def close(self):
+        self.hands.close()
+
+
+class TasksLiveStreamBackend:
+    """MediaPipe Tasks HandLandmarker in LIVE_STREAM mode
+
+    process() queues the image and returns at once with the newest result that has
+    completed (None before the first one). Inference runs on MediaPipe's own thread, and
+    images that arrive while it is still busy are skipped, so `completed` can trail
+    `submitted`.
+    """
+
+    synchronous = False
+
+    def __init__(self, max_hands=2, static_image_mode=False, detection_conf=0.7, track_conf=0.7,
+                 model_complexity=1, model_path="hand_landmarker.task", stall_timeout=1.0):
+        # model_complexity is ignored: the bundle at model_path decides the model
+        if static_image_mode:
+            raise ValueError("The LIVE_STREAM backend tracks across frames; use the solutions backend "
+                             "for independent images")
+        problem = model_problem(model_path)
+        if problem:
+            raise FileNotFoundError(problem)
+        import mediapipe as mp
+        from mediapipe.tasks.python import BaseOptions, vision
+        self.mp = mp
+        self.latest = None
+        self.submitted = 0
+        self.completed = 0
+        self.last_timestamp_ms = -1
+        self.sent_time = 0.0
+        self.stall_timeout = stall_timeout
+        self.result_event = threading.Event()
+        self.result_event.set()  # Set while no image is in flight
+        options = vision.HandLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.LIVE_STREAM,
+            num_hands=max_hands,
+            min_hand_detection_confidence=detection_conf,
+            min_hand_presence_confidence=track_conf,
+            min_tracking_confidence=track_conf,
+            result_callback=self._on_result,
+        )
+        self.landmarker = vision.HandLandmarker.create_from_options(options)
+
+    def _on_result(self, result, image, timestamp_ms):
+        # MediaPipe's thread; a single attribute store, so the loop sees either result whole
+        self.latest = _hand_result(
+            result.hand_landmarks,
+            [(c[0].category_name, c[0].score) for c in result.handedness],
+            timestamp_ms / 1000)
+        self.completed += 1
+        self.result_event.set()
+
+    def process(self, rgb, timestamp):
+        self.submitted += 1
+        # One image in flight at a time: detect_async() holds the GIL while the graph's input
+        # queue is full, and the result callback then can't run to drain it
+        if not self.result_event.is_set() and time.time() - self.sent_time < self.stall_timeout:
+            return self.latest
+        self.result_event.clear()
+        self.sent_time = time.time()
+        # The graph rejects timestamps that don't increase
+        timestamp_ms = max(int(timestamp * 1000), self.last_timestamp_ms + 1)
+        self.last_timestamp_ms = timestamp_ms
+        # mp.Image copies the pixels, so the caller may reuse `rgb` right away
+        self.landmarker.detect_async(self.mp.Image(image_format=self.mp.ImageFormat.SRGB, data=rgb),
+                                     timestamp_ms)
+        return self.latest
+
+    def warm_up(self, rgb, timeout=10.0):
+        """Run one image through the graph and wait for it, without keeping its result"""
+        self.result_event.wait(timeout)
+        self.process(rgb, time.time())
+        self.result_event.wait(timeout)
+        self.latest = None
+        self.submitted = self.completed = 0
+
+    def close(self):
+        self.landmarker.close()
+
+
+BACKENDS = {
+    "solutions": SolutionsBackend,
+    "tasks": TasksLiveStreamBackend,
+}
+
+
+def make_backend(name, **options):
+    return BACKENDS[name](**options)
@@ -0,0 +1,353 @@
+# frame_capture.py
+import threading
+import time
+from collections import deque
+import multiprocessing as mp_proc
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from frame_pool import FramePool
+
+
+class ThreadedCapture:
+    """Reads camera frames on a background thread and always serves the newest one
+
+    Frames are decoded into pooled buffers; a frame returned by read() stays valid until
+    the next read().
+    """
+
+    def __init__(self, cap, buffer_size=2):
+        self.cap = cap
+        self.buffer_size = buffer_size
+        self.buffer = deque()  # (seq, timestamp, frame)
+        self.pool = FramePool()
+        self.delivered = None  # Frame currently owned by the caller
+        self.cond = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.failed = False
+        self.read_interval = 0.0  # Throttle between decoded frames, used while idle
+        self.next_decode = 0.0
+
+        # Counters
+        self.frames_captured = 0
+        self.frames_delivered = 0
+        self.frames_dropped = 0
+        self.last_seq = -1
+        self.last_timestamp = None
+        self.last_frame_age = 0.0
+        self.total_frame_age = 0.0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._reader, name="capture", daemon=True)
+        self.thread.start()
+        return self
+
+    def _reader(self):
+        try:
+            self._read_frames()
+        finally:
+            # A camera error or an exception ends the stream; wake a read() waiting for it
+            with self.cond:
+                self.failed = True
+                self.cond.notify_all()
+
+    def _read_frames(self):
+        seq = 0
+        shape = None
+        # Dequeues a frame without decoding it (cv2.VideoCapture); other sources just read
+        grab = getattr(self.cap, "grab", None) or (lambda: self.cap.read()[0])
+        while self.running:
+            if self.read_interval and time.time() < self.next_decode:
+                # Throttled: keep draining the driver at camera rate without decoding, so
+                # the next decoded frame (and the first one after a wake) is current
+                if not grab():
+                    break
+                continue
+            # Decode straight into a recycled buffer once the frame size is known
+            buf = self.pool.acquire(shape)
+            success, frame = self.cap.read(buf)
+            timestamp = time.time()
+            self.next_decode = timestamp + self.read_interval
+            with self.cond:
+                if not success:
+                    self.pool.release(buf)
+                    break
+                shape = frame.shape
+                if len(self.buffer) >= self.buffer_size:
+                    self.pool.release(self.buffer.popleft()[2])
+                self.buffer.append((seq, timestamp, frame))
+                self.frames_captured += 1
+                self.cond.notify_all()
+            seq += 1
+
+    def read(self, timeout=None):
+        """Return (success, frame) with the newest frame not yet delivered
+
+        Waits as long as the camera takes (a slow first frame, a USB stall); success is
+        False only once the camera has failed, or when a `timeout` in seconds runs out.
+        """
+        with self.cond:
+            if not self.cond.wait_for(
+                    lambda: self.failed or (self.buffer and self.buffer[-1][0] > self.last_seq),
+                    timeout):
+                return False, None
+            if not self.buffer or self.buffer[-1][0] <= self.last_seq:
+                return False, None
+            seq, timestamp, frame = self.buffer.pop()
+            while self.buffer:
+                self.pool.release(self.buffer.popleft()[2])
+            # The caller is done with the previous frame once it asks for the next one
+            self.pool.release(self.delivered)
+            self.delivered = frame
+
+        # Everything captured between two deliveries was stale and skipped
+        self.frames_dropped += seq - self.last_seq - 1
+        self.last_seq = seq
+        self.frames_delivered += 1
+        self.last_timestamp = timestamp
+        self.last_frame_age = time.time() - timestamp
+        self.total_frame_age += self.last_frame_age
+        return True, frame
+
+    def set(self, prop_id, value):
+        return self.cap.set(prop_id, value)
+
+    def set_read_interval(self, seconds):
+        """Decode at most one frame per `seconds` (0 = every frame); the camera is still drained"""
+        if seconds < self.read_interval:
+            self.next_decode = 0.0  # Waking up: decode the very next frame
+        self.read_interval = seconds
+
+    def stats(self):
+        delivered = max(self.frames_delivered, 1)
+        return {
+            "captured": self.frames_captured,
+            "delivered": self.frames_delivered,
+            "dropped": self.frames_dropped,
+            "last_age_ms": self.last_frame_age * 1000,
+            "avg_age_ms": self.total_frame_age / delivered * 1000,
+            "buffers": self.pool.allocated,
+        }
+
+    def release(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        self.cap.release()
+
+
+class SharedFrameRing:
+    """Fixed-size ring of frames in shared memory, written by one process and read by others"""
+
+    def __init__(self, shape, slots=3, name=None, create=True):
+        self.shape = tuple(shape)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.shape))
+        header_bytes = slots * 16  # per slot: seq (int64) + timestamp (float64)
+        if create:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + slots * frame_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.owner = create
+
+        self.seqs = np.ndarray((slots,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        self.timestamps = np.ndarray((slots,), dtype=np.float64, buffer=self.shm.buf, offset=slots * 8)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8,
+                                 buffer=self.shm.buf, offset=header_bytes)
+        if create:
+            self.seqs[:] = -1
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, seq, frame, timestamp):
+        slot = seq % self.slots
+        self.seqs[slot] = -1  # mark slot as being written
+        np.copyto(self.frames[slot], frame)
+        self.timestamps[slot] = timestamp
+        self.seqs[slot] = seq
+
+    def read(self, seq, out):
+        """Copy frame `seq` into `out`; return its timestamp or None if it was overwritten"""
+        slot = seq % self.slots
+        if self.seqs[slot] != seq:
+            return None
+        np.copyto(out, self.frames[slot])
+        timestamp = self.timestamps[slot]
+        if self.seqs[slot] != seq:  # writer lapped us during the copy
+            return None
+        return timestamp
+
+    def close(self):
+        if self.shm is None:
+            return
+        # Drop views before closing the mapping
+        del self.seqs, self.timestamps, self.frames
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+        self.shm = None
+
+
+def _camera_process(device, width, height, ring_name, slots, latest_seq, running):
+    cap = cv2.VideoCapture(device)
+    cap.set(3, width)
+    cap.set(4, height)
+    ring = SharedFrameRing((height, width, 3), slots=slots, name=ring_name, create=False)
+    seq = 0
+    try:
+        while running.value:
+            success, frame = cap.read()
+            if not success:
+                break
+            if frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height))
+            ring.write(seq, frame, time.time())
+            latest_seq.value = seq
+            seq += 1
+    finally:
+        running.value = False
+        cap.release()
+        ring.close()
+
+
+class ProcessCapture:
+    """Runs the camera in its own process and shares frames through a shared-memory ring"""
+
+    def __init__(self, device=0, width=640, height=480, slots=3):
+        self.device = device
+        self.width, self.height = width, height
+        self.ring = SharedFrameRing((height, width, 3), slots=slots)
+        # Spawned, not forked: the app opens the camera while MediaPipe is loading on
+        # another thread, and forking a process mid-initialization can hang the child
+        self.ctx = mp_proc.get_context("spawn")
+        self.latest_seq = self.ctx.Value("q", -1, lock=False)
+        self.running = self.ctx.Value("b", 1, lock=False)
+        self.process = None
+        # Two buffers used in turn, so the frame handed out survives until the next read()
+        self.frames = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(2)]
+        self.index = 0
+
+        # Counters
+        self.frames_delivered = 0
+        self.frames_dropped = 0
+        self.last_seq = -1
+        self.last_timestamp = None
+        self.last_frame_age = 0.0
+        self.total_frame_age = 0.0
+
+    def start(self):
+        self.process = self.ctx.Process(
+            target=_camera_process,
+            args=(self.device, self.width, self.height, self.ring.name,
+                  self.ring.slots, self.latest_seq, self.running),
+            name="capture", daemon=True)
+        self.process.start()
+        return self
+
+    def read(self, timeout=None, poll_interval=0.001):
+        """Return (success, frame) with the newest frame not yet delivered
+
+        Waits as long as the camera takes; success is False only once the capture process
+        has stopped, or when a `timeout` in seconds runs out.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            seq = self.latest_seq.value
+            if seq > self.last_seq:
+                timestamp = self.ring.read(seq, self.frames[self.index ^ 1])
+                if timestamp is not None:
+                    break
+            elif not self.running.value or not self.process.is_alive() or \
+                    (deadline is not None and time.time() > deadline):
+                return False, None
+            time.sleep(poll_interval)
+
+        self.frames_dropped += seq - self.last_seq - 1
+        self.last_seq = seq
+        self.frames_delivered += 1
+        self.last_timestamp = timestamp
+        self.last_frame_age = time.time() - timestamp
+        self.total_frame_age += self.last_frame_age
+        self.index ^= 1
+        return True, self.frames[self.index]
+
+    def set(self, prop_id, value):
+        # Resolution is fixed when the ring is created
+        return False
+
+    def stats(self):
+        delivered = max(self.frames_delivered, 1)
+        return {
+            "captured": self.last_seq + 1,
+            "delivered": self.frames_delivered,
+            "dropped": self.frames_dropped,
+            "last_age_ms": self.last_frame_age * 1000,
+            "avg_age_ms": self.total_frame_age / delivered * 1000,
+            "buffers": len(self.frames),
+        }
+
+    def release(self):
+        self.running.value = False
+        if self.process is not None:
+            self.process.join(timeout=2.0)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.ring.close()
+
+
+class SyncCapture:
+    """Reads the camera on the calling thread, decoding into two buffers used in turn"""
+
+    def __init__(self, cap):
+        self.cap = cap
+        self.pool = FramePool()
+        self.delivered = None
+        self.read_interval = 0.0
+        self.next_decode = 0.0
+
+    def read(self):
+        # Throttled: drain the driver without decoding until the next frame is due, instead
+        # of sleeping while stale frames queue up in it
+        while self.read_interval and time.time() < self.next_decode:
+            if not self.cap.grab():
+                return False, None
+        buf = self.pool.acquire(self.delivered.shape if self.delivered is not None else None)
+        success, frame = self.cap.read(buf)
+        if not success:
+            self.pool.release(buf)
+            return False, None
+        self.next_decode = time.time() + self.read_interval
+        self.pool.release(self.delivered)
+        self.delivered = frame
+        return True, frame
+
+    def set(self, prop_id, value):
+        return self.cap.set(prop_id, value)
+
+    def set_read_interval(self, seconds):
+        """Decode at most one frame per `seconds` (0 = every frame); the camera is still drained"""
+        if seconds < self.read_interval:
+            self.next_decode = 0.0
+        self.read_interval = seconds
+
+    def release(self):
+        self.cap.release()
+
+
+def open_capture(device=0, width=640, height=480, mode="thread"):
+    """Open the camera with the requested capture stage: 'thread', 'process' or 'sync'"""
+    if mode == "process":
+        return ProcessCapture(device, width, height).start()
+
+    cap = cv2.VideoCapture(device)
+    cap.set(3, width)
+    cap.set(4, height)
+    if mode == "sync":
+        return SyncCapture(cap)
+    return ThreadedCapture(cap).start()
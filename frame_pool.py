@@ -0,0 +1,47 @@
+# frame_pool.py
+import threading
+
+import numpy as np
+
+
+class FramePool:
+    """Recycles full-size frame buffers between a producer and the loop that consumes them"""
+
+    def __init__(self):
+        self.free = []
+        self.lock = threading.Lock()
+        self.allocated = 0  # Buffers ever created; flat once the pipeline is warm
+
+    def acquire(self, shape):
+        """A free buffer of `shape`, or None while the frame size is still unknown"""
+        if shape is None:
+            return None
+        with self.lock:
+            for i, frame in enumerate(self.free):
+                if frame.shape == shape:
+                    return self.free.pop(i)
+            self.allocated += 1
+        return np.empty(shape, dtype=np.uint8)
+
+    def release(self, frame):
+        if frame is not None:
+            with self.lock:
+                self.free.append(frame)
+
+
+class ScratchBuffers:
+    """Named scratch arrays reused across frames; a buffer only grows when a larger shape is asked for"""
+
+    def __init__(self):
+        self.buffers = {}
+        self.allocated = 0
+
+    def get(self, name, shape, dtype=np.uint8):
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape)) * dtype.itemsize
+        buf = self.buffers.get(name)
+        if buf is None or buf.nbytes < size:
+            buf = self.buffers[name] = np.empty(size, dtype=np.uint8)
+            self.allocated += 1
+        # Contiguous view at the front of the buffer, so OpenCV can write into it as dst=
+        return buf[:size].view(dtype).reshape(shape)
@@ -0,0 +1,120 @@
+# frame_source.py
+import os
+import time
+
+import cv2
+import numpy as np
+
+from frame_pool import FramePool
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class VideoFileSource:
+    """Plays back a recorded clip with the same read()/release() interface as a camera"""
+
+    def __init__(self, path, loop=False):
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Cannot open video file: {path}")
+        self.pool = FramePool()
+        self.delivered = None  # Valid until the next read()
+
+    def read(self):
+        buf = self.pool.acquire(self.delivered.shape if self.delivered is not None else None)
+        success, frame = self.cap.read(buf)
+        if not success and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read(buf)
+        if not success:
+            self.pool.release(buf)
+            return False, None
+        self.pool.release(self.delivered)
+        self.delivered = frame
+        return success, frame
+
+    def set(self, prop_id, value):
+        return False
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirSource:
+    """Serves the images in a directory in file-name order"""
+
+    def __init__(self, path, loop=False):
+        self.files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.files:
+            raise IOError(f"No images found in: {path}")
+        self.loop = loop
+        self.index = 0
+
+    def read(self):
+        if self.index >= len(self.files):
+            if not self.loop:
+                return False, None
+            self.index = 0
+        frame = cv2.imread(self.files[self.index])
+        self.index += 1
+        return frame is not None, frame
+
+    def set(self, prop_id, value):
+        return False
+
+    def release(self):
+        pass
+
+
+class SyntheticSource:
+    """Generates frames with a moving skin-coloured blob, for runs without any recorded data"""
+
+    def __init__(self, width=640, height=480, frames=300, fps=0, seed=0, noise_frames=8):
+        self.width, self.height = width, height
+        self.frames = frames
+        self.interval = 1.0 / fps if fps else 0
+        rng = np.random.default_rng(seed)
+        # A few noise backgrounds cycled through, so producing a frame allocates nothing
+        self.noise = rng.integers(0, 40, (noise_frames, height, width, 3), dtype=np.uint8)
+        self.buffers = np.empty((2, height, width, 3), dtype=np.uint8)
+        self.index = 0
+        self.last_time = 0
+
+    def read(self):
+        if self.frames and self.index >= self.frames:
+            return False, None
+        if self.interval:
+            # Pace like a real camera
+            wait = self.last_time + self.interval - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            self.last_time = time.time()
+
+        frame = self.buffers[self.index % 2]
+        np.copyto(frame, self.noise[self.index % len(self.noise)])
+        t = self.index / 30.0
+        cx = int(self.width / 2 + self.width / 4 * np.sin(t))
+        cy = int(self.height / 2 + self.height / 4 * np.cos(t * 0.7))
+        cv2.ellipse(frame, (cx, cy), (50, 70), 0, 0, 360, (120, 160, 210), cv2.FILLED)
+        self.index += 1
+        return True, frame
+
+    def set(self, prop_id, value):
+        return False
+
+    def release(self):
+        pass
+
+
+def open_source(spec, loop=False):
+    """Open a frame source from a path or 'synthetic[:frames]'"""
+    if spec.startswith("synthetic"):
+        _, _, frames = spec.partition(":")
+        return SyntheticSource(frames=int(frames) if frames else 300)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec, loop=loop)
+    return VideoFileSource(spec, loop=loop)
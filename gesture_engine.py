@@ -0,0 +1,434 @@
+# gesture_engine.py
+import cv2
+import numpy as np
+
+NUM_MASKS = 32  # 5 fingers -> 5-bit mask
+MASK_WEIGHTS = np.array([16, 8, 4, 2, 1])  # (hands, 5) finger states @ weights -> masks
+PINCH_RATIO = 0.35  # Thumb-index tip distance, relative to hand size, that counts as a pinch
+
+
+def finger_mask(fingers):
+    """[thumb, index, middle, ring, pinky] -> 5-bit mask with the thumb as the high bit"""
+    mask = 0
+    for f in fingers:
+        mask = (mask << 1) | int(f)
+    return mask
+
+
+CURSOR_MASK = finger_mask([0, 1, 0, 0, 0])
+TWO_FINGER_MASK = finger_mask([0, 1, 1, 0, 0])
+FIST_MASK = finger_mask([0, 0, 0, 0, 0])
+OPEN_MASK = finger_mask([1, 1, 1, 1, 1])
+THREE_FINGER_MASK = finger_mask([0, 1, 1, 1, 0])
+FOUR_FINGER_MASK = finger_mask([0, 1, 1, 1, 1])
+
+
+class GestureContext:
+    """Per-frame inputs handed to every recognizer; one instance is reused for all frames"""
+
+    __slots__ = ("controller", "backend", "lm", "hands", "masks", "pinch", "img", "draw", "now", "w", "h",
+                 "consumed", "fired")
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.backend = controller.backend
+        self.lm = None
+        # Two-hand frames: (2, 21, 3) [id, x, y] rows, finger masks and pinch ratios of the pair
+        self.hands = None
+        self.masks = None
+        self.pinch = None
+        self.img = None
+        self.draw = True
+        self.now = 0.0
+        self.w = self.h = 0
+        self.consumed = False  # Set by a recognizer that owns this frame's pose
+        self.fired = None  # Name of the last action emitted this frame
+
+    def text(self, label, pos, scale, color, thickness=2):
+        if self.draw:
+            cv2.putText(self.img, label, pos, cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+
+
+class Recognizer:
+    """Base class: a recognizer owns one or more finger masks and keeps its state in __slots__"""
+
+    __slots__ = ()
+    masks = ()
+
+    def update(self, ctx):
+        raise NotImplementedError
+
+    def reset(self):
+        """Called when the hand leaves one of this recognizer's poses"""
+
+
+class CursorRecognizer(Recognizer):
+    """Index finger only: move the cursor"""
+
+    __slots__ = ("last_pos",)
+    masks = (CURSOR_MASK,)
+
+    def __init__(self):
+        self.last_pos = None
+
+    def reset(self):
+        self.last_pos = None
+
+    def update(self, ctx):
+        x1, y1 = int(ctx.lm[8, 1]), int(ctx.lm[8, 2])
+        cursor_x, cursor_y = ctx.controller.calculate_cursor_position(x1, y1, ctx.w, ctx.h)
+        ctx.backend.move_to(cursor_x, cursor_y)
+        if ctx.draw:
+            cv2.circle(ctx.img, (x1, y1), 10, (0, 255, 255), cv2.FILLED)
+            cv2.circle(ctx.img, (x1, y1), 15, (0, 255, 255), 2)
+            # Movement trail
+            if self.last_pos is not None:
+                cv2.line(ctx.img, (x1, y1), self.last_pos, (0, 255, 255), 2)
+        self.last_pos = (x1, y1)
+
+
+class ClickRecognizer(Recognizer):
+    """Index+middle pinched with one tip lower: index lower = left click, middle lower = right click"""
+
+    __slots__ = ("last_click_time",)
+    masks = (TWO_FINGER_MASK,)
+
+    def __init__(self):
+        self.last_click_time = 0.0
+
+    def update(self, ctx):
+        c = ctx.controller
+        index_y, middle_y = ctx.lm[8, 2], ctx.lm[12, 2]
+        dx = float(ctx.lm[8, 1] - ctx.lm[12, 1])
+        dy = float(index_y - middle_y)
+        if (dx * dx + dy * dy) ** 0.5 >= c.click_threshold or abs(dy) <= 20:
+            return
+        # Pinched: this frame belongs to the click, not to scrolling
+        ctx.consumed = True
+        if ctx.now - self.last_click_time <= c.click_delay:
+            return
+        if index_y > middle_y:
+            ctx.backend.click()
+            ctx.fired = "LEFT_CLICK"
+            ctx.text("LEFT CLICK", (50, 100), 1, (0, 255, 0))
+        else:
+            ctx.backend.right_click()
+            ctx.fired = "RIGHT_CLICK"
+            ctx.text("RIGHT CLICK", (50, 150), 1, (0, 255, 0))
+        self.last_click_time = ctx.now
+
+
+class ScrollRecognizer(Recognizer):
+    """Index+middle apart: scroll along the direction the two fingers point"""
+
+    __slots__ = ("last_scroll_time",)
+    masks = (TWO_FINGER_MASK,)
+
+    def __init__(self):
+        self.last_scroll_time = 0.0
+
+    def update(self, ctx):
+        c = ctx.controller
+        if ctx.consumed or ctx.now - self.last_scroll_time <= c.scroll_delay:
+            return
+        x1, y1 = int(ctx.lm[8, 1]), int(ctx.lm[8, 2])  # Index finger
+        x2, y2 = int(ctx.lm[12, 1]), int(ctx.lm[12, 2])  # Middle finger
+        center_x, center_y = (x1 + x2) // 2, (y1 + y2) // 2
+        dx, dy = x2 - x1, y2 - y1
+
+        if abs(dx) > abs(dy):
+            # Horizontal scroll (left-right)
+            amount = int(np.clip(dx, -100, 100) / 100 * c.scroll_speed)
+            ctx.backend.hscroll(amount)
+            direction = "LEFT" if amount < 0 else "RIGHT"
+        else:
+            # Vertical scroll (up-down)
+            amount = int(-np.clip(dy, -100, 100) / 100 * c.scroll_speed)
+            ctx.backend.scroll(amount)
+            direction = "UP" if amount > 0 else "DOWN"
+        self.last_scroll_time = ctx.now
+        ctx.fired = "SCROLL_" + direction
+
+        ctx.text(f"SCROLL {direction}", (center_x - 50, center_y - 20), 0.7, (0, 255, 0))
+        if ctx.draw:
+            cv2.line(ctx.img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.circle(ctx.img, (center_x, center_y), 8, (0, 255, 0), cv2.FILLED)
+
+
+class HoldRecognizer(Recognizer):
+    """Pose held for the controller's hold duration triggers a hotkey, with a progress bar"""
+
+    __slots__ = ("name", "masks", "keys", "bar_y", "start_time")
+
+    def __init__(self, name, mask, keys, bar_y):
+        self.name = name
+        self.masks = (mask,)
+        self.keys = keys
+        self.bar_y = bar_y
+        self.start_time = None
+
+    def reset(self):
+        self.start_time = None
+
+    def update(self, ctx):
+        c = ctx.controller
+        if self.start_time is None:
+            self.start_time = ctx.now
+        hold_duration = ctx.now - self.start_time
+        # Show progress after minimum duration
+        if hold_duration < c.min_gesture_duration:
+            return
+
+        progress = min(hold_duration / c.gesture_hold_duration, 1.0)
+        if ctx.draw:
+            bar_x, bar_y = 50, self.bar_y
+            cv2.rectangle(ctx.img, (bar_x, bar_y), (bar_x + int(200 * progress), bar_y + 20),
+                          (0, int(255 * progress), 0), cv2.FILLED)
+            cv2.rectangle(ctx.img, (bar_x, bar_y), (bar_x + 200, bar_y + 20), (255, 255, 255), 2)
+            ctx.text(f"{self.name}: {int(progress * 100)}%", (bar_x, bar_y - 10), 0.7, (0, 165, 255))
+
+        # Execute when hold duration reached, then start over
+        if hold_duration >= c.gesture_hold_duration:
+            ctx.backend.hotkey(*self.keys)
+            ctx.fired = self.name
+            ctx.text(f"ALL TABS {self.name}D!", (50, self.bar_y + 50), 1, (0, 0, 255))
+            self.start_time = None
+
+
+class SwipeRecognizer(Recognizer):
+    """Frame-to-frame movement of the average fingertip position along one axis"""
+
+    __slots__ = ("name", "masks", "tips", "axis", "threshold", "positive", "negative", "text_y",
+                 "color", "mark_tips", "last")
+
+    def __init__(self, name, mask, tips, axis, threshold, positive, negative, text_y, color,
+                 mark_tips=False):
+        self.name = name
+        self.masks = (mask,)
+        self.tips = list(tips)
+        self.axis = axis  # 1 = x, 2 = y in the [id, x, y] rows
+        self.threshold = threshold
+        self.positive = positive  # (label, keys) when the average moves towards +axis
+        self.negative = negative
+        self.text_y = text_y
+        self.color = color
+        self.mark_tips = mark_tips
+        self.last = None
+
+    def reset(self):
+        self.last = None
+
+    def update(self, ctx):
+        pts = ctx.lm[self.tips]
+        avg = float(pts[:, self.axis].mean())
+        last, self.last = self.last, avg
+        if ctx.draw and self.mark_tips:
+            for x, y in pts[:, 1:]:
+                cv2.circle(ctx.img, (int(x), int(y)), 8, self.color, cv2.FILLED)
+        if last is None or ctx.consumed:
+            return
+        if avg > last + self.threshold:
+            label, keys = self.positive
+        elif avg < last - self.threshold:
+            label, keys = self.negative
+        else:
+            return
+        # A swipe owns the frame, so a weaker swipe on the other axis can't fire too
+        ctx.consumed = True
+        ctx.backend.hotkey(*keys)
+        ctx.fired = self.name
+        ctx.text(label, (50, self.text_y), 1, self.color)
+
+
+class GestureEngine:
+    """Dispatches each frame to the recognizers registered for its finger mask"""
+
+    def __init__(self):
+        self.table = [[] for _ in range(NUM_MASKS)]
+        self.pose_names = [None] * NUM_MASKS
+        self.last_mask = None
+
+    def register(self, recognizer, before=None):
+        """Add a recognizer to each of its masks, optionally ahead of another one"""
+        for mask in recognizer.masks:
+            entries = self.table[mask]
+            if before is not None and before in entries:
+                entries.insert(entries.index(before), recognizer)
+            else:
+                entries.append(recognizer)
+        return recognizer
+
+    def name_pose(self, mask, name):
+        self.pose_names[mask] = name
+
+    def process(self, mask, ctx):
+        """Run the recognizers for `mask`; returns the pose name for the gesture history"""
+        if mask != self.last_mask:
+            if self.last_mask is not None:
+                for recognizer in self.table[self.last_mask]:
+                    recognizer.reset()
+            self.last_mask = mask
+        ctx.consumed = False
+        ctx.fired = None
+        for recognizer in self.table[mask]:
+            recognizer.update(ctx)
+        return self.pose_names[mask]
+
+    def reset(self):
+        if self.last_mask is not None:
+            for recognizer in self.table[self.last_mask]:
+                recognizer.reset()
+        self.last_mask = None
+
+
+class PinchZoomRecognizer(Recognizer):
+    """Both hands pinching thumb and index: pulling the pinches apart zooms in, pushing them together zooms out"""
+
+    __slots__ = ("baseline",)
+    name = "ZOOM"
+
+    def __init__(self):
+        self.baseline = None
+
+    def reset(self):
+        self.baseline = None
+
+    def matches(self, ctx):
+        return bool(np.all(ctx.pinch < PINCH_RATIO))
+
+    def update(self, ctx):
+        c = ctx.controller
+        # Pinch points halfway between thumb and index tips, for both hands at once
+        points = (ctx.hands[:, 4, 1:] + ctx.hands[:, 8, 1:]) / 2
+        spread = float(np.sqrt(((points[0] - points[1]) ** 2).sum()))
+        if ctx.draw:
+            a, b = points.astype(int)
+            cv2.line(ctx.img, tuple(a), tuple(b), (255, 128, 0), 2)
+        if self.baseline is None:
+            self.baseline = spread
+            return
+        ratio = spread / max(self.baseline, 1.0)
+        if ratio > 1 + c.zoom_step:
+            label, keys = "ZOOM IN", ("ctrl", "=")
+        elif ratio < 1 - c.zoom_step:
+            label, keys = "ZOOM OUT", ("ctrl", "-")
+        else:
+            return
+        ctx.backend.hotkey(*keys)
+        ctx.fired = label.replace(" ", "_")
+        ctx.text(label, (50, 100), 1, (255, 128, 0))
+        self.baseline = spread
+
+
+class TwoHandDragRecognizer(Recognizer):
+    """Both hands closed to fists and moved together: the content follows them (scrolling)"""
+
+    __slots__ = ("last", "residual")
+    name = "DRAG"
+
+    def __init__(self):
+        self.last = None
+        self.residual = np.zeros(2)
+
+    def reset(self):
+        self.last = None
+        self.residual[:] = 0
+
+    def matches(self, ctx):
+        return bool(np.all(ctx.masks == FIST_MASK))
+
+    def update(self, ctx):
+        c = ctx.controller
+        # Midpoint of both palms (wrist and middle knuckle)
+        center = ctx.hands[:, [0, 9], 1:].mean(axis=(0, 1))
+        last, self.last = self.last, center
+        if ctx.draw:
+            cv2.circle(ctx.img, (int(center[0]), int(center[1])), 12, (255, 128, 0), 2)
+        if last is None:
+            return
+        # Whole scroll clicks only; the remainder carries over to the next frame
+        self.residual += (center - last) * c.drag_gain
+        steps = np.trunc(self.residual)
+        self.residual -= steps
+        dx, dy = int(steps[0]), int(steps[1])
+        if dy:
+            ctx.backend.scroll(dy)
+        if dx:
+            ctx.backend.hscroll(-dx)
+        if dx or dy:
+            ctx.fired = "DRAG"
+            ctx.text("DRAG", (50, 100), 1, (255, 128, 0))
+
+
+class TwoHandEngine:
+    """Gestures made with two hands; the first recognizer whose pose the pair holds owns the frame"""
+
+    def __init__(self, max_gap=0.25):
+        self.recognizers = []
+        self.active = None
+        self.max_gap = max_gap  # Seconds without a two-hand frame after which a gesture starts over
+        self.last_time = None
+
+    def register(self, recognizer):
+        self.recognizers.append(recognizer)
+        return recognizer
+
+    def process(self, ctx):
+        """Run the recognizer matching the pair; returns its name, or None if there is none"""
+        if self.last_time is not None and ctx.now - self.last_time > self.max_gap:
+            self.reset()
+        self.last_time = ctx.now
+        recognizer = next((r for r in self.recognizers if r.matches(ctx)), None)
+        if recognizer is not self.active:
+            if self.active is not None:
+                self.active.reset()
+            self.active = recognizer
+        if recognizer is None:
+            return None
+        ctx.consumed = False
+        ctx.fired = None
+        recognizer.update(ctx)
+        return recognizer.name
+
+    def reset(self):
+        if self.active is not None:
+            self.active.reset()
+        self.active = None
+
+
+def default_two_hand_engine():
+    engine = TwoHandEngine()
+    engine.register(PinchZoomRecognizer())
+    engine.register(TwoHandDragRecognizer())
+    return engine
+
+
+def default_engine():
+    """The built-in gestures from the help text"""
+    engine = GestureEngine()
+    engine.register(CursorRecognizer())
+    engine.register(ClickRecognizer())
+    engine.register(ScrollRecognizer())
+    engine.register(HoldRecognizer("MINIMIZE", FIST_MASK, ("win", "d"), 200))
+    engine.register(HoldRecognizer("MAXIMIZE", OPEN_MASK, ("win", "shift", "m"), 300))
+    engine.register(SwipeRecognizer(
+        "SHIFT_TAB", THREE_FINGER_MASK, (8, 12, 16), 1, 30,
+        ("SHIFT+TAB (PREVIOUS)", ("shift", "tab")), ("CTRL+TAB (NEXT)", ("ctrl", "tab")),
+        400, (255, 255, 0), mark_tips=True))
+    # Four fingers: vertical swipe for recent tabs, horizontal swipe for apps
+    engine.register(SwipeRecognizer(
+        "RECENT_TABS", FOUR_FINGER_MASK, (8, 12, 16, 20), 2, 40,
+        ("CLOSE TAB (Ctrl+W)", ("ctrl", "w")), ("REOPEN TAB (Ctrl+Shift+T)", ("ctrl", "shift", "t")),
+        500, (0, 255, 255)))
+    engine.register(SwipeRecognizer(
+        "SWITCH_APP", FOUR_FINGER_MASK, (8, 12, 16, 20), 1, 30,
+        ("ALT+SHIFT+TAB (PREV APP)", ("alt", "shift", "tab")), ("ALT+TAB (NEXT APP)", ("alt", "tab")),
+        450, (255, 0, 255), mark_tips=True))
+
+    engine.name_pose(CURSOR_MASK, "CURSOR")
+    engine.name_pose(TWO_FINGER_MASK, "SCROLL")
+    engine.name_pose(FIST_MASK, "MINIMIZE")
+    engine.name_pose(OPEN_MASK, "MAXIMIZE")
+    engine.name_pose(THREE_FINGER_MASK, "SHIFT_TAB")
+    engine.name_pose(FOUR_FINGER_MASK, "FOUR_FINGER")
+    return engine
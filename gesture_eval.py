@@ -0,0 +1,281 @@
+# gesture_eval.py
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from landmark_trace import RECORD_DTYPE, TRACE_MAX_HANDS, TraceReader, make_replay_controller, \
+    parse_setting, replay_trace
+
+FRAME_SIZE = (640, 480)
+FPS = 30.0
+
+
+def event_gesture(fired):
+    """Gesture label an emitted action counts towards (scroll directions share one label)"""
+    return "SCROLL" if fired.startswith("SCROLL_") else fired
+
+
+def action_spec(action, args):
+    """Comparable form of an injected action ("hotkey:ctrl+w", "scroll:up", "click"); None for moves"""
+    if action == "move_to":
+        return None
+    if action == "hotkey":
+        return "hotkey:" + "+".join(args)
+    if action == "scroll":
+        return "scroll:" + ("up" if args[0] > 0 else "down")
+    if action == "hscroll":
+        return "hscroll:" + ("right" if args[0] > 0 else "left")
+    return action
+
+
+def load_labels(trace_path):
+    """Labels sit next to the trace as <trace>.labels.json: [{"gesture", "start", "end"}, ...]
+    with times in seconds from the first frame, plus an optional "action" (see action_spec)
+    the gesture has to inject"""
+    with open(trace_path + ".labels.json") as f:
+        return json.load(f)
+
+
+class LabeledSequence:
+    """Trace records plus the gesture segments that should fire in them"""
+
+    def __init__(self, name, records, labels):
+        self.name = name
+        self.records = records
+        self.labels = labels
+        self.max_hands = TRACE_MAX_HANDS
+
+    def release(self):
+        pass
+
+
+def synthetic_hand(fingers, cx, cy, s=0.2):
+    """Normalized (21, 3) landmarks of an upright hand with the given fingers raised"""
+    lm = np.zeros((21, 3), dtype=np.float32)
+    lm[0] = (cx, cy + s, 0)
+    # Thumb: tip right of joint 3 when raised (mirrored frame)
+    lm[1] = (cx - 0.25 * s, cy + 0.7 * s, 0)
+    lm[2] = (cx - 0.4 * s, cy + 0.5 * s, 0)
+    lm[3] = (cx - 0.5 * s, cy + 0.35 * s, 0)
+    lm[4] = (cx - (0.35 if fingers[0] else 0.6) * s, cy + 0.2 * s, 0)
+    for k in range(4):
+        base = 5 + 4 * k
+        x = cx + (k - 1.5) * 0.22 * s
+        lm[base] = (x, cy + 0.3 * s, 0)  # MCP
+        lm[base + 1] = (x, cy, 0)  # PIP
+        if fingers[k + 1]:
+            lm[base + 2] = (x, cy - 0.25 * s, 0)
+            lm[base + 3] = (x, cy - 0.45 * s, 0)
+        else:
+            lm[base + 2] = (x, cy + 0.1 * s, 0)
+            lm[base + 3] = (x, cy + 0.2 * s, 0)
+    return lm
+
+
+def synthetic_sequence(seed=0, noise_px=1.0):
+    """One labeled sequence exercising every built-in gesture plus some plain cursor motion"""
+    rng = np.random.default_rng(seed)
+    w, h = FRAME_SIZE
+    frames = []  # (landmarks or None)
+    labels = []
+
+    def add(label, count, pose, cx=0.5, cy=0.5, dx=0.0, dy=0.0, tweak=None, action=None):
+        start = len(frames)
+        for i in range(count):
+            lm = synthetic_hand(pose, cx + dx * i, cy + dy * i)
+            if tweak is not None:
+                tweak(lm)
+            frames.append(lm)
+        if label:
+            labels.append({"gesture": label, "start": start / FPS, "end": (len(frames) - 1) / FPS,
+                           "action": action})
+        frames.extend([None] * 10)  # Hand leaves between gestures
+
+    def left_tap(lm):
+        lm[8, :2] = lm[12, :2] + (-10 / w, 25 / h)
+
+    def right_tap(lm):
+        lm[12, :2] = lm[8, :2] + (10 / w, 25 / h)
+
+    add(None, 45, [0, 1, 0, 0, 0], cx=0.3, dx=0.008)  # Cursor motion, should fire nothing
+    add("LEFT_CLICK", 8, [0, 1, 1, 0, 0], tweak=left_tap, action="click")
+    add("RIGHT_CLICK", 8, [0, 1, 1, 0, 0], tweak=right_tap, action="right_click")
+    add("SCROLL", 15, [0, 1, 1, 0, 0], action="hscroll:right")
+    add("MINIMIZE", 45, [0, 0, 0, 0, 0], action="hotkey:win+d")
+    # Two short fists with the hand away in between: the hold starts over, nothing fires
+    add(None, 20, [0, 0, 0, 0, 0])
+    add(None, 20, [0, 0, 0, 0, 0])
+    add("MAXIMIZE", 45, [1, 1, 1, 1, 1], action="hotkey:win+shift+m")
+    add("SHIFT_TAB", 4, [0, 1, 1, 1, 0], cx=0.3, dx=0.07, action="hotkey:shift+tab")
+    add("SWITCH_APP", 4, [0, 1, 1, 1, 1], cx=0.7, dx=-0.07, action="hotkey:alt+tab")
+    # Same pose again after the hand was away: an upward swipe, not one against the old position
+    add("RECENT_TABS", 4, [0, 1, 1, 1, 1], cy=0.6, dy=-0.1, action="hotkey:ctrl+shift+t")
+    add(None, 45, [0, 1, 0, 0, 0], cx=0.6, dy=0.004)
+
+    records = np.zeros(len(frames), dtype=RECORD_DTYPE)
+    records["timestamp"] = np.arange(len(frames)) / FPS
+    records["frame_width"], records["frame_height"] = w, h
+    for i, lm in enumerate(frames):
+        if lm is None:
+            continue
+        lm[:, 0] += rng.normal(0, noise_px / w, 21)
+        lm[:, 1] += rng.normal(0, noise_px / h, 21)
+        records[i]["num_hands"] = 1
+        records[i]["landmarks"][0] = lm
+        records[i]["handedness"][0] = 1
+        records[i]["scores"][0] = 1.0
+    return LabeledSequence(f"synthetic-{seed}", records, labels)
+
+
+def evaluate_sequence(sequence, settings=None, tolerance=0.3):
+    """Replay one labeled sequence and score the emitted actions against its labels"""
+    controller = make_replay_controller(sequence, **(settings or {}))
+    actions = controller.backend.actions
+    events = []  # (time, gesture, action specs injected on that frame)
+    t0 = float(sequence.records["timestamp"][0]) if len(sequence.records) else 0.0
+    seen = [0]
+
+    def on_frame(i, timestamp, fired):
+        if fired:
+            specs = {action_spec(action, args) for _, action, args in actions[seen[0]:]}
+            events.append((timestamp - t0, event_gesture(fired), specs))
+        seen[0] = len(actions)
+
+    cpu_start = time.process_time()
+    replay_trace(sequence, controller, on_frame)
+    cpu = time.process_time() - cpu_start
+
+    # First matching event inside [start, end + tolerance] detects a segment; repeats inside
+    # the same segment are fine. An event of the right gesture that injects something other
+    # than the label's action (wrong direction, wrong keys) is a wrong action; it and events
+    # matching no segment are false triggers
+    detected = [None] * len(sequence.labels)
+    false_triggers = {}
+    wrong_actions = {}
+    for t, gesture, specs in events:
+        matched = False
+        for k, label in enumerate(sequence.labels):
+            if label["gesture"] == gesture and label["start"] <= t <= label["end"] + tolerance:
+                if label.get("action") and label["action"] not in specs:
+                    wrong_actions[gesture] = wrong_actions.get(gesture, 0) + 1
+                    break
+                matched = True
+                if detected[k] is None:
+                    detected[k] = t - label["start"]
+                break
+        if not matched:
+            false_triggers[gesture] = false_triggers.get(gesture, 0) + 1
+
+    duration = len(sequence.records) / FPS if len(sequence.records) < 2 else \
+        float(sequence.records["timestamp"][-1] - sequence.records["timestamp"][0])
+    return {
+        "name": sequence.name,
+        "frames": len(sequence.records),
+        "duration_s": duration,
+        "cpu_s": cpu,
+        "labels": [label["gesture"] for label in sequence.labels],
+        "detected": detected,
+        "false_triggers": false_triggers,
+        "wrong_actions": wrong_actions,
+    }
+
+
+def summarize(results):
+    """Per-gesture precision/recall/latency over all evaluated sequences"""
+    per_gesture = {}
+
+    def entry(gesture):
+        return per_gesture.setdefault(gesture, {"segments": 0, "detected": 0, "false_triggers": 0,
+                                                "wrong_actions": 0, "latencies": []})
+
+    frames = sum(r["frames"] for r in results)
+    duration = sum(r["duration_s"] for r in results)
+    cpu = sum(r["cpu_s"] for r in results)
+    for r in results:
+        for gesture, latency in zip(r["labels"], r["detected"]):
+            e = entry(gesture)
+            e["segments"] += 1
+            if latency is not None:
+                e["detected"] += 1
+                e["latencies"].append(latency * 1000)
+        for gesture, count in r["false_triggers"].items():
+            entry(gesture)["false_triggers"] += count
+        for gesture, count in r["wrong_actions"].items():
+            entry(gesture)["wrong_actions"] += count
+
+    gestures = {}
+    for gesture, e in sorted(per_gesture.items()):
+        tp, fp, fn = e["detected"], e["false_triggers"], e["segments"] - e["detected"]
+        lat = np.asarray(e["latencies"])
+        gestures[gesture] = {
+            "segments": e["segments"],
+            "detected": tp,
+            "false_triggers": fp,
+            "wrong_actions": e["wrong_actions"],
+            "precision": tp / (tp + fp) if tp + fp else None,
+            "recall": tp / (tp + fn) if tp + fn else None,
+            "time_to_action_ms": {
+                "mean": float(lat.mean()),
+                "p50": float(np.percentile(lat, 50)),
+                "p95": float(np.percentile(lat, 95)),
+            } if len(lat) else None,
+        }
+    total_fp = sum(g["false_triggers"] for g in gestures.values())
+    return {
+        "frames": frames,
+        "duration_s": duration,
+        "cpu_ms_per_frame": cpu / frames * 1000 if frames else 0.0,
+        "false_triggers_per_min": total_fp / (duration / 60) if duration else 0.0,
+        "gestures": gestures,
+    }
+
+
+def print_summary(summary):
+    print(f"Frames: {summary['frames']}  Duration: {summary['duration_s']:.1f}s  "
+          f"CPU: {summary['cpu_ms_per_frame']:.3f} ms/frame  "
+          f"False triggers: {summary['false_triggers_per_min']:.2f}/min")
+    print(f"{'gesture':<14}{'segs':>6}{'hit':>6}{'false':>7}{'wrong':>7}{'prec':>7}{'recall':>8}{'t2a p50':>10}{'t2a p95':>10}")
+    for gesture, g in summary["gestures"].items():
+        fmt = lambda v: f"{v:.2f}" if v is not None else "-"
+        t2a = g["time_to_action_ms"] or {}
+        p50 = f"{t2a['p50']:.0f}ms" if t2a else "-"
+        p95 = f"{t2a['p95']:.0f}ms" if t2a else "-"
+        print(f"{gesture:<14}{g['segments']:>6}{g['detected']:>6}{g['false_triggers']:>7}{g['wrong_actions']:>7}"
+              f"{fmt(g['precision']):>7}{fmt(g['recall']):>8}{p50:>10}{p95:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gesture accuracy and time-to-action over labeled traces")
+    parser.add_argument("traces", nargs="*", help="trace files with <trace>.labels.json next to them")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="also evaluate this many generated sequences with different noise seeds")
+    parser.add_argument("--set", action="append", default=[], type=parse_setting, metavar="NAME=VALUE",
+                        help="override a GestureController setting, e.g. click_threshold=40")
+    parser.add_argument("--json", help="write the summary to this file")
+    args = parser.parse_args(argv)
+
+    sequences = []
+    for path in args.traces:
+        reader = TraceReader(path)
+        sequences.append(LabeledSequence(os.path.basename(path), reader.records, load_labels(path)))
+    sequences.extend(synthetic_sequence(seed) for seed in range(args.synthetic))
+    if not sequences:
+        parser.error("give at least one labeled trace or --synthetic N")
+
+    settings = dict(args.set)
+    results = [evaluate_sequence(seq, settings) for seq in sequences]
+    summary = summarize(results)
+    summary["settings"] = settings
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,62 +1,370 @@
+import time
 import cv2
-import mediapipe as mp
 import numpy as np
+from detector_backend import NUM_LANDMARKS, make_backend
+from frame_pool import ScratchBuffers
+from landmark_tracker import OpticalFlowTracker
 
-class HandDetector:
-    def __init__(self, mode=False, max_hands=2, detection_conf=0.7, track_conf=0.7):
-        self.mode = mode
+TIP_IDS = [4, 8, 12, 16, 20]
+PIP_IDS = [6, 10, 14, 18]
+HAND_CONNECTIONS = [
+    (0, 1), (1, 2), (2, 3), (3, 4), (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12), (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+]
+
+
+def fingers_up_batch(coords):
+    """Vectorized finger state for (..., 21, 2+) landmark coordinates -> (..., 5) of 0/1"""
+    coords = np.asarray(coords)
+    fingers = np.empty(coords.shape[:-2] + (5,), dtype=np.uint8)
+    # Thumb: tip right of the joint below it (mirrored frame)
+    fingers[..., 0] = coords[..., 4, 0] > coords[..., 3, 0]
+    # Other fingers: tip above the PIP joint
+    fingers[..., 1:] = coords[..., TIP_IDS[1:], 1] < coords[..., PIP_IDS, 1]
+    return fingers
+
+
+def landmark_distance(coords, a, b):
+    """2D distance between landmarks a and b for (..., 21, 2+) coordinates"""
+    coords = np.asarray(coords)
+    delta = coords[..., a, :2] - coords[..., b, :2]
+    return np.sqrt((delta * delta).sum(axis=-1))
+
+
+def landmark_angle(coords, a, b, c):
+    """Angle in degrees at landmark b between a and c for (..., 21, 2+) coordinates"""
+    coords = np.asarray(coords, dtype=np.float32)
+    v1 = coords[..., a, :2] - coords[..., b, :2]
+    v2 = coords[..., c, :2] - coords[..., b, :2]
+    cos = (v1 * v2).sum(axis=-1) / (
+        np.sqrt((v1 * v1).sum(axis=-1) * (v2 * v2).sum(axis=-1)) + 1e-9)
+    return np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+
+
+class LandmarkSet:
+    """Preallocated landmark arrays for up to `max_hands` hands and the accessors built on them"""
+    
+    def __init__(self, max_hands=2):
         self.max_hands = max_hands
-        self.detection_conf = detection_conf
-        self.track_conf = track_conf
-        
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=self.mode,
-            max_num_hands=self.max_hands,
-            min_detection_confidence=self.detection_conf,
-            min_tracking_confidence=self.track_conf
-        )
-        self.mp_draw = mp.solutions.drawing_utils
-        
-    def find_hands(self, img, draw=True):
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.hands.process(img_rgb)
-        
-        if self.results.multi_hand_landmarks and draw:
-            for hand_lms in self.results.multi_hand_landmarks:
-                self.mp_draw.draw_landmarks(
-                    img, hand_lms, self.mp_hands.HAND_CONNECTIONS)
-        return img
+        # Landmarks for all hands, reused every frame: (hands, 21, [x, y, z])
+        self.num_hands = 0
+        self.landmarks = np.zeros((max_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.landmarks_px = np.zeros((max_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+        # Integer [id, x, y] rows, the same layout as the find_position list
+        self.positions = np.zeros((max_hands, NUM_LANDMARKS, 3), dtype=np.intp)
+        self.positions[:, :, 0] = np.arange(NUM_LANDMARKS)
+        self.scale = np.ones(3, dtype=np.float32)
+        # Per hand: 0 = left, 1 = right, -1 = unknown, and the handedness score
+        self.handedness = np.full(max_hands, -1, dtype=np.int8)
+        self.scores = np.zeros(max_hands, dtype=np.float32)
+    
+    def _sync_views(self, n):
+        """Refresh the pixel and integer views from the normalized landmarks"""
+        np.multiply(self.landmarks[:n], self.scale, out=self.landmarks_px[:n])
+        # Truncate like int() did for the list form
+        self.positions[:n, :, 1:] = self.landmarks_px[:n, :, :2]
+    
+    def set_landmarks(self, landmarks, frame_size, handedness=None, scores=None):
+        """Load (hands, 21, 3) normalized landmarks for a (width, height) frame"""
+        n = min(len(landmarks), self.max_hands)
+        self.num_hands = n
+        w, h = frame_size
+        self.scale[:] = (w, h, w)
+        self.landmarks[:n] = landmarks[:n]
+        self.handedness[:n] = handedness[:n] if handedness is not None else -1
+        self.scores[:n] = scores[:n] if scores is not None else 1.0
+        self._sync_views(n)
+    
+    def draw_hands(self, img):
+        """Draw the skeleton of every detected hand from the landmark arrays"""
+        for pts in self.positions[:self.num_hands, :, 1:]:
+            for a, b in HAND_CONNECTIONS:
+                cv2.line(img, (int(pts[a][0]), int(pts[a][1])), (int(pts[b][0]), int(pts[b][1])),
+                         (224, 224, 224), 2)
+            for x, y in pts:
+                cv2.circle(img, (int(x), int(y)), 2, (0, 0, 255), 2)
+    
+    def get_landmarks(self, pixel=True):
+        """(hands, 21, 3) float32 view of the current landmarks, in pixels or normalized"""
+        source = self.landmarks_px if pixel else self.landmarks
+        return source[:self.num_hands]
+    
+    def get_positions(self, hand_no=0):
+        """(21, 3) integer [id, x, y] view of one hand, indexable like the find_position list"""
+        return self.positions[hand_no]
     
     def find_position(self, img, hand_no=0, draw=True):
         lm_list = []
-        if self.results.multi_hand_landmarks:
-            my_hand = self.results.multi_hand_landmarks[hand_no]
-            for id, lm in enumerate(my_hand.landmark):
-                h, w, c = img.shape
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                lm_list.append([id, cx, cy])
-                if draw and id in [4, 8, 12, 16, 20]:  # Fingertips
+        if hand_no < self.num_hands:
+            lm_list = self.positions[hand_no].tolist()
+            if draw:
+                for id in TIP_IDS:  # Fingertips
+                    cx, cy = lm_list[id][1], lm_list[id][2]
                     cv2.circle(img, (cx, cy), 10, (255, 0, 255), cv2.FILLED)
         return lm_list
     
     def fingers_up(self, lm_list):
-        fingers = []
+        """Finger states for one hand given its [id, x, y] rows"""
+        return fingers_up_batch(np.asarray(lm_list)[:, 1:]).tolist()
+    
+    def fingers_up_all(self):
+        """(hands, 5) finger states for every detected hand in one pass"""
+        return fingers_up_batch(self.landmarks_px[:self.num_hands])
+    
+    def distance(self, a, b, hand_no=0):
+        """Pixel distance between two landmarks of one hand"""
+        return float(landmark_distance(self.landmarks_px[hand_no], a, b))
+    
+    def angle(self, a, b, c, hand_no=0):
+        """Angle in degrees at landmark b of one hand"""
+        return float(landmark_angle(self.landmarks_px[hand_no], a, b, c))
+
+
+class HandDetector(LandmarkSet):
+    def __init__(self, mode=False, max_hands=2, detection_conf=0.7, track_conf=0.7,
+                 roi_tracking=False, roi_margin=0.3, roi_size=None, roi_min_conf=0.8,
+                 roi_refresh_interval=30, inference_interval=1, mirror=False,
+                 model_complexity=1, input_size=None, backend="solutions", **backend_args):
+        super().__init__(max_hands)
+        self.mode = mode
+        self.detection_conf = detection_conf
+        self.track_conf = track_conf
+        self.model_complexity = model_complexity  # 0 = lite landmark model, 1 = full
+        # Longest side full frames are shrunk to before inference (None = as captured)
+        self.input_size = input_size
+        # Mirror: take raw camera frames and flip the landmarks instead of the image
+        self.mirror = mirror
+        self.buffers = ScratchBuffers()  # RGB/resize/gray targets reused every frame
         
-        # Thumb
-        if lm_list[4][1] > lm_list[3][1]:
-            fingers.append(1)
-        else:
-            fingers.append(0)
+        # Inference backend; MediaPipe is imported there, so replaying landmarks never needs it
+        self.backend = backend
+        self.backend_args = backend_args
+        self.hands = self._create_hands()
+        self.result = None
+        # With an asynchronous backend the landmarks are from an earlier frame, this much older
+        self.result_lag = 0.0
+        if not self.hands.synchronous and (roi_tracking or inference_interval > 1):
+            # Both re-anchor on the frame being processed, which an async result doesn't belong to
+            self.hands.close()
+            raise ValueError(f"The {backend} backend runs full-frame only; ROI tracking and "
+                             "sparse inference need a synchronous backend")
+        
+        # ROI tracking: crop around the last hand instead of processing the full frame
+        self.roi_tracking = roi_tracking
+        self.roi_margin = roi_margin  # Box growth on each side, as a fraction of hand size
+        self.roi_size = roi_size  # Square inference size for crops (None = crop resolution)
+        self.roi_min_conf = roi_min_conf  # Below this handedness score, go back to full frame
+        self.roi_refresh_interval = roi_refresh_interval  # Full-frame pass every N frames to find new hands
+        self.roi_min_side = 96
+        self.roi = None  # (x0, y0, x1, y1) in full-frame pixels
+        self.roi_hands = None  # Separate graph so its tracking state matches the crop
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.frames_since_full = 0
+        
+        # Sparse inference: MediaPipe every N frames, optical flow on the frames between
+        self.inference_interval = inference_interval
+        self.tracker = OpticalFlowTracker() if inference_interval > 1 else None
+        self.gray = None
+        self.frames_since_inference = 0
+        self.inference_frames = 0
+        self.tracked_frames = 0
         
-        # Other fingers
-        tip_ids = [8, 12, 16, 20]
-        pip_ids = [6, 10, 14, 18]
+    def _create_hands(self):
+        return make_backend(self.backend, max_hands=self.max_hands, static_image_mode=self.mode,
+                            detection_conf=self.detection_conf, track_conf=self.track_conf,
+                            model_complexity=self.model_complexity, **self.backend_args)
+    
+    def set_quality(self, model_complexity, input_size, inference_interval):
+        """Switch landmark model, inference input size and cadence while running
+        
+        An asynchronous backend only takes the input size: its bundle holds a single model
+        and its results can't anchor the flow tracker.
+        """
+        self.input_size = input_size
+        if not self.hands.synchronous:
+            return
+        if model_complexity != self.model_complexity:
+            # A new graph; its first frame is slow, so expect one stalled frame
+            self.model_complexity = model_complexity
+            self.hands.close()
+            self.hands = self._create_hands()
+            if self.roi_hands is not None:
+                self.roi_hands.close()
+                self.roi_hands = None  # Recreated on the next crop
+        if inference_interval != self.inference_interval:
+            self.inference_interval = inference_interval
+            self.tracker = OpticalFlowTracker() if inference_interval > 1 else None
+            self.frames_since_inference = 0
+    
+    def warm_up(self, shape):
+        """Run the graphs once on a blank frame so the first real frame isn't the slow one"""
+        blank = np.zeros(shape, dtype=np.uint8)
+        self.hands.warm_up(blank)
+        if self.roi_tracking:
+            if self.roi_hands is None:
+                self.roi_hands = self._create_hands()
+            size = self.roi_size or self.roi_min_side
+            self.roi_hands.warm_up(blank[:size, :size])
+    
+    def close(self):
+        """Release the graphs; safe to call more than once"""
+        if self.hands is not None:
+            self.hands.close()
+            self.hands = None
+        if self.roi_hands is not None:
+            self.roi_hands.close()
+            self.roi_hands = None
+    
+    def find_hands(self, img, draw=True):
+        h, w = img.shape[:2]
+        if self.tracker is not None:
+            self.gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=self.buffers.get("gray", (h, w)))
+            if self._track_landmarks():
+                if self.roi_tracking:
+                    self._update_roi(w, h)
+                if self.num_hands and draw:
+                    self.draw_hands(img)
+                return img
         
-        for tip_id, pip_id in zip(tip_ids, pip_ids):
-            if lm_list[tip_id][2] < lm_list[pip_id][2]:
-                fingers.append(1)
+        self._infer(img)
+        self.inference_frames += 1
+        if self.tracker is not None:
+            # Re-anchor the flow tracker on every inference result
+            self.frames_since_inference = 0
+            if self.num_hands:
+                self.tracker.anchor(self.gray, self._image_points())
             else:
-                fingers.append(0)
+                self.tracker.reset()
         
-        return fingers
\ No newline at end of file
+        if self.num_hands and draw:
+            self.draw_hands(img)
+        return img
+    
+    def _infer(self, img):
+        """MediaPipe inference on the ROI crop or the full frame"""
+        h, w = img.shape[:2]
+        found = False
+        if self.roi is not None and self.frames_since_full < self.roi_refresh_interval:
+            found = self._process_roi(img)
+        if not found:
+            # Full-frame detection, also the fallback when the crop lost the hand
+            src = img
+            if self.input_size and max(h, w) > self.input_size:
+                # Landmarks come back normalized, so a smaller input keeps their frame coordinates
+                s = self.input_size / max(h, w)
+                size = (int(w * s), int(h * s))
+                src = cv2.resize(img, size, dst=self.buffers.get("input", (size[1], size[0], 3)),
+                                 interpolation=cv2.INTER_AREA)
+            img_rgb = cv2.cvtColor(src, cv2.COLOR_BGR2RGB, dst=self.buffers.get("rgb", src.shape))
+            now = time.time()
+            self.result = self.hands.process(img_rgb, now)
+            self.result_lag = now - self.result.timestamp if self.result is not None else 0.0
+            self._update_landmarks(img.shape)
+            self.full_frames += 1
+            self.frames_since_full = 0
+        else:
+            self.roi_frames += 1
+            self.frames_since_full += 1
+        if self.roi_tracking:
+            self._update_roi(w, h)
+    
+    def _image_points(self):
+        """Pixel landmarks in the coordinates of the frame given to find_hands"""
+        points = self.landmarks_px[:self.num_hands]
+        if not self.mirror:
+            return points
+        out = self.buffers.get("points", points.shape, np.float32)
+        out[:] = points
+        out[:, :, 0] = self.scale[0] - points[:, :, 0]
+        return out
+    
+    def _track_landmarks(self):
+        """Move the last landmarks with optical flow; False when inference is due"""
+        if not self.num_hands or self.frames_since_inference + 1 >= self.inference_interval:
+            return False
+        points = self.tracker.track(self.gray)
+        if points is None:
+            return False
+        n = self.num_hands
+        self.landmarks_px[:n, :, :2] = points
+        if self.mirror:
+            self.landmarks_px[:n, :, 0] = self.scale[0] - self.landmarks_px[:n, :, 0]
+        np.divide(self.landmarks_px[:n], self.scale, out=self.landmarks[:n])
+        self.positions[:n, :, 1:] = self.landmarks_px[:n, :, :2]
+        self.frames_since_inference += 1
+        self.tracked_frames += 1
+        return True
+    
+    def _process_roi(self, img):
+        """Run inference on the crop around the last hand; False if it must fall back"""
+        x0, y0, x1, y1 = self.roi
+        if self.mirror:
+            # The box follows the mirrored landmarks; crop the same area of the raw frame
+            w = img.shape[1]
+            x0, x1 = w - x1, w - x0
+        crop = img[y0:y1, x0:x1]
+        if self.roi_size:
+            size = (self.roi_size, self.roi_size)
+            crop = cv2.resize(crop, size, dst=self.buffers.get("roi", size + (3,)),
+                              interpolation=cv2.INTER_LINEAR)
+        if self.roi_hands is None:
+            self.roi_hands = self._create_hands()
+        crop_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB, dst=self.buffers.get("roi_rgb", crop.shape))
+        result = self.roi_hands.process(crop_rgb, time.time())
+        if not result.num_hands or result.scores.min() < self.roi_min_conf:
+            return False
+        
+        self.result = result
+        self._update_landmarks(img.shape, (x0, y0, x1 - x0, y1 - y0))
+        return True
+    
+    def _update_roi(self, w, h):
+        """Expanded square box around the current hands for the next frame"""
+        if not self.num_hands:
+            self.roi = None
+            return
+        pts = self.landmarks_px[:self.num_hands, :, :2].reshape(-1, 2)
+        lo, hi = pts.min(axis=0), pts.max(axis=0)
+        center = (lo + hi) / 2
+        side = max(float((hi - lo).max()) * (1 + 2 * self.roi_margin), self.roi_min_side)
+        if side >= min(w, h):
+            # Hand fills the frame, cropping would not save anything
+            self.roi = None
+            return
+        x0 = int(np.clip(center[0] - side / 2, 0, w - side))
+        y0 = int(np.clip(center[1] - side / 2, 0, h - side))
+        self.roi = (x0, y0, x0 + int(side), y0 + int(side))
+    
+    def _update_landmarks(self, shape, crop=None):
+        """Copy the backend result into the preallocated landmark arrays"""
+        result = self.result
+        n = min(result.num_hands, self.max_hands) if result is not None else 0
+        self.num_hands = n
+        if not n:
+            return
+        h, w = shape[:2]
+        self.scale[:] = (w, h, w)
+        self.landmarks[:n] = result.landmarks[:n]
+        for i, right in enumerate(result.handedness[:n]):
+            # MediaPipe expects a mirrored image, so a raw frame swaps the labels
+            self.handedness[i] = -1 if right < 0 else (right == 1) != self.mirror
+        self.scores[:n] = result.scores[:n]
+        if crop is not None:
+            # Map crop-normalized landmarks back into full-frame coordinates
+            cx, cy, cw, ch = crop
+            self.landmarks[:n] *= (cw / w, ch / h, cw / w)
+            self.landmarks[:n] += (cx / w, cy / h, 0)
+        if self.mirror:
+            self.landmarks[:n, :, 0] = 1.0 - self.landmarks[:n, :, 0]
+        self._sync_views(n)
+
+
+class LandmarkFeed(LandmarkSet):
+    """Landmarks supplied from outside (a recorded trace, the network) instead of MediaPipe"""
+    
+    def find_hands(self, img, draw=True):
+        if img is not None and self.num_hands and draw:
+            self.draw_hands(img)
+        return img
\ No newline at end of file
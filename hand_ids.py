@@ -0,0 +1,70 @@
+# hand_ids.py
+import numpy as np
+
+
+class HandIdTracker:
+    """Keeps hand IDs stable across frames, whatever order the detector returns hands in
+
+    Hands are matched to the known tracks by centroid distance (normalized coordinates),
+    plus a penalty when the handedness labels disagree, nearest pairs first. A hand left
+    unmatched gets a new ID. A track waits `max_missing` seconds for its hand, so a hand
+    that drops out for a few frames comes back under the same ID.
+    """
+
+    def __init__(self, max_distance=0.25, handedness_penalty=0.15, max_missing=0.5):
+        self.max_distance = max_distance  # Centroid jump beyond which a hand counts as new
+        self.handedness_penalty = handedness_penalty
+        self.max_missing = max_missing
+        self.next_id = 0
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.centroids = np.zeros((0, 2))
+        self.handedness = np.zeros(0, dtype=np.int8)
+        self.last_seen = np.zeros(0)
+        self.dropped = []  # IDs whose tracks expired in the last update
+
+    def update(self, landmarks, handedness, now):
+        """(hands,) IDs for (hands, 21, 2+) normalized landmarks and their handedness"""
+        n, m = len(landmarks), len(self.ids)
+        centroids = landmarks[:, :, :2].mean(axis=1)
+        ids = np.full(n, -1, dtype=np.int64)
+        matched = np.zeros(m, dtype=bool)
+        if n and m:
+            cost = np.sqrt(((centroids[:, None] - self.centroids[None]) ** 2).sum(axis=-1))
+            known = (handedness[:, None] >= 0) & (self.handedness[None] >= 0)
+            cost += self.handedness_penalty * (known & (handedness[:, None] != self.handedness[None]))
+            # Greedy on a handful of hands: the cheapest pair first, then the next free one
+            for flat in np.argsort(cost, axis=None):
+                i, j = divmod(int(flat), m)
+                if cost[i, j] > self.max_distance:
+                    break
+                if ids[i] < 0 and not matched[j]:
+                    ids[i] = self.ids[j]
+                    matched[j] = True
+        new = ids < 0
+        ids[new] = np.arange(self.next_id, self.next_id + np.count_nonzero(new))
+        self.next_id += int(np.count_nonzero(new))
+
+        # Unmatched tracks wait for their hand until they are too old
+        waiting = ~matched & (now - self.last_seen <= self.max_missing)
+        self.dropped = self.ids[~matched & ~waiting].tolist()
+        self.ids = np.concatenate([ids, self.ids[waiting]])
+        self.centroids = np.concatenate([centroids, self.centroids[waiting]])
+        self.handedness = np.concatenate([np.asarray(handedness, dtype=np.int8), self.handedness[waiting]])
+        self.last_seen = np.concatenate([np.full(n, now), self.last_seen[waiting]])
+        return ids
+
+    def expire(self, now):
+        """Drop the tracks whose hand has been gone too long, for frames with no hands at all"""
+        waiting = now - self.last_seen <= self.max_missing
+        self.dropped = self.ids[~waiting].tolist()
+        self.ids = self.ids[waiting]
+        self.centroids = self.centroids[waiting]
+        self.handedness = self.handedness[waiting]
+        self.last_seen = self.last_seen[waiting]
+
+    def reset(self):
+        self.dropped = self.ids.tolist()
+        self.ids = self.ids[:0]
+        self.centroids = self.centroids[:0]
+        self.handedness = self.handedness[:0]
+        self.last_seen = self.last_seen[:0]
@@ -0,0 +1,45 @@
+# hud.py
+import cv2
+import numpy as np
+
+
+class HudLayer:
+    """Overlay drawn once per change of its key and pasted onto frames with one masked copy
+
+    `render(canvas, *key)` draws the layer. If the drawing turns out to be anti-aliased
+    (newer OpenCV builds smooth text), pasting would lose the blending, so the layer is
+    simply drawn onto every frame instead.
+    """
+
+    def __init__(self, render):
+        self.render = render
+        self.key = None
+        self.shape = None
+        self.overlay = None
+        self.mask = None  # Pixels the layer covers; None when it has to be drawn directly
+        self.renders = 0
+
+    def invalidate(self):
+        self.key = None
+
+    def composite(self, img, key):
+        if key != self.key or img.shape != self.shape:
+            self._render(img.shape, key)
+        if self.mask is None:
+            self.render(img, *key)
+        else:
+            cv2.copyTo(self.overlay, self.mask, img)
+
+    def _render(self, shape, key):
+        # Drawn on black and on white: pixels that differ between the two are covered
+        # only partly, i.e. anti-aliased
+        self.overlay = np.zeros(shape, dtype=np.uint8)
+        white = np.full(shape, 255, dtype=np.uint8)
+        self.render(self.overlay, *key)
+        self.render(white, *key)
+        diff = cv2.subtract(white, self.overlay)
+        hard_edged = not np.any((diff != 0) & (diff != 255))
+        self.mask = (diff == 0).all(axis=2).astype(np.uint8) if hard_edged else None
+        self.shape = shape
+        self.key = key
+        self.renders += 1
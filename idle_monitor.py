@@ -0,0 +1,134 @@
+# idle_monitor.py
+import time
+
+import cv2
+import numpy as np
+
+ACTIVE = "active"
+IDLE = "idle"
+
+
+class MotionDetector:
+    """Cheap frame-difference motion check on a tiny grayscale copy of the frame"""
+
+    def __init__(self, size=(80, 60), pixel_threshold=25, min_area=0.01):
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.min_area = min_area  # Fraction of pixels that must change
+        self.small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self.gray = np.empty((size[1], size[0]), dtype=np.uint8)
+        self.previous = None
+        self.diff = np.empty_like(self.gray)
+
+    def reset(self):
+        self.previous = None
+
+    def detect(self, img):
+        cv2.resize(img, self.size, dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        if self.previous is None:
+            self.previous = self.gray.copy()
+            return False
+        cv2.absdiff(self.gray, self.previous, dst=self.diff)
+        self.previous[:] = self.gray
+        changed = np.count_nonzero(self.diff > self.pixel_threshold)
+        return changed > self.min_area * self.diff.size
+
+
+class IdleMonitor:
+    """Switches the loop into a low-rate, motion-only state when no hand has been seen for a while"""
+
+    def __init__(self, idle_after=5.0, idle_fps=5, wake_grace=1.0, motion=None):
+        self.idle_after = idle_after  # Seconds without landmarks before going idle
+        self.idle_fps = idle_fps  # Capture/loop rate while idle
+        self.wake_grace = wake_grace  # Seconds of full detection after a motion wake with no hand
+        self.motion = motion if motion is not None else MotionDetector()
+
+        self.state = ACTIVE
+        self.last_hand_time = time.time()
+        self.woken_at = None
+        self.wake_pending = False
+        self.last_sample = None  # Capture time of the last idle frame without motion
+        self.wake_from = None
+
+        # Stats
+        self.state_since = time.time()
+        self.cpu_since = time.process_time()
+        self.state_time = {ACTIVE: 0.0, IDLE: 0.0}
+        self.state_cpu = {ACTIVE: 0.0, IDLE: 0.0}
+        self.wakes = 0
+        self.wake_latencies = []
+
+    @property
+    def idle(self):
+        return self.state == IDLE
+
+    def _enter(self, state, now):
+        self.state_time[self.state] += now - self.state_since
+        cpu = time.process_time()
+        self.state_cpu[self.state] += cpu - self.cpu_since
+        self.state = state
+        self.state_since = now
+        self.cpu_since = cpu
+
+    def skip_frame(self, img, now, timestamp=None):
+        """True if the frame should skip detection; wakes up on motion
+
+        `timestamp` is the frame's capture time (default `now`).
+        """
+        if self.state == ACTIVE:
+            return False
+        timestamp = timestamp if timestamp is not None else now
+        if not self.motion.detect(img):
+            self.last_sample = timestamp
+            return True
+        # Motion: full detection starts with this very frame
+        self._enter(ACTIVE, now)
+        self.wakes += 1
+        self.woken_at = now
+        self.wake_pending = True
+        # The motion may have begun right after the previous idle frame, so the wake
+        # latency counts the idle frame interval and the age of this frame too
+        self.wake_from = self.last_sample if self.last_sample is not None else timestamp
+        return False
+
+    def update(self, now, hand_present):
+        """Feed the detection result of an active frame"""
+        if self.wake_pending:
+            self.wake_latencies.append(time.time() - self.wake_from)
+            self.wake_pending = False
+        if hand_present:
+            self.last_hand_time = now
+            return
+        # After a motion wake, give up quickly if no hand shows up
+        timeout = self.idle_after
+        if self.woken_at is not None and self.woken_at > self.last_hand_time:
+            timeout = min(timeout, self.wake_grace)
+            idle_since = self.woken_at
+        else:
+            idle_since = self.last_hand_time
+        if now - idle_since >= timeout:
+            self._enter(IDLE, now)
+            self.motion.reset()
+            self.last_sample = None
+
+    def frame_interval(self):
+        return 1.0 / self.idle_fps if self.idle else 0.0
+
+    def stats(self):
+        now = time.time()
+        state_time = dict(self.state_time)
+        state_cpu = dict(self.state_cpu)
+        state_time[self.state] += now - self.state_since
+        state_cpu[self.state] += time.process_time() - self.cpu_since
+        latencies = np.asarray(self.wake_latencies) * 1000
+        return {
+            "state": self.state,
+            "active_s": state_time[ACTIVE],
+            "idle_s": state_time[IDLE],
+            "active_cpu_pct": 100 * state_cpu[ACTIVE] / state_time[ACTIVE] if state_time[ACTIVE] else 0.0,
+            "idle_cpu_pct": 100 * state_cpu[IDLE] / state_time[IDLE] if state_time[IDLE] else 0.0,
+            "wakes": self.wakes,
+            "wake_latency_mean_ms": float(latencies.mean()) if len(latencies) else 0.0,
+            "wake_latency_max_ms": float(latencies.max()) if len(latencies) else 0.0,
+        }
@@ -0,0 +1,82 @@
+# input_backend.py
+import time
+
+
+class PyAutoGuiBackend:
+    """Injects mouse and keyboard events into the desktop through pyautogui"""
+
+    def __init__(self):
+        # Imported here so headless runs never need a display connection
+        import pyautogui
+        self.pyautogui = pyautogui
+
+    def size(self):
+        return self.pyautogui.size()
+
+    def monitors(self):
+        """(x, y, width, height) per monitor; without the optional screeninfo package, just size()"""
+        try:
+            from screeninfo import get_monitors
+        except ImportError:
+            return [(0, 0) + tuple(self.size())]
+        return [(m.x, m.y, m.width, m.height) for m in get_monitors()] or [(0, 0) + tuple(self.size())]
+
+    def move_to(self, x, y):
+        self.pyautogui.moveTo(x, y, _pause=False)
+
+    def scroll(self, clicks):
+        self.pyautogui.scroll(clicks)
+
+    def hscroll(self, clicks):
+        self.pyautogui.hscroll(clicks)
+
+    def click(self):
+        self.pyautogui.click()
+
+    def right_click(self):
+        self.pyautogui.rightClick()
+
+    def hotkey(self, *keys):
+        self.pyautogui.hotkey(*keys)
+
+
+class RecordingBackend:
+    """Records the actions it would have injected instead of touching the desktop"""
+
+    def __init__(self, screen_size=(1920, 1080), monitors=None):
+        self.screen_size = screen_size
+        self.monitor_rects = monitors if monitors is not None else [(0, 0) + tuple(screen_size)]
+        self.actions = []  # (timestamp, action, args)
+
+    def _record(self, action, *args):
+        self.actions.append((time.time(), action, args))
+
+    def size(self):
+        return self.screen_size
+
+    def monitors(self):
+        return self.monitor_rects
+
+    def move_to(self, x, y):
+        self._record("move_to", x, y)
+
+    def scroll(self, clicks):
+        self._record("scroll", clicks)
+
+    def hscroll(self, clicks):
+        self._record("hscroll", clicks)
+
+    def click(self):
+        self._record("click")
+
+    def right_click(self):
+        self._record("right_click")
+
+    def hotkey(self, *keys):
+        self._record("hotkey", *keys)
+
+    def counts(self):
+        counts = {}
+        for _, action, _ in self.actions:
+            counts[action] = counts.get(action, 0) + 1
+        return counts
@@ -0,0 +1,129 @@
+# input_injector.py
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Actions where only the newest target matters / whose amounts can be summed
+COALESCED_ACTIONS = ("move_to",)
+MERGED_ACTIONS = ("scroll", "hscroll")
+
+
+class InputInjector:
+    """Applies input actions on a worker thread so the vision loop never waits on the OS input stack"""
+
+    def __init__(self, backend, latency_window=256, profiler=None):
+        self.backend = backend
+        self.profiler = profiler
+        self.queue = deque()  # [action, args, enqueue_time]
+        self.cond = threading.Condition()
+        self.busy = False
+        self.running = True
+
+        # Metrics
+        self.submitted = 0
+        self.applied = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.latencies = deque(maxlen=latency_window)
+        self.latency_ewma = 0.0  # Seconds, cheap to read every frame
+
+        self.thread = threading.Thread(target=self._worker, name="input-injector", daemon=True)
+        self.thread.start()
+
+    # Same interface as the input backends, so the injector can wrap any of them
+    def size(self):
+        return self.backend.size()
+
+    def monitors(self):
+        return self.backend.monitors()
+
+    def move_to(self, x, y):
+        self._submit("move_to", (x, y))
+
+    def scroll(self, clicks):
+        self._submit("scroll", (clicks,))
+
+    def hscroll(self, clicks):
+        self._submit("hscroll", (clicks,))
+
+    def click(self):
+        self._submit("click", ())
+
+    def right_click(self):
+        self._submit("right_click", ())
+
+    def hotkey(self, *keys):
+        self._submit("hotkey", keys)
+
+    def _submit(self, action, args):
+        # Consecutive moves keep only the newest target, consecutive scrolls are summed;
+        # anything else is queued in order and applied exactly once
+        with self.cond:
+            self.submitted += 1
+            last = self.queue[-1] if self.queue else None
+            if last is not None and last[0] == action and action in COALESCED_ACTIONS:
+                last[1] = args
+                self.coalesced += 1
+            elif last is not None and last[0] == action and action in MERGED_ACTIONS:
+                last[1] = (last[1][0] + args[0],)
+                self.coalesced += 1
+            else:
+                self.queue.append([action, args, time.perf_counter()])
+                self.max_depth = max(self.max_depth, len(self.queue))
+            self.cond.notify_all()
+
+    def _worker(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.queue or not self.running)
+                if not self.queue:
+                    break
+                action, args, enqueued = self.queue.popleft()
+                self.busy = True
+            started = time.perf_counter()
+            try:
+                getattr(self.backend, action)(*args)
+            except Exception as e:
+                self.errors += 1
+                print(f"Input injection failed ({action}): {e}")
+            if self.profiler is not None:
+                self.profiler.record("injection", time.perf_counter() - started)
+            with self.cond:
+                self.busy = False
+                self.applied += 1
+                latency = time.perf_counter() - enqueued
+                self.latencies.append(latency)
+                self.latency_ewma += 0.1 * (latency - self.latency_ewma)
+                self.cond.notify_all()
+
+    def flush(self, timeout=1.0):
+        """Wait until every queued action has been applied"""
+        with self.cond:
+            return self.cond.wait_for(lambda: not self.queue and not self.busy, timeout)
+
+    def queue_depth(self):
+        return len(self.queue)
+
+    def metrics(self):
+        latencies = np.asarray(self.latencies) * 1000
+        return {
+            "queue_depth": len(self.queue),
+            "max_queue_depth": self.max_depth,
+            "submitted": self.submitted,
+            "applied": self.applied,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "latency_p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+            "latency_p95_ms": float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+            "latency_max_ms": float(latencies.max()) if len(latencies) else 0.0,
+        }
+
+    def close(self, timeout=1.0):
+        """Apply what is still queued, then stop the worker"""
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        self.thread.join(timeout)
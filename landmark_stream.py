@@ -0,0 +1,596 @@
+# landmark_stream.py
+import argparse
+import collections
+import os
+import select
+import socket
+import threading
+import time
+
+import numpy as np
+
+from detector_backend import BACKENDS, model_problem
+from hand_detector import NUM_LANDMARKS, LandmarkFeed
+from landmark_trace import ACTION_DTYPE, TRACE_MAX_HANDS, decode_actions, encode_action
+
+MAGIC = b"HL"
+VERSION = 1
+KIND_LANDMARKS = 1  # Camera side -> receiver: the hands of one frame
+KIND_ACTIONS = 2  # Camera side -> receiver: cursor position and recent discrete actions
+KIND_MONITORS = 3  # Receiver -> camera side: its monitor layout, for cursor mapping
+MAX_PACKET = 2048
+XY_SCALE = 16384  # Normalized coordinates as int16: steps of 1/16384, range +-2
+REORDER_WINDOW = 256  # A sequence number further back than this means the sender restarted
+
+PACKET_HEADER = np.dtype([
+    ("magic", "S2"),
+    ("version", "u1"),
+    ("kind", "u1"),
+    ("seq", "<u4"),
+    ("timestamp", "<f8"),  # Capture time of the frame the packet comes from
+    ("sent", "<f8"),  # Sender's wall clock at send, for one-way latency
+])
+
+LANDMARK_BODY = np.dtype([
+    ("frame_width", "<u2"),
+    ("frame_height", "<u2"),
+    ("num_hands", "u1"),
+])
+
+HAND_DTYPE = np.dtype([
+    ("handedness", "i1"),
+    ("score", "u1"),  # 0-255
+    ("xy", "<i2", (NUM_LANDMARKS, 2)),  # z isn't used by the gestures and isn't sent
+])
+
+ACTION_BODY = np.dtype([
+    ("cursor", "<i4", (2,)),
+    ("has_cursor", "u1"),
+    ("first_event", "<u4"),  # ID of the first action listed; the others follow consecutively
+    ("num_events", "u1"),
+])
+
+
+def parse_address(text):
+    """(family, address): host:port is UDP, anything else a Unix datagram socket path"""
+    host, sep, port = text.rpartition(":")
+    if sep and port.isdigit() and "/" not in text:
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, text
+
+
+def _bind(family, address):
+    sock = socket.socket(family, socket.SOCK_DGRAM)
+    if family == socket.AF_UNIX and os.path.exists(address):
+        os.unlink(address)
+    sock.bind(address)
+    sock.setblocking(False)
+    return sock
+
+
+class Packet:
+    """One received datagram; the body is decoded on demand"""
+
+    __slots__ = ("kind", "seq", "timestamp", "sent", "body")
+
+    def __init__(self, data):
+        header = np.frombuffer(data, dtype=PACKET_HEADER, count=1)[0]
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            raise ValueError("Not a landmark stream packet")
+        self.kind = int(header["kind"])
+        self.seq = int(header["seq"])
+        self.timestamp = float(header["timestamp"])
+        self.sent = float(header["sent"])
+        self.body = data[PACKET_HEADER.itemsize:]
+
+    def landmarks(self):
+        """frame_size, handedness, scores and (hands, 21, 3) normalized landmarks (z = 0)"""
+        body = np.frombuffer(self.body, dtype=LANDMARK_BODY, count=1)[0]
+        n = int(body["num_hands"])
+        hands = np.frombuffer(self.body, dtype=HAND_DTYPE, count=n, offset=LANDMARK_BODY.itemsize)
+        landmarks = np.zeros((n, NUM_LANDMARKS, 3), dtype=np.float32)
+        landmarks[:, :, :2] = hands["xy"] / XY_SCALE
+        frame_size = (int(body["frame_width"]), int(body["frame_height"]))
+        return frame_size, hands["handedness"], hands["score"] / 255.0, landmarks
+
+    def actions(self):
+        """cursor (or None), ID of the first event, and the (action, args) events"""
+        body = np.frombuffer(self.body, dtype=ACTION_BODY, count=1)[0]
+        events = np.frombuffer(self.body, dtype=ACTION_DTYPE, count=int(body["num_events"]),
+                               offset=ACTION_BODY.itemsize)
+        cursor = tuple(int(v) for v in body["cursor"]) if body["has_cursor"] else None
+        return cursor, int(body["first_event"]), decode_actions(events)
+
+    def monitors(self):
+        return [tuple(int(v) for v in m) for m in np.frombuffer(self.body, dtype="<i4").reshape(-1, 4)]
+
+
+class LinkStats:
+    """Loss, reordering and one-way latency of a packet stream
+
+    Loss comes from gaps in the sequence numbers; a packet that shows up after a later
+    one is counted as late (and no longer as lost). One-way latency compares the
+    sender's clock with ours, so across machines it is only as good as their clock sync
+    (exact over loopback).
+    """
+
+    def __init__(self, max_samples=1000):
+        self.received = 0
+        self.lost = 0
+        self.late = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.superseded = 0  # Landmark frames skipped because a newer one arrived with them
+        self.lost_events = 0
+        self.bytes = 0
+        self.first_seq = None
+        self.highest = None
+        self.started = None
+        self.latency = collections.deque(maxlen=max_samples)  # Send -> receive
+        self.age = collections.deque(maxlen=max_samples)  # Capture -> receive
+
+    def restart(self):
+        """A new sender or a restarted one: sequence numbers begin again"""
+        self.first_seq = self.highest = None
+
+    def add(self, packet, now, size):
+        """Count a packet; True when it is the newest so far, False when stale"""
+        if self.started is None:
+            self.started = now
+        self.received += 1
+        self.bytes += size
+        self.latency.append(now - packet.sent)
+        self.age.append(now - packet.timestamp)
+        seq = packet.seq
+        if self.highest is not None and seq + REORDER_WINDOW < self.highest:
+            self.restart()
+        if self.highest is None:
+            self.first_seq = self.highest = seq
+            return True
+        if seq > self.highest:
+            self.lost += seq - self.highest - 1
+            self.highest = seq
+            return True
+        if seq == self.highest:
+            self.duplicates += 1
+        else:
+            # It was counted as lost when the gap opened
+            self.late += 1
+            self.lost = max(self.lost - 1, 0)
+        return False
+
+    def to_dict(self, now=None):
+        now = now if now is not None else time.time()
+        latency = np.array(self.latency) * 1000 if self.latency else np.zeros(1)
+        age = np.array(self.age) * 1000 if self.age else np.zeros(1)
+        expected = self.received - self.duplicates + self.lost
+        elapsed = now - self.started if self.started is not None else 0.0
+        return {
+            "received": self.received,
+            "lost": self.lost,
+            "loss_pct": 100.0 * self.lost / expected if expected else 0.0,
+            "late": self.late,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "superseded": self.superseded,
+            "lost_events": self.lost_events,
+            "kbps": self.bytes * 8 / 1000 / elapsed if elapsed else 0.0,
+            "latency_p50_ms": float(np.percentile(latency, 50)),
+            "latency_p95_ms": float(np.percentile(latency, 95)),
+            "latency_max_ms": float(latency.max()),
+            "age_p50_ms": float(np.percentile(age, 50)),
+        }
+
+    def print(self, now=None):
+        s = self.to_dict(now)
+        print(f"Link: {s['received']} packets, {s['lost']} lost ({s['loss_pct']:.1f}%), {s['late']} late, "
+              f"{s['superseded']} superseded, {s['lost_events']} actions lost, {s['kbps']:.1f} kbit/s; "
+              f"one-way latency p50 {s['latency_p50_ms']:.1f} ms, p95 {s['latency_p95_ms']:.1f} ms, "
+              f"max {s['latency_max_ms']:.1f} ms; capture age p50 {s['age_p50_ms']:.1f} ms")
+
+
+class StreamSender:
+    """Camera side of the link: sends sequence-numbered packets without ever blocking
+
+    A datagram the socket can't take right now is dropped (and counted); the next frame
+    supersedes it anyway.
+    """
+
+    def __init__(self, address, max_hands=TRACE_MAX_HANDS):
+        family, self.address = parse_address(address)
+        self.local_path = None
+        if family == socket.AF_UNIX:
+            # Bound, so the receiver can send its monitor layout back
+            self.local_path = f"{self.address}.{os.getpid()}"
+            self.sock = _bind(family, self.local_path)
+        else:
+            self.sock = socket.socket(family, socket.SOCK_DGRAM)
+            self.sock.setblocking(False)
+        self.seq = 0
+        self.packets = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.monitors = None  # Receiver's monitors, once it has reported them
+        self.monitors_seq = -1
+        # Reused for every packet
+        self.header = np.zeros(1, dtype=PACKET_HEADER)
+        self.header["magic"] = MAGIC
+        self.header["version"] = VERSION
+        self.landmark_body = np.zeros(1, dtype=LANDMARK_BODY)
+        self.hands = np.zeros(max_hands, dtype=HAND_DTYPE)
+        self.action_body = np.zeros(1, dtype=ACTION_BODY)
+
+    def _send(self, kind, timestamp, *parts):
+        h = self.header[0]
+        h["kind"] = kind
+        h["seq"] = self.seq
+        h["timestamp"] = timestamp
+        h["sent"] = time.time()
+        self.seq += 1
+        data = b"".join((self.header.tobytes(),) + parts)
+        try:
+            self.sock.sendto(data, self.address)
+        except (BlockingIOError, ConnectionRefusedError, FileNotFoundError):
+            self.dropped += 1
+            return
+        self.packets += 1
+        self.bytes += len(data)
+
+    def send_landmarks(self, timestamp, detector, frame_size):
+        """One packet with every hand of `detector`; sent for empty frames too"""
+        n = min(detector.num_hands, len(self.hands))
+        body = self.landmark_body[0]
+        body["frame_width"], body["frame_height"] = frame_size
+        body["num_hands"] = n
+        hands = self.hands[:n]
+        hands["handedness"] = detector.handedness[:n]
+        hands["score"] = np.rint(np.clip(detector.scores[:n], 0, 1) * 255)
+        hands["xy"] = np.clip(np.rint(detector.landmarks[:n, :, :2] * XY_SCALE), -32768, 32767)
+        self._send(KIND_LANDMARKS, timestamp, self.landmark_body.tobytes(), hands.tobytes())
+
+    def send_actions(self, timestamp, cursor, first_event, events):
+        body = self.action_body[0]
+        body["has_cursor"] = cursor is not None
+        body["cursor"] = cursor if cursor is not None else (0, 0)
+        body["first_event"] = first_event
+        body["num_events"] = len(events)
+        self._send(KIND_ACTIONS, timestamp, self.action_body.tobytes(), events.tobytes())
+
+    def poll_monitors(self):
+        """Take in any monitor layout the receiver sent; returns the newest one known"""
+        while True:
+            try:
+                data = self.sock.recv(MAX_PACKET)
+            except (BlockingIOError, ConnectionRefusedError):
+                break
+            try:
+                packet = Packet(data)
+            except ValueError:
+                continue
+            if packet.kind == KIND_MONITORS and packet.seq > self.monitors_seq:
+                self.monitors_seq = packet.seq
+                self.monitors = packet.monitors()
+        return self.monitors
+
+    def stats(self):
+        return {"packets": self.packets, "bytes": self.bytes, "dropped": self.dropped}
+
+    def close(self):
+        self.sock.close()
+        if self.local_path is not None and os.path.exists(self.local_path):
+            os.unlink(self.local_path)
+
+
+class ActionStreamBackend:
+    """Input backend that sends the actions to a remote receiver instead of injecting them
+
+    Every discrete action (click, scroll, hotkey) gets an ID and rides along in the next
+    packets for `event_ttl` seconds, so one lost datagram doesn't lose a click; the
+    receiver runs each ID once. While such events are pending, a heartbeat thread sends
+    them every `heartbeat` seconds even when nothing else goes out. Cursor moves aren't
+    repeated: the next one replaces them.
+    """
+
+    def __init__(self, sender, screen_size=(1920, 1080), event_ttl=0.25, max_events=8, heartbeat=0.03):
+        self.sender = sender
+        self.screen_size = screen_size
+        self.event_ttl = event_ttl
+        self.events = np.zeros(max_events, dtype=ACTION_DTYPE)  # Ring of the newest events
+        self.event_times = np.full(max_events, -np.inf)
+        self.next_event = 0
+        self.last_send = 0.0
+        self.lock = threading.Lock()  # The heartbeat shares the sender with the gesture loop
+        self.closed = threading.Event()
+        self.thread = None
+        if heartbeat:
+            self.thread = threading.Thread(target=self._heartbeat, args=(heartbeat,),
+                                           name="stream-heartbeat", daemon=True)
+            self.thread.start()
+
+    def _heartbeat(self, interval):
+        while not self.closed.wait(interval):
+            with self.lock:
+                now = time.time()
+                if now - self.last_send >= interval and (now - self.event_times <= self.event_ttl).any():
+                    self._send()
+
+    def close(self):
+        self.closed.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def size(self):
+        monitors = self.monitors()
+        return tuple(monitors[0][2:])
+
+    def monitors(self):
+        """The receiver's monitors, once it has reported them; until then `screen_size`"""
+        return self.sender.poll_monitors() or [(0, 0) + tuple(self.screen_size)]
+
+    def _send(self, cursor=None):
+        now = self.last_send = time.time()
+        # Events young enough to repeat, oldest first, consecutive IDs
+        count = min(self.next_event, len(self.events))
+        first = self.next_event - count
+        ids = np.arange(first, self.next_event)
+        slots = ids % len(self.events)
+        fresh = now - self.event_times[slots] <= self.event_ttl
+        if fresh.any():
+            start = int(np.argmax(fresh))
+            first, slots = int(ids[start]), slots[start:]
+        else:
+            first, slots = self.next_event, slots[:0]
+        self.sender.send_actions(now, cursor, first, self.events[slots])
+
+    def _event(self, action, x=0, y=0, keys=()):
+        with self.lock:
+            slot = self.next_event % len(self.events)
+            self.events[slot] = encode_action(action, x, y, keys)
+            self.event_times[slot] = time.time()
+            self.next_event += 1
+            self._send()
+
+    def move_to(self, x, y):
+        with self.lock:
+            self._send(cursor=(int(x), int(y)))
+
+    def scroll(self, clicks):
+        self._event("scroll", clicks)
+
+    def hscroll(self, clicks):
+        self._event("hscroll", clicks)
+
+    def click(self):
+        self._event("click")
+
+    def right_click(self):
+        self._event("right_click")
+
+    def hotkey(self, *keys):
+        self._event("hotkey", keys=keys)
+
+
+class StreamReceiver:
+    """Input side of the link: injects received actions and runs gestures on received landmarks
+
+    Stale packets (older than one already applied) are dropped, and when several
+    landmark frames are waiting only the newest is run. Action packets are applied in
+    order, each action ID once. `controller` (a GestureController over a LandmarkFeed)
+    is only needed for landmark packets.
+    """
+
+    def __init__(self, address, backend, controller=None, monitor_interval=2.0):
+        family, self.address = parse_address(address)
+        self.sock = _bind(family, self.address)
+        self.backend = backend
+        self.controller = controller
+        self.monitor_interval = monitor_interval
+        self.monitors_sent_at = -np.inf
+        self.seq = 0
+        self.peer = None
+        self.last_event = -1
+        self.stats = LinkStats()
+
+    def poll(self, timeout=0.1):
+        """Wait up to `timeout` for packets and apply them; returns how many were newest"""
+        ready, _, _ = select.select([self.sock], [], [], timeout)
+        packets = []
+        while ready:
+            try:
+                data, peer = self.sock.recvfrom(MAX_PACKET)
+            except (BlockingIOError, InterruptedError):
+                break
+            now = time.time()
+            try:
+                packet = Packet(data)
+            except ValueError:
+                self.stats.invalid += 1
+                continue
+            if peer != self.peer:
+                self.peer = peer
+                self.stats.restart()
+                self.last_event = -1
+                self.monitors_sent_at = -np.inf
+            if self.stats.add(packet, now, len(data)):
+                packets.append(packet)
+        if self.peer is not None and time.time() - self.monitors_sent_at >= self.monitor_interval:
+            self._send_monitors()
+        self.apply(packets)
+        return len(packets)
+
+    def apply(self, packets):
+        newest = None
+        for packet in packets:
+            if packet.kind == KIND_ACTIONS:
+                self._apply_actions(packet)
+            elif packet.kind == KIND_LANDMARKS:
+                if newest is not None:
+                    self.stats.superseded += 1
+                newest = packet
+        if newest is not None and self.controller is not None:
+            self._run_gestures(newest)
+
+    def _apply_actions(self, packet):
+        cursor, first, events = packet.actions()
+        if first > self.last_event + 1:
+            self.stats.lost_events += first - self.last_event - 1
+        # Repeated events first: they are older than this packet's cursor
+        for event_id, (action, args) in enumerate(events, first):
+            if event_id > self.last_event:
+                getattr(self.backend, action)(*args)
+                self.last_event = event_id
+        if cursor is not None:
+            self.backend.move_to(*cursor)
+
+    def _run_gestures(self, packet):
+        controller = self.controller
+        feed = controller.detector
+        frame_size, handedness, scores, landmarks = packet.landmarks()
+        feed.set_landmarks(landmarks, frame_size, handedness, scores)
+        # Gesture timing runs on the camera side's clock, like a trace replay
+        controller.frame_timestamp = packet.timestamp
+        if feed.num_hands:
+            controller.execute_hands(None, feed.fingers_up_all(), now=packet.timestamp, frame_size=frame_size)
+        else:
+            controller.release_hands(packet.timestamp)
+
+    def _send_monitors(self):
+        self.monitors_sent_at = time.time()
+        header = np.zeros(1, dtype=PACKET_HEADER)
+        header[0] = (MAGIC, VERSION, KIND_MONITORS, self.seq, self.monitors_sent_at, self.monitors_sent_at)
+        self.seq += 1
+        rects = np.array(self.backend.monitors(), dtype="<i4").reshape(-1, 4)
+        try:
+            self.sock.sendto(header.tobytes() + rects.tobytes(), self.peer)
+        except (BlockingIOError, ConnectionRefusedError, FileNotFoundError):
+            pass
+
+    def close(self):
+        self.sock.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+def make_receiver(address, backend, async_input=True):
+    """StreamReceiver with a GestureController for landmark packets, no camera and no window"""
+    from app import GestureController
+    receiver = StreamReceiver(address, backend)
+    receiver.controller = GestureController(source=receiver, backend=backend, display=False,
+                                            detector=LandmarkFeed(TRACE_MAX_HANDS), async_input=async_input)
+    # Actions from the camera side go through the same (possibly threaded) injector
+    receiver.backend = receiver.controller.backend
+    return receiver
+
+
+def run_receiver(receiver, report_every=5.0):
+    next_report = time.time() + report_every
+    try:
+        while True:
+            receiver.poll()
+            now = time.time()
+            if report_every and now >= next_report and receiver.stats.received:
+                receiver.stats.print(now)
+                next_report = now + report_every
+    except KeyboardInterrupt:
+        pass
+    receiver.stats.print()
+    injector = getattr(receiver.controller, "injector", None)
+    if injector is not None:
+        injector.close()
+    receiver.close()
+
+
+def stream_landmarks(cap, detector, sender, report_every=5.0):
+    """Camera loop of the landmark mode: detect and send, nothing else"""
+    next_report = time.time() + report_every
+    try:
+        while True:
+            success, frame = cap.read()
+            if not success:
+                print("Failed to capture video feed")
+                break
+            timestamp = getattr(cap, "last_timestamp", None) or time.time()
+            detector.find_hands(frame, draw=False)
+            # Pipelined detectors return landmarks of an earlier frame
+            timestamp -= getattr(detector, "result_lag", 0.0)
+            sender.send_landmarks(timestamp, detector, (frame.shape[1], frame.shape[0]))
+            now = time.time()
+            if report_every and now >= next_report:
+                s = sender.stats()
+                print(f"Sent {s['packets']} packets ({s['bytes'] / 1000:.0f} kB), {s['dropped']} dropped")
+                next_report = now + report_every
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Split the controller across machines: the camera side sends landmarks or actions, "
+                    "the receiving side moves the cursor")
+    sub = parser.add_subparsers(dest="command", required=True)
+    send = sub.add_parser("send", help="run the camera and hand detection, send to a receiver")
+    send.add_argument("address", help="receiver host:port (UDP) or Unix socket path")
+    send.add_argument("--actions", action="store_true",
+                      help="run the gestures here and send only the resulting actions")
+    send.add_argument("--hands", type=int, default=1, help="hands to track")
+    send.add_argument("--backend", choices=sorted(BACKENDS), default="solutions")
+    send.add_argument("--model", default="hand_landmarker.task", help="model bundle for the tasks backend")
+    send.add_argument("--capture", choices=["thread", "process", "sync"], default="thread")
+    send.add_argument("--headless", action="store_true", help="no preview window in --actions mode")
+    receive = sub.add_parser("receive", help="listen for a camera side and inject its input")
+    receive.add_argument("address", help="host:port (UDP) or Unix socket path to listen on")
+    receive.add_argument("--dry-run", action="store_true", help="record the actions instead of injecting them")
+    for p in (send, receive):
+        p.add_argument("--report-every", type=float, default=5.0, help="seconds between link reports (0 = off)")
+    args = parser.parse_args(argv)
+    if args.command == "send" and args.backend == "tasks":
+        problem = model_problem(args.model)
+        if problem:
+            parser.error(f"{problem} (or pass --model)")
+
+    if args.command == "receive":
+        from input_backend import PyAutoGuiBackend, RecordingBackend
+        backend = RecordingBackend() if args.dry_run else PyAutoGuiBackend()
+        receiver = make_receiver(args.address, backend, async_input=not args.dry_run)
+        print(f"Listening on {args.address}")
+        run_receiver(receiver, args.report_every)
+        if args.dry_run:
+            print("Actions: " + (", ".join(f"{k}={v}" for k, v in sorted(backend.counts().items())) or "none"))
+        return
+
+    from app import GestureController
+    from frame_capture import open_capture
+    from hand_detector import HandDetector
+    width, height = GestureController.camera_size
+    detector_args = dict(max_hands=args.hands, mirror=True, backend=args.backend)
+    if args.backend == "tasks":
+        detector_args["model_path"] = args.model
+    detector = HandDetector(**detector_args)
+    detector.warm_up((height, width, 3))
+    cap = open_capture(0, width, height, mode=args.capture)
+    sender = StreamSender(args.address, max_hands=args.hands)
+    backend = None
+    try:
+        if args.actions:
+            from console_controls import ConsoleControls
+            backend = ActionStreamBackend(sender)
+            controller = GestureController(source=cap, backend=backend, detector=detector,
+                                           async_input=False, display=not args.headless,
+                                           controls=ConsoleControls().start() if args.headless else None)
+            controller.run()
+        else:
+            stream_landmarks(cap, detector, sender, args.report_every)
+    finally:
+        if backend is not None:
+            backend.close()
+        s = sender.stats()
+        print(f"Sent {s['packets']} packets ({s['bytes'] / 1000:.0f} kB), {s['dropped']} dropped")
+        sender.close()
+        if not args.actions:
+            # In --actions mode the controller released them when run() returned
+            cap.release()
+            detector.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# landmark_trace.py
+import argparse
+import os
+import time
+
+import numpy as np
+
+from hand_detector import LandmarkFeed, NUM_LANDMARKS, fingers_up_batch
+
+MAGIC = b"HLMTRACE"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("record_size", "<u4")])
+
+TRACE_MAX_HANDS = 2
+MAX_ACTIONS = 4  # Actions kept per frame; more are counted in `dropped_actions`
+
+ACTION_CODES = {"move_to": 1, "scroll": 2, "hscroll": 3, "click": 4, "right_click": 5, "hotkey": 6}
+ACTION_NAMES = {code: name for name, code in ACTION_CODES.items()}
+
+ACTION_DTYPE = np.dtype([
+    ("code", "u1"),
+    ("x", "<i4"),  # move_to x, scroll amount
+    ("y", "<i4"),  # move_to y
+    ("keys", "S24"),  # hotkey keys joined with '+'
+])
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("frame_width", "<u2"),
+    ("frame_height", "<u2"),
+    ("num_hands", "u1"),
+    ("num_actions", "u1"),
+    ("dropped_actions", "u1"),
+    ("handedness", "i1", (TRACE_MAX_HANDS,)),
+    ("scores", "<f4", (TRACE_MAX_HANDS,)),
+    ("fingers", "u1", (TRACE_MAX_HANDS, 5)),
+    ("landmarks", "<f4", (TRACE_MAX_HANDS, NUM_LANDMARKS, 3)),  # normalized x, y, z
+    ("actions", ACTION_DTYPE, (MAX_ACTIONS,)),
+])
+
+
+def encode_action(action, x=0, y=0, keys=()):
+    """Field values of one ACTION_DTYPE entry"""
+    return ACTION_CODES[action], x, y, "+".join(keys).encode()[:24]
+
+
+def decode_actions(actions):
+    """(action, args) list for ACTION_DTYPE entries"""
+    out = []
+    for a in actions:
+        name = ACTION_NAMES[int(a["code"])]
+        if name == "move_to":
+            out.append((name, (int(a["x"]), int(a["y"]))))
+        elif name in ("scroll", "hscroll"):
+            out.append((name, (int(a["x"]),)))
+        elif name == "hotkey":
+            out.append((name, tuple(a["keys"].decode().split("+"))))
+        else:
+            out.append((name, ()))
+    return out
+
+
+class _ActionTap:
+    """Forwards input calls to the real backend and notes them for the current trace record"""
+
+    def __init__(self, backend, recorder):
+        self.backend = backend
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        # Anything that isn't an action (size, metrics, close, ...) goes straight through
+        return getattr(self.backend, name)
+
+    def move_to(self, x, y):
+        self.recorder.add_action("move_to", x, y)
+        self.backend.move_to(x, y)
+
+    def scroll(self, clicks):
+        self.recorder.add_action("scroll", clicks)
+        self.backend.scroll(clicks)
+
+    def hscroll(self, clicks):
+        self.recorder.add_action("hscroll", clicks)
+        self.backend.hscroll(clicks)
+
+    def click(self):
+        self.recorder.add_action("click")
+        self.backend.click()
+
+    def right_click(self):
+        self.recorder.add_action("right_click")
+        self.backend.right_click()
+
+    def hotkey(self, *keys):
+        self.recorder.add_action("hotkey", keys=keys)
+        self.backend.hotkey(*keys)
+
+
+class TraceRecorder:
+    """Appends one fixed-size record per processed frame to a trace file"""
+
+    def __init__(self, path, flush_every=30):
+        self.path = path
+        self.file = open(path, "wb")
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header["magic"] = MAGIC
+        header["version"] = VERSION
+        header["record_size"] = RECORD_DTYPE.itemsize
+        self.file.write(header.tobytes())
+        self.record = np.zeros(1, dtype=RECORD_DTYPE)  # Reused for every frame
+        self.flush_every = flush_every
+        self.frames = 0
+
+    def wrap(self, backend):
+        """Backend proxy that logs every injected action into the current record"""
+        return _ActionTap(backend, self)
+
+    def add_action(self, action, x=0, y=0, keys=()):
+        rec = self.record[0]
+        i = rec["num_actions"]
+        if i >= MAX_ACTIONS:
+            rec["dropped_actions"] = min(int(rec["dropped_actions"]) + 1, 255)
+            return
+        rec["actions"][i] = encode_action(action, x, y, keys)
+        rec["num_actions"] = i + 1
+
+    def record_frame(self, timestamp, detector, frame_size):
+        """Write the landmarks of `detector` plus the actions seen since the last frame"""
+        rec = self.record[0]
+        n = min(detector.num_hands, TRACE_MAX_HANDS)
+        rec["timestamp"] = timestamp
+        rec["frame_width"], rec["frame_height"] = frame_size
+        rec["num_hands"] = n
+        rec["landmarks"][:n] = detector.landmarks[:n]
+        rec["handedness"][:n] = detector.handedness[:n]
+        rec["scores"][:n] = detector.scores[:n]
+        rec["fingers"][:n] = fingers_up_batch(detector.landmarks_px[:n])
+        self.file.write(self.record.tobytes())
+
+        self.record.fill(0)
+        self.frames += 1
+        if self.frames % self.flush_every == 0:
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class TraceReader:
+    """Memory-maps a trace; every field is a zero-copy NumPy view over the file"""
+
+    def __init__(self, path):
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if not len(header) or header["magic"][0] != MAGIC:
+            raise ValueError(f"Not a landmark trace: {path}")
+        if header["record_size"][0] != RECORD_DTYPE.itemsize or header["version"][0] != VERSION:
+            raise ValueError(f"Unsupported trace version/record size in {path}")
+        count = (os.path.getsize(path) - HEADER_DTYPE.itemsize) // RECORD_DTYPE.itemsize
+        self.path = path
+        self.max_hands = TRACE_MAX_HANDS
+        self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r",
+                                 offset=HEADER_DTYPE.itemsize, shape=(count,)) if count else \
+            np.zeros(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getattr__(self, field):
+        # reader.timestamps, reader.landmarks, ... -> views of the record fields
+        name = {"timestamps": "timestamp"}.get(field, field)
+        if name in RECORD_DTYPE.names:
+            return self.records[name]
+        raise AttributeError(field)
+
+    def actions(self, i):
+        """Decoded (action, args) list of frame i"""
+        rec = self.records[i]
+        return decode_actions(rec["actions"][:rec["num_actions"]])
+
+    def action_counts(self):
+        codes = self.records["actions"]["code"]
+        counts = {}
+        for code, name in ACTION_NAMES.items():
+            c = int(np.count_nonzero(codes == code))
+            if c:
+                counts[name] = c
+        return counts
+
+    def release(self):
+        self.records = None
+
+
+def make_replay_controller(reader, **settings):
+    """GestureController fed from a trace: no camera, no MediaPipe, actions recorded"""
+    from app import GestureController
+    from input_backend import RecordingBackend
+
+    controller = GestureController(source=reader, backend=RecordingBackend(), display=False,
+                                   detector=LandmarkFeed(reader.max_hands), async_input=False)
+    for name, value in settings.items():
+        if not hasattr(controller, name):
+            raise AttributeError(f"GestureController has no setting '{name}'")
+        setattr(controller, name, value)
+    return controller
+
+
+def replay_trace(reader, controller, on_frame=None):
+    """Feed every trace record through the gesture and cursor logic as fast as possible
+
+    `reader` is anything with a `records` array of RECORD_DTYPE; `on_frame(i, timestamp, fired)`
+    is called after each record with the name of the action fired on it, if any.
+    """
+    feed = controller.detector
+    records = reader.records
+    for i in range(len(records)):
+        rec = records[i]
+        n = int(rec["num_hands"])
+        timestamp = float(rec["timestamp"])
+        frame_size = (int(rec["frame_width"]), int(rec["frame_height"]))
+        feed.set_landmarks(rec["landmarks"][:n], frame_size, rec["handedness"][:n], rec["scores"][:n])
+        controller.frame_timestamp = timestamp
+        fired = None
+        if n:
+            fired = controller.execute_hands(None, feed.fingers_up_all(), now=timestamp, frame_size=frame_size)
+        else:
+            controller.release_hands(timestamp)
+        if on_frame is not None:
+            on_frame(i, timestamp, fired)
+    return controller.backend
+
+
+def parse_setting(text):
+    name, _, value = text.partition("=")
+    return name, float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or replay landmark traces")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="summarize a trace")
+    info.add_argument("trace")
+    replay = sub.add_parser("replay", help="re-run the gesture logic over a trace")
+    replay.add_argument("trace")
+    replay.add_argument("--set", action="append", default=[], type=parse_setting, metavar="NAME=VALUE",
+                        help="override a GestureController setting, e.g. click_threshold=40")
+    args = parser.parse_args(argv)
+
+    reader = TraceReader(args.trace)
+    if not len(reader):
+        print("Empty trace")
+        return
+    duration = float(reader.timestamps[-1] - reader.timestamps[0])
+    with_hands = int(np.count_nonzero(reader.num_hands))
+    print(f"{len(reader)} frames over {duration:.1f}s, {with_hands} with hands")
+    recorded = reader.action_counts()
+    print("Recorded actions: " + (", ".join(f"{k}={v}" for k, v in sorted(recorded.items())) or "none"))
+
+    if args.command == "replay":
+        controller = make_replay_controller(reader, **dict(args.set))
+        start = time.perf_counter()
+        backend = replay_trace(reader, controller)
+        elapsed = time.perf_counter() - start
+        replayed = backend.counts()
+        print("Replayed actions: " + (", ".join(f"{k}={v}" for k, v in sorted(replayed.items())) or "none"))
+        print(f"Replay took {elapsed:.3f}s ({duration / elapsed if elapsed else 0:.0f}x realtime)")
+
+
+if __name__ == "__main__":
+    main()
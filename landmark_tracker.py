@@ -0,0 +1,62 @@
+# landmark_tracker.py
+import cv2
+import numpy as np
+
+
+class OpticalFlowTracker:
+    """Carries hand landmarks from frame to frame with pyramidal Lucas-Kanade optical flow"""
+
+    def __init__(self, win_size=(21, 21), max_level=3, max_error=20.0, min_tracked=0.9,
+                 max_scale_change=0.25):
+        self.lk_params = dict(
+            winSize=win_size,
+            maxLevel=max_level,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+        )
+        self.max_error = max_error  # Per-point LK error above which a point counts as lost
+        self.min_tracked = min_tracked  # Fraction of points that must survive
+        self.max_scale_change = max_scale_change  # Hand size change vs the anchor that forces re-anchoring
+        self.prev_gray = None
+        self.points = None  # (hands * 21, 1, 2) float32
+        self.anchor_scale = None
+
+    def anchor(self, gray, landmarks_px):
+        """Restart tracking from fresh inference results, (hands, 21, 2+) in pixels"""
+        n = len(landmarks_px)
+        if self.prev_gray is None or self.prev_gray.shape != gray.shape:
+            self.prev_gray = np.empty_like(gray)
+        self.prev_gray[:] = gray
+        self.points = np.ascontiguousarray(landmarks_px[:, :, :2].reshape(n * 21, 1, 2), dtype=np.float32)
+        self.anchor_scale = self._scale(self.points, n)
+
+    def reset(self):
+        self.points = None
+
+    @staticmethod
+    def _scale(points, n):
+        pts = points.reshape(n, 21, 2)
+        return np.ptp(pts, axis=1).max(axis=1)
+
+    def track(self, gray):
+        """Propagate the anchored points into `gray`; (hands, 21, 2) pixels, or None when lost"""
+        if self.points is None:
+            return None
+        new_points, status, error = cv2.calcOpticalFlowPyrLK(
+            self.prev_gray, gray, self.points, None, **self.lk_params)
+        if new_points is None:
+            return None
+        ok = (status[:, 0] == 1) & (error[:, 0] < self.max_error)
+        if ok.mean() < self.min_tracked:
+            return None
+
+        # Lost points stay where they were; the next inference re-anchors them
+        new_points[~ok] = self.points[~ok]
+        n = len(new_points) // 21
+        scale = self._scale(new_points, n)
+        if np.any(np.abs(scale - self.anchor_scale) > self.max_scale_change * self.anchor_scale):
+            # Hand shape collapsed or blew up: the points have drifted off the hand
+            return None
+
+        self.points = new_points
+        self.prev_gray[:] = gray
+        return new_points.reshape(n, 21, 2)
@@ -0,0 +1,222 @@
+# process_detector.py
+import multiprocessing as mp_proc
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from frame_capture import SharedFrameRing
+from hand_detector import LandmarkSet, NUM_LANDMARKS
+
+
+def result_dtype(max_hands):
+    return np.dtype([
+        ("seq", "<i8"),  # -1 while the slot is being written
+        ("num_hands", "u1"),
+        ("handedness", "i1", (max_hands,)),
+        ("scores", "<f4", (max_hands,)),
+        ("landmarks", "<f4", (max_hands, NUM_LANDMARKS, 3)),  # normalized x, y, z
+        ("infer_ms", "<f4"),
+    ])
+
+
+class SharedResultRing:
+    """Landmark results in shared memory, one slot per in-flight frame"""
+
+    def __init__(self, slots, max_hands, name=None, create=True):
+        self.slots = slots
+        self.dtype = result_dtype(max_hands)
+        if create:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * self.dtype.itemsize)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.owner = create
+        self.records = np.ndarray((slots,), dtype=self.dtype, buffer=self.shm.buf)
+        if create:
+            self.records["seq"] = -1
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, seq, detector, infer_ms):
+        rec = self.records[seq % self.slots]
+        rec["seq"] = -1
+        n = detector.num_hands
+        rec["num_hands"] = n
+        rec["landmarks"][:n] = detector.landmarks[:n]
+        rec["handedness"][:n] = detector.handedness[:n]
+        rec["scores"][:n] = detector.scores[:n]
+        rec["infer_ms"] = infer_ms
+        rec["seq"] = seq
+
+    def ready(self, seq):
+        return self.records["seq"][seq % self.slots] == seq
+
+    def record(self, seq):
+        return self.records[seq % self.slots]
+
+    def close(self):
+        del self.records
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _detection_worker(frame_ring_name, result_ring_name, shape, slots, max_hands, detector_args,
+                      tasks, ready):
+    # MediaPipe is created here, so every worker has its own graph and its own GIL
+    from hand_detector import HandDetector
+
+    frames = SharedFrameRing(shape, slots=slots, name=frame_ring_name, create=False)
+    results = SharedResultRing(slots, max_hands, name=result_ring_name, create=False)
+    detector = HandDetector(max_hands=max_hands, **detector_args)
+    detector.warm_up(shape)
+    ready.set()
+    try:
+        while True:
+            seq = tasks.get()
+            if seq is None:
+                break
+            start = time.perf_counter()
+            # The controller doesn't reuse a slot before its result is collected, so the
+            # frame can be read in place
+            detector.find_hands(frames.frames[seq % slots], draw=False)
+            results.write(seq, detector, (time.perf_counter() - start) * 1000)
+    finally:
+        results.close()
+        frames.close()
+
+
+class ProcessDetector(LandmarkSet):
+    """Hand detection spread over worker processes, fed through shared memory
+
+    Drop-in for HandDetector in the controller loop; the workers start on warm_up() or on the
+    first frame, and restart if the camera delivers another size. Each find_hands() copies the frame into
+    a shared ring and hands its sequence number to the next worker. Once `depth` frames are
+    in flight, the oldest result is loaded, so the landmarks trail the newest frame by
+    `result_lag` seconds. Results always come back in frame order, and only sequence numbers
+    are pickled.
+    """
+
+    def __init__(self, workers=2, max_hands=1, depth=None, mirror=False, **detector_args):
+        super().__init__(max_hands)
+        self.frame_shape = None
+        self.workers = workers
+        self.depth = depth if depth is not None else workers  # Frames in flight before a result is used
+        self.slots = self.depth + 1
+        self.mirror = mirror
+        detector_args["mirror"] = mirror
+        self.detector_args = detector_args
+        self.frames = self.results = None
+        # Spawned, not forked: MediaPipe threads don't survive a fork and Windows can't fork
+        self.ctx = mp_proc.get_context("spawn")
+        self.worker = _detection_worker  # Process target, must be importable by the workers
+        self.tasks = []
+        self.processes = []
+        self.next_seq = 0  # Next frame to submit
+        self.result_seq = 0  # Next result to collect
+        self.submit_times = deque()
+        self.result_lag = 0.0
+
+        # Counters, named like HandDetector's
+        self.inference_frames = 0
+        self.tracked_frames = 0
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.infer_ms_total = 0.0
+
+    def start(self, frame_shape, timeout=60.0):
+        """Create the rings for `frame_shape` frames, launch the workers and wait until each
+        has loaded its model"""
+        self.frame_shape = tuple(frame_shape)
+        self.frames = SharedFrameRing(self.frame_shape, slots=self.slots)
+        self.results = SharedResultRing(self.slots, self.max_hands)
+        for _ in range(self.workers):
+            tasks = self.ctx.SimpleQueue()
+            ready = self.ctx.Event()
+            process = self.ctx.Process(
+                target=self.worker,
+                args=(self.frames.name, self.results.name, self.frame_shape, self.slots,
+                      self.max_hands, self.detector_args, tasks, ready),
+                name="detector", daemon=True)
+            process.start()
+            self.tasks.append(tasks)
+            self.processes.append((process, ready))
+        for process, ready in self.processes:
+            if not ready.wait(timeout):
+                raise RuntimeError("Detection worker did not start")
+        return self
+
+    def warm_up(self, shape):
+        """Start the workers ahead of the first frame; they warm their models up before
+        reporting ready"""
+        if self.frames is None:
+            self.start(shape)
+
+    def in_flight(self):
+        return self.next_seq - self.result_seq
+
+    def submit(self, img):
+        seq = self.next_seq
+        self.frames.write(seq, img, time.time())
+        self.submit_times.append(time.time())
+        # Round-robin keeps each worker's MediaPipe tracking on a steady stride of frames
+        self.tasks[seq % self.workers].put(seq)
+        self.next_seq += 1
+        return seq
+
+    def collect(self, timeout=5.0, poll_interval=0.0005):
+        """Load the oldest outstanding result into the landmark arrays; False on timeout"""
+        seq = self.result_seq
+        deadline = time.time() + timeout
+        while not self.results.ready(seq):
+            if time.time() > deadline:
+                return False
+            time.sleep(poll_interval)
+        rec = self.results.record(seq)
+        n = min(int(rec["num_hands"]), self.max_hands)
+        self.set_landmarks(rec["landmarks"][:n], self.frame_shape[1::-1],
+                           rec["handedness"][:n], rec["scores"][:n])
+        self.infer_ms_total += float(rec["infer_ms"])
+        self.inference_frames += 1
+        submitted = self.submit_times.popleft()
+        self.result_lag = (self.submit_times[-1] if self.submit_times else submitted) - submitted
+        self.result_seq += 1
+        return True
+
+    def find_hands(self, img, draw=True):
+        if self.frame_shape != img.shape:
+            # First frame, or the camera delivers another size than the workers were started for
+            self.close()
+            self.start(img.shape)
+        self.submit(img)
+        if self.in_flight() >= self.depth and not self.collect():
+            raise RuntimeError("Detection worker stopped responding")
+        if self.num_hands and draw:
+            self.draw_hands(img)
+        return img
+
+    def flush(self):
+        """Collect every outstanding result; yields once per frame, in order"""
+        while self.in_flight():
+            if not self.collect():
+                return
+            yield self.result_seq - 1
+
+    def close(self):
+        if self.frames is None:
+            return
+        for tasks in self.tasks:
+            tasks.put(None)
+        for process, _ in self.processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self.results.close()
+        self.frames.close()
+        self.frames = self.results = self.frame_shape = None
+        self.tasks, self.processes = [], []
+        self.next_seq = self.result_seq = 0
+        self.submit_times.clear()
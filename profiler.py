@@ -0,0 +1,158 @@
+# profiler.py
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+
+class RollingHistogram:
+    """Keeps the last `window` samples of one stage in a fixed ring buffer"""
+
+    def __init__(self, window=512):
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.index = 0
+        self.count = 0  # Total samples ever recorded
+
+    def add(self, value):
+        self.samples[self.index] = value
+        self.index = (self.index + 1) % len(self.samples)
+        self.count += 1
+
+    def stats(self):
+        filled = self.samples[:min(self.count, len(self.samples))] * 1000
+        if not len(filled):
+            return None
+        p50, p95, p99 = np.percentile(filled, [50, 95, 99])
+        return {
+            "count": self.count,
+            "mean_ms": float(filled.mean()),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(filled.max()),
+        }
+
+
+class _Span:
+    """Reusable timing context for one stage"""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.add(time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    """Does nothing, returned by every span() call while profiling is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+    """Per-stage timing spans with rolling percentiles and periodic export"""
+
+    def __init__(self, enabled=True, window=512, jsonl_path=None, prom_path=None,
+                 export_interval=5.0):
+        self.enabled = enabled
+        self.window = window
+        self.histograms = {}
+        self.spans = {}
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.export_interval = export_interval
+        self.last_export = time.time()
+
+    def span(self, name):
+        if not self.enabled:
+            return NULL_SPAN
+        span = self.spans.get(name)
+        if span is None:
+            span = self.spans[name] = _Span(self._histogram(name))
+        return span
+
+    def record(self, name, seconds):
+        if self.enabled:
+            self._histogram(name).add(seconds)
+
+    def _histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = RollingHistogram(self.window)
+        return histogram
+
+    def snapshot(self):
+        stats = {}
+        for name, histogram in list(self.histograms.items()):
+            s = histogram.stats()
+            if s is not None:
+                stats[name] = s
+        return stats
+
+    def maybe_export(self):
+        """Write the export files if the export interval has passed"""
+        if not self.enabled or not (self.jsonl_path or self.prom_path):
+            return
+        now = time.time()
+        if now - self.last_export < self.export_interval:
+            return
+        self.last_export = now
+        self.export(now)
+
+    def export(self, now=None):
+        now = now if now is not None else time.time()
+        stats = self.snapshot()
+        if self.jsonl_path:
+            with open(self.jsonl_path, "a") as f:
+                f.write(json.dumps({"timestamp": now, "stages": stats}) + "\n")
+        if self.prom_path:
+            self._write_prometheus(stats)
+
+    def _write_prometheus(self, stats):
+        lines = [
+            "# HELP gesture_stage_latency_ms Rolling per-stage latency of the gesture loop",
+            "# TYPE gesture_stage_latency_ms summary",
+        ]
+        for name, s in stats.items():
+            for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms"), ("1", "max_ms")):
+                lines.append(f'gesture_stage_latency_ms{{stage="{name}",quantile="{quantile}"}} {s[key]:.4f}')
+            lines.append(f'gesture_stage_latency_ms_count{{stage="{name}"}} {s["count"]}')
+        # Replace atomically so scrapers never see a half-written file
+        tmp_path = self.prom_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.prom_path)
+
+    def draw(self, img, x=10, y=None, budget_ms=33.0):
+        """Draw a p50/p95 latency breakdown with bars scaled to the frame budget"""
+        stats = self.snapshot()
+        if not stats:
+            return
+        h = img.shape[0]
+        y = y if y is not None else h - 20 * len(stats) - 10
+        for name, s in stats.items():
+            bar = int(150 * min(s["p95_ms"] / budget_ms, 1.0))
+            color = (0, 255, 0) if s["p95_ms"] < budget_ms / 2 else (0, 165, 255)
+            cv2.rectangle(img, (x + 220, y - 10), (x + 220 + bar, y), color, cv2.FILLED)
+            cv2.putText(img, f"{name:<10} {s['p50_ms']:5.1f} / {s['p95_ms']:5.1f} ms", (x, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
+            y += 20
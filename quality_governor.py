@@ -0,0 +1,113 @@
+# quality_governor.py
+import numpy as np
+
+# Cheapest first; the governor moves one level at a time and starts at the top, which is
+# the detector's default configuration
+QUALITY_LEVELS = [
+    {"name": "low", "model_complexity": 0, "input_size": 320, "inference_interval": 3},
+    {"name": "medium", "model_complexity": 0, "input_size": 480, "inference_interval": 2},
+    {"name": "high", "model_complexity": 0, "input_size": None, "inference_interval": 1},
+    {"name": "full", "model_complexity": 1, "input_size": None, "inference_interval": 1},
+]
+
+
+class QualityGovernor:
+    """Steps detection quality down when capture-to-injection latency runs over a budget,
+    and back up when there is room again
+
+    Latency is judged once per window by its 90th percentile. One window over the target
+    steps down; stepping up takes `up_windows` windows in a row under `headroom` x target.
+    A step up that has to be undone within `retry_after` seconds locks that level out,
+    twice as long on every repeat, so an unsustainable level isn't retried in a loop.
+    """
+
+    def __init__(self, detector, target_ms=40.0, levels=None, window=1.0, min_samples=10,
+                 headroom=0.6, up_windows=3, settle=1.0, retry_after=10.0, verbose=True):
+        self.detector = detector
+        self.target = target_ms / 1000
+        self.levels = levels if levels is not None else QUALITY_LEVELS
+        self.window = window  # Seconds of samples per decision
+        self.min_samples = min_samples
+        self.headroom = headroom
+        self.up_windows = up_windows
+        self.settle = settle  # Samples ignored after a switch, which can stall a frame or two
+        self.retry_after = retry_after
+        self.verbose = verbose
+
+        self.level = len(self.levels) - 1
+        self.samples = []
+        self.window_start = None
+        self.settle_until = 0.0
+        self.good_windows = 0
+        self.raised_at = None  # Time of the last step up, to catch one that can't be held
+        self.locked_until = [0.0] * len(self.levels)
+        self.lockout = [retry_after] * len(self.levels)
+        self.level_since = None
+        self.level_time = [0.0] * len(self.levels)
+        self.decisions = []
+        self._apply(self.level)
+
+    @property
+    def name(self):
+        return self.levels[self.level]["name"]
+
+    def _apply(self, level):
+        settings = {k: v for k, v in self.levels[level].items() if k != "name"}
+        self.detector.set_quality(**settings)
+        self.level = level
+
+    def update(self, latency, now):
+        """Feed one capture-to-injection latency sample (seconds) taken at `now`"""
+        if self.level_since is None:
+            self.level_since = now
+        if now < self.settle_until:
+            return
+        if self.window_start is None:
+            self.window_start = now
+        self.samples.append(latency)
+        if now - self.window_start < self.window or len(self.samples) < self.min_samples:
+            return
+        p90 = float(np.percentile(self.samples, 90))
+        self.samples.clear()
+        self.window_start = now
+
+        if p90 > self.target:
+            self.good_windows = 0
+            if self.level == 0:
+                return
+            if self.raised_at is not None and now - self.raised_at < self.retry_after:
+                self.locked_until[self.level] = now + self.lockout[self.level]
+                self.lockout[self.level] *= 2
+            self._switch(self.level - 1, now, p90)
+        elif p90 < self.target * self.headroom and self.level + 1 < len(self.levels):
+            self.good_windows += 1
+            if self.good_windows >= self.up_windows and now >= self.locked_until[self.level + 1]:
+                self._switch(self.level + 1, now, p90)
+        else:
+            self.good_windows = 0
+
+    def _switch(self, level, now, p90):
+        previous = self.level
+        self.level_time[previous] += now - self.level_since
+        self.level_since = now
+        self._apply(level)
+        self.good_windows = 0
+        self.raised_at = now if level > previous else None
+        self.settle_until = now + self.settle
+        self.window_start = None
+        self.decisions.append({"time": now, "from": self.levels[previous]["name"], "to": self.name,
+                               "p90_ms": p90 * 1000})
+        if self.verbose:
+            reason = "over" if level < previous else f"under {self.headroom:.0%} of"
+            print(f"Quality {self.levels[previous]['name']} -> {self.name}: p90 latency "
+                  f"{p90 * 1000:.1f} ms is {reason} the {self.target * 1000:.0f} ms target")
+
+    def stats(self, now):
+        level_time = list(self.level_time)
+        if self.level_since is not None:
+            level_time[self.level] += now - self.level_since
+        return {
+            "level": self.name,
+            "changes": len(self.decisions),
+            "level_s": {lvl["name"]: t for lvl, t in zip(self.levels, level_time)},
+        }
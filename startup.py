@@ -0,0 +1,101 @@
+# startup.py
+import os
+import threading
+import time
+
+
+def process_origin():
+    """perf_counter() value at the moment this process started, so interpreter start-up and
+    imports count towards the report; the current time where /proc isn't available"""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")  # Field 22, seconds after boot
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.perf_counter()
+    return time.perf_counter() - max(uptime - started, 0.0)
+
+
+class StartupReport:
+    """Wall-clock phases and milestones of a cold start, relative to `origin` (perf_counter)"""
+
+    def __init__(self, origin=None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.phases = []  # (name, thread, start_s, end_s)
+        self.milestones = {}  # name -> seconds since origin
+        self.lock = threading.Lock()
+        self.printed = False
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def add_phase(self, name, start, end):
+        with self.lock:
+            self.phases.append((name, threading.current_thread().name,
+                                start - self.origin, end - self.origin))
+
+    def mark(self, name):
+        """Record a milestone the first time it is reached"""
+        with self.lock:
+            if name not in self.milestones:
+                self.milestones[name] = time.perf_counter() - self.origin
+
+    def to_dict(self):
+        return {
+            "phases": [{"name": n, "thread": t, "start_ms": s * 1000, "ms": (e - s) * 1000}
+                       for n, t, s, e in sorted(self.phases, key=lambda p: p[2])],
+            "milestones_ms": {k: v * 1000 for k, v in self.milestones.items()},
+        }
+
+    def print(self):
+        self.printed = True
+        report = self.to_dict()
+        print("Startup:")
+        for p in report["phases"]:
+            print(f"  {p['name']:<16} {p['start_ms']:7.0f} ms +{p['ms']:6.0f} ms  ({p['thread']})")
+        for name, ms in sorted(report["milestones_ms"].items(), key=lambda m: m[1]):
+            print(f"  {name:<16} {ms:7.0f} ms")
+
+
+class _Phase:
+    __slots__ = ("report", "name", "start")
+
+    def __init__(self, report, name):
+        self.report = report
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.report.add_phase(self.name, self.start, time.perf_counter())
+        return False
+
+
+class BackgroundTask:
+    """Runs `fn` on a daemon thread as one startup phase; result() joins and re-raises"""
+
+    def __init__(self, report, name, fn):
+        self.report = report
+        self.name = name
+        self.fn = fn
+        self.value = None
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            with self.report.phase(self.name):
+                self.value = self.fn()
+        except BaseException as e:  # Surfaced in result()
+            self.error = e
+
+    def result(self):
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.value
@@ -0,0 +1,11 @@
+import pytest
+
+import benchmark
+
+
+def test_missing_model_is_a_usage_error(tmp_path, capsys):
+    model = tmp_path / "missing.task"
+    with pytest.raises(SystemExit) as exit_info:
+        benchmark.main(["--compare-backends", "--frames", "3", "--model", str(model)])
+    assert exit_info.value.code == 2
+    assert f"model not found at {model}" in capsys.readouterr().err
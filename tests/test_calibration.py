@@ -0,0 +1,82 @@
+import cv2
+import numpy as np
+import pytest
+
+from calibration import Calibration, DesktopLayout
+
+
+def grid_targets(grid=3, margin=0.1):
+    steps = np.linspace(margin, 1 - margin, grid)
+    return np.array([(fx, fy) for fy in steps for fx in steps])
+
+
+def test_homography_fit_recovers_perspective():
+    truth = np.array([[1.3, 0.1, -0.2], [0.05, 1.4, -0.25], [0.1, 0.05, 1.0]])
+    desktop = grid_targets()
+    camera = cv2.perspectiveTransform(desktop[None], np.linalg.inv(truth))[0]
+    calibration = Calibration.fit(camera, desktop, kind="homography")
+    mapped = cv2.perspectiveTransform(camera[None], calibration.homography)[0]
+    np.testing.assert_allclose(mapped, desktop, atol=1e-6)
+
+
+def test_homography_fit_ignores_one_sloppy_target():
+    desktop = grid_targets()
+    camera = 0.2 + desktop * 0.6
+    camera[4] += 0.15
+    calibration = Calibration.fit(camera, desktop, kind="homography")
+    mapped = cv2.perspectiveTransform(camera[None], calibration.homography)[0]
+    keep = np.arange(len(desktop)) != 4
+    np.testing.assert_allclose(mapped[keep], desktop[keep], atol=1e-6)
+
+
+def test_homography_needs_four_targets():
+    with pytest.raises(ValueError):
+        Calibration.fit(np.zeros((3, 2)), np.zeros((3, 2)), kind="homography")
+
+
+def test_piecewise_passes_through_targets_and_pins_edges():
+    desktop = grid_targets()
+    # Camera x compressed on the left, stretched on the right; y linear
+    camera = np.stack([0.3 + 0.4 * desktop[:, 0] ** 2, 0.25 + 0.5 * desktop[:, 1]], axis=1)
+    calibration = Calibration.fit(camera, desktop, kind="piecewise")
+    for axis in (0, 1):
+        np.testing.assert_allclose(calibration._curve(axis, camera[:, axis]), desktop[:, axis], atol=1e-9)
+        # Beyond the extended outer segments the cursor stays on the desktop edge
+        np.testing.assert_allclose(calibration._curve(axis, [0.0, 1.0]), [0.0, 1.0])
+    curve = calibration._curve(0, np.linspace(0, 1, 101))
+    assert np.all(np.diff(curve) >= 0)
+
+
+def test_piecewise_rejects_targets_out_of_order():
+    desktop = grid_targets()
+    camera = desktop.copy()
+    camera[:, 0] = 1 - camera[:, 0]
+    with pytest.raises(ValueError, match="along x"):
+        Calibration.fit(camera, desktop, kind="piecewise")
+
+
+def test_compiled_maps_agree_with_the_fit():
+    layout = DesktopLayout(lambda: [(0, 0, 1920, 1080), (1920, 0, 1280, 1024)])
+    desktop = grid_targets()
+    camera = 0.2 + desktop * 0.6
+    frame = np.array([640, 480])
+    expected = layout.origin + desktop * layout.size
+    for kind in ("homography", "piecewise"):
+        cursor_map = Calibration.fit(camera, desktop, kind=kind).compile(tuple(frame), layout)
+        np.testing.assert_allclose(cursor_map(camera * frame), expected, atol=2.0)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    desktop = grid_targets()
+    camera = 0.2 + desktop * 0.6
+    path = tmp_path / "calibration.json"
+    for kind in ("homography", "piecewise"):
+        calibration = Calibration.fit(camera, desktop, kind=kind, acceleration=0.3, monitors=[(0, 0, 800, 600)])
+        calibration.save(path)
+        loaded = Calibration.load(path)
+        assert loaded.kind == kind
+        assert loaded.monitors == [(0, 0, 800, 600)]
+        layout = DesktopLayout(lambda: [(0, 0, 800, 600)])
+        points = np.array([[100.0, 80.0], [320.0, 240.0], [600.0, 450.0]])
+        np.testing.assert_allclose(loaded.compile((640, 480), layout)(points),
+                                   calibration.compile((640, 480), layout)(points))
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from cursor_filter import KalmanFilter, OneEuroFilter
+
+
+@pytest.mark.parametrize("make", [OneEuroFilter, KalmanFilter])
+def test_repeated_timestamp_keeps_state(make):
+    f = make()
+    for i in range(10):
+        f([[i * 10.0, 0.0]], i / 30)
+    value, velocity = f.value.copy(), f.velocity.copy()
+    assert velocity[0, 0] > 0
+
+    # A second sample on the same tick and an older one leave the filter untouched
+    out = f([[500.0, 0.0]], 9 / 30)
+    np.testing.assert_allclose(out, value)
+    f([[500.0, 0.0]], 8 / 30)
+    np.testing.assert_allclose(f.value, value)
+    np.testing.assert_allclose(f.velocity, velocity)
+
+    # The next real sample continues from the kept state instead of restarting
+    out = f([[100.0, 0.0]], 10 / 30)
+    assert value[0, 0] < out[0, 0] <= 100.0
+    assert f.velocity[0, 0] > 0
+
+
+@pytest.mark.parametrize("make", [OneEuroFilter, KalmanFilter])
+def test_reset_starts_over(make):
+    f = make()
+    f([[1.0, 2.0]], 0.0)
+    f([[5.0, 6.0]], 0.1)
+    f.reset()
+    np.testing.assert_allclose(f([[7.0, 8.0]], 0.0), [[7.0, 8.0]])
+    np.testing.assert_allclose(f.velocity, 0.0)
@@ -0,0 +1,149 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from frame_capture import ProcessCapture, SharedFrameRing, ThreadedCapture
+
+
+class FakeCamera:
+    """cv2.VideoCapture stand-in: `delays` seconds before each frame, then fails after `frames`"""
+
+    def __init__(self, delays=(), frames=None, fail_with=None):
+        self.delays = list(delays)
+        self.frames = frames
+        self.fail_with = fail_with
+        self.count = 0
+        self.released = threading.Event()
+
+    def read(self, buf=None):
+        if self.delays:
+            time.sleep(self.delays.pop(0))
+        if self.frames is not None and self.count >= self.frames:
+            if self.fail_with is not None:
+                raise self.fail_with
+            return False, None
+        self.count += 1
+        frame = buf if buf is not None else np.empty((48, 64, 3), dtype=np.uint8)
+        frame[:] = self.count % 256
+        time.sleep(0.005)
+        return True, frame
+
+    def release(self):
+        self.released.set()
+
+
+def test_a_slow_first_frame_is_waited_for():
+    cap = ThreadedCapture(FakeCamera(delays=[1.3])).start()
+    try:
+        success, frame = cap.read()
+        assert success and frame.shape == (48, 64, 3)
+    finally:
+        cap.release()
+
+
+def test_an_explicit_timeout_still_returns_no_frame():
+    cap = ThreadedCapture(FakeCamera(delays=[0.5])).start()
+    try:
+        assert cap.read(timeout=0.05) == (False, None)
+        assert cap.read()[0]
+    finally:
+        cap.release()
+
+
+def test_a_failing_camera_ends_the_stream():
+    cap = ThreadedCapture(FakeCamera(frames=2)).start()
+    try:
+        assert cap.read()[0]
+        results = [cap.read()[0] for _ in range(3)]
+        assert results[-1] is False
+    finally:
+        cap.release()
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_an_exception_in_the_reader_ends_the_stream_instead_of_hanging():
+    cap = ThreadedCapture(FakeCamera(frames=0, fail_with=OSError("unplugged"))).start()
+    try:
+        assert cap.read() == (False, None)
+    finally:
+        cap.release()
+
+
+class GrabbingCamera(FakeCamera):
+    """Camera at ~100 FPS whose frames carry their number; counts decodes and grabs"""
+
+    def __init__(self):
+        super().__init__()
+        self.decoded = 0
+        self.grabbed = 0
+
+    def grab(self):
+        time.sleep(0.01)
+        self.count += 1
+        self.grabbed += 1
+        return True
+
+    def read(self, buf=None):
+        time.sleep(0.01)
+        self.count += 1
+        self.decoded += 1
+        frame = buf if buf is not None else np.empty((48, 64, 3), dtype=np.uint8)
+        frame[:] = self.count % 256
+        return True, frame
+
+
+def test_throttled_capture_keeps_draining_the_camera_without_decoding():
+    camera = GrabbingCamera()
+    cap = ThreadedCapture(camera).start()
+    try:
+        cap.read()
+        cap.set_read_interval(0.1)
+        for _ in range(3):
+            assert cap.read()[0]
+            # Served promptly after capture, not from a backlog
+            assert cap.last_frame_age < 0.05
+        assert camera.grabbed > 2 * camera.decoded - 2
+        # Waking up: the next frame is decoded right away
+        cap.set_read_interval(0.0)
+        start = time.time()
+        assert cap.read()[0]
+        assert time.time() - start < 0.05
+    finally:
+        cap.release()
+
+
+def test_shared_ring_round_trip_and_double_close():
+    ring = SharedFrameRing((4, 6, 3), slots=2)
+    frame = np.arange(72, dtype=np.uint8).reshape(4, 6, 3)
+    out = np.empty_like(frame)
+    ring.write(5, frame, 1.5)
+    assert ring.read(5, out) == 1.5
+    np.testing.assert_array_equal(out, frame)
+    ring.write(7, frame, 2.0)  # Same slot: frame 5 is gone
+    assert ring.read(5, out) is None
+    ring.close()
+    ring.close()
+
+
+def test_process_capture_serves_frames_from_a_spawned_reader(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for i in range(5):
+        writer.write(np.full((48, 64, 3), 40 * i, dtype=np.uint8))
+    writer.release()
+
+    cap = ProcessCapture(path, 64, 48).start()
+    try:
+        assert cap.process._start_method == "spawn"
+        success, frame = cap.read(timeout=20.0)
+        assert success and frame.shape == (48, 64, 3)
+        # Once the clip runs out the reader stops and read() reports it
+        while success:
+            success, _ = cap.read(timeout=20.0)
+        assert cap.stats()["delivered"] >= 1
+    finally:
+        cap.release()
+        cap.release()
@@ -0,0 +1,100 @@
+import numpy as np
+
+from gesture_engine import CURSOR_MASK, FIST_MASK, GestureEngine, Recognizer
+from gesture_eval import FPS, FRAME_SIZE, synthetic_hand, synthetic_sequence
+from landmark_trace import RECORD_DTYPE, make_replay_controller, replay_trace
+
+
+class Probe(Recognizer):
+    __slots__ = ("masks", "updates", "resets")
+
+    def __init__(self, *masks):
+        self.masks = masks
+        self.updates = 0
+        self.resets = 0
+
+    def update(self, ctx):
+        self.updates += 1
+        ctx.fired = "PROBE"
+
+    def reset(self):
+        self.resets += 1
+
+
+class Ctx:
+    consumed = False
+    fired = None
+
+
+def test_dispatches_only_to_the_recognizers_of_the_mask():
+    engine = GestureEngine()
+    cursor, fist = engine.register(Probe(CURSOR_MASK)), engine.register(Probe(FIST_MASK))
+    engine.name_pose(CURSOR_MASK, "CURSOR")
+    ctx = Ctx()
+    assert engine.process(CURSOR_MASK, ctx) == "CURSOR"
+    assert (cursor.updates, fist.updates) == (1, 0)
+    assert ctx.fired == "PROBE"
+    assert engine.process(0b10101, ctx) is None
+    assert ctx.fired is None
+
+
+def test_register_before_puts_the_recognizer_first():
+    engine = GestureEngine()
+    late = engine.register(Probe(CURSOR_MASK))
+    early = engine.register(Probe(CURSOR_MASK), before=late)
+    assert engine.table[CURSOR_MASK] == [early, late]
+
+
+def test_leaving_a_pose_or_resetting_resets_its_recognizers():
+    engine = GestureEngine()
+    cursor, fist = engine.register(Probe(CURSOR_MASK)), engine.register(Probe(FIST_MASK))
+    ctx = Ctx()
+    engine.process(CURSOR_MASK, ctx)
+    engine.process(CURSOR_MASK, ctx)
+    assert cursor.resets == 0
+    engine.process(FIST_MASK, ctx)
+    assert cursor.resets == 1
+    engine.reset()
+    assert fist.resets == 1
+    assert engine.last_mask is None
+
+
+def _records(frames):
+    records = np.zeros(len(frames), dtype=RECORD_DTYPE)
+    records["timestamp"] = np.arange(len(frames)) / FPS
+    records["frame_width"], records["frame_height"] = FRAME_SIZE
+    for i, lm in enumerate(frames):
+        if lm is not None:
+            records[i]["num_hands"] = 1
+            records[i]["landmarks"][0] = lm
+            records[i]["handedness"][0] = 1
+            records[i]["scores"][0] = 1.0
+    return records
+
+
+class _Sequence:
+    max_hands = 2
+
+    def __init__(self, records):
+        self.records = records
+
+
+def _hotkeys(sequence):
+    controller = make_replay_controller(sequence)
+    replay_trace(sequence, controller)
+    return [args for _, action, args in controller.backend.actions if action == "hotkey"]
+
+
+def test_returning_hand_is_not_measured_against_an_old_swipe_baseline():
+    # The upward RECENT_TABS swipe follows a SWITCH_APP swipe of the same pose, with the
+    # hand out of view in between; it must reopen the tab, never close it
+    hotkeys = _hotkeys(synthetic_sequence(0))
+    assert ("ctrl", "shift", "t") in hotkeys
+    assert ("ctrl", "w") not in hotkeys
+
+
+def test_hold_starts_over_when_the_hand_comes_back():
+    # Two 0.67 s fists with the hand away in between: neither is long enough on its own
+    fist = [synthetic_hand([0, 0, 0, 0, 0], 0.5, 0.5) for _ in range(20)]
+    sequence = _Sequence(_records(fist + [None] * 10 + fist))
+    assert ("win", "d") not in _hotkeys(sequence)
@@ -0,0 +1,40 @@
+import copy
+
+import app
+from gesture_eval import action_spec, evaluate_sequence, summarize, synthetic_sequence
+
+
+def test_action_spec_keeps_keys_and_directions():
+    assert action_spec("hotkey", ("ctrl", "shift", "t")) == "hotkey:ctrl+shift+t"
+    assert action_spec("scroll", (3,)) == "scroll:up"
+    assert action_spec("scroll", (-3,)) == "scroll:down"
+    assert action_spec("hscroll", (-2,)) == "hscroll:left"
+    assert action_spec("click", ()) == "click"
+    assert action_spec("move_to", (10, 20)) is None
+
+
+def test_synthetic_sequence_is_recognized_exactly():
+    result = evaluate_sequence(synthetic_sequence(0))
+    assert None not in result["detected"]
+    assert result["false_triggers"] == {}
+    assert result["wrong_actions"] == {}
+
+
+def test_a_gesture_with_the_wrong_action_is_not_a_hit():
+    sequence = synthetic_sequence(0)
+    sequence.labels = copy.deepcopy(sequence.labels)
+    label = next(label for label in sequence.labels if label["gesture"] == "RECENT_TABS")
+    label["action"] = "hotkey:ctrl+w"
+    summary = summarize([evaluate_sequence(sequence)])["gestures"]["RECENT_TABS"]
+    assert summary["detected"] == 0
+    assert summary["wrong_actions"] > 0
+    assert summary["precision"] == 0
+
+
+def test_stale_state_after_the_hand_returns_is_caught(monkeypatch):
+    # Without the reset on hand loss, the returning hand swipes the wrong way and the
+    # interrupted fist completes a hold
+    monkeypatch.setattr(app.GestureController, "release_hands", lambda self, now=None: None)
+    result = evaluate_sequence(synthetic_sequence(0))
+    assert result["wrong_actions"].get("RECENT_TABS")
+    assert result["false_triggers"].get("MINIMIZE")
@@ -0,0 +1,157 @@
+import cv2
+import numpy as np
+import pytest
+
+import detector_backend
+from detector_backend import HandResult
+from gesture_eval import synthetic_hand
+from hand_detector import HandDetector, LandmarkFeed
+
+
+class SpotBackend:
+    """Stands in for MediaPipe: landmark k is the pixel of value 10 * (k + 1), and a hand
+    whose wrist is in the left half is labeled right, as MediaPipe does on a mirrored image"""
+
+    synchronous = True
+
+    def __init__(self, **options):
+        self.calls = []
+
+    def process(self, rgb, timestamp):
+        h, w = rgb.shape[:2]
+        self.calls.append((w, h))
+        landmarks = np.zeros((1, 21, 3), dtype=np.float32)
+        for k in range(21):
+            found = np.argwhere(rgb[:, :, 0] == 10 * (k + 1))
+            if not len(found):
+                return HandResult(landmarks[:0], np.zeros(0, np.int8), np.zeros(0, np.float32), timestamp)
+            y, x = found[0]
+            # z is in image-width units like MediaPipe's, here 3 px per landmark
+            landmarks[0, k] = ((x + 0.5) / w, (y + 0.5) / h, 3.0 * k / w)
+        handedness = np.array([landmarks[0, 0, 0] < 0.5], dtype=np.int8)
+        return HandResult(landmarks, handedness, np.ones(1, np.float32), timestamp)
+
+    def warm_up(self, rgb):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def spots(monkeypatch):
+    monkeypatch.setitem(detector_backend.BACKENDS, "spots", SpotBackend)
+
+
+def spot_frame(x, y, size=(320, 240)):
+    """Frame with the 21 landmark spots on a 5-wide grid from (x, y), 8 px apart"""
+    w, h = size
+    frame = np.zeros((h, w, 3), dtype=np.uint8)
+    for k in range(21):
+        frame[y + (k // 5) * 8, x + (k % 5) * 8] = 10 * (k + 1)
+    return frame
+
+
+def baseline_find_position(landmarks, w, h):
+    """The list-based find_position the landmark arrays replaced"""
+    return [[id, int(float(x) * w), int(float(y) * h)] for id, (x, y, _) in enumerate(landmarks)]
+
+
+def baseline_fingers_up(lm_list):
+    fingers = [1 if lm_list[4][1] > lm_list[3][1] else 0]
+    for tip_id, pip_id in zip([8, 12, 16, 20], [6, 10, 14, 18]):
+        fingers.append(1 if lm_list[tip_id][2] < lm_list[pip_id][2] else 0)
+    return fingers
+
+
+def sample_hands(count=40, seed=0):
+    """Hands in every finger combination, jittered, at varied places in the frame"""
+    rng = np.random.default_rng(seed)
+    hands = []
+    for i in range(count):
+        fingers = [(i >> k) & 1 for k in range(5)]
+        lm = synthetic_hand(fingers, rng.uniform(0.25, 0.75), rng.uniform(0.3, 0.6))
+        lm[:, :2] += rng.normal(0, 0.004, (21, 2))
+        lm[:, 2] = rng.normal(0, 0.05, 21)
+        hands.append(lm.astype(np.float32))
+    return hands
+
+
+def test_landmark_arrays_match_the_list_based_accessors():
+    feed = LandmarkFeed(2)
+    w, h = 640, 480
+    hands = sample_hands()
+    for a, b in zip(hands[::2], hands[1::2]):
+        feed.set_landmarks(np.stack([a, b]), (w, h), np.array([1, 0]))
+        all_fingers = feed.fingers_up_all()
+        for hand_no, lm in enumerate((a, b)):
+            expected = baseline_find_position(lm, w, h)
+            lm_list = feed.find_position(None, hand_no, draw=False)
+            assert lm_list == expected
+            assert feed.fingers_up(lm_list) == baseline_fingers_up(expected)
+            assert all_fingers[hand_no].tolist() == baseline_fingers_up(expected)
+            assert feed.get_positions(hand_no).tolist() == expected
+    # Past the last hand, find_position is empty like the list version with no hand
+    feed.set_landmarks(hands[:1], (w, h))
+    assert feed.find_position(None, 1, draw=False) == []
+    assert feed.fingers_up_all().shape == (1, 5)
+
+
+def test_close_twice():
+    detector = HandDetector()
+    detector.close()
+    detector.close()
+
+
+@pytest.mark.parametrize("x", [20, 150, 260])
+def test_mirrored_landmarks_match_detection_on_a_flipped_frame(spots, x):
+    raw = spot_frame(x, 60)
+    mirrored = HandDetector(max_hands=1, backend="spots", mirror=True)
+    flipped = HandDetector(max_hands=1, backend="spots")
+    mirrored.find_hands(raw, draw=False)
+    flipped.find_hands(cv2.flip(raw, 1), draw=False)
+
+    assert mirrored.num_hands == flipped.num_hands == 1
+    np.testing.assert_allclose(mirrored.landmarks[0], flipped.landmarks[0], atol=1e-6)
+    assert mirrored.handedness[0] == flipped.handedness[0]
+    assert mirrored.find_position(None, draw=False) == flipped.find_position(None, draw=False)
+    assert mirrored.fingers_up_all().tolist() == flipped.fingers_up_all().tolist()
+
+    # The same as loading the x -> 1 - x landmarks and the swapped label directly
+    raw_result = SpotBackend().process(raw, 0.0)
+    landmarks = raw_result.landmarks.copy()
+    landmarks[:, :, 0] = 1.0 - landmarks[:, :, 0]
+    feed = LandmarkFeed(1)
+    feed.set_landmarks(landmarks, (320, 240), 1 - raw_result.handedness)
+    np.testing.assert_allclose(mirrored.landmarks_px[:1], feed.landmarks_px[:1], atol=1e-4)
+    assert mirrored.handedness[0] == feed.handedness[0]
+
+
+@pytest.mark.parametrize("mirror", [False, True])
+@pytest.mark.parametrize("x, y", [(2, 2), (150, 90), (282, 200)])
+def test_roi_crop_landmarks_map_back_to_the_full_frame(spots, mirror, x, y):
+    frame = spot_frame(x, y)
+    full = HandDetector(max_hands=1, backend="spots", mirror=mirror)
+    full.find_hands(frame, draw=False)
+
+    roi = HandDetector(max_hands=1, backend="spots", mirror=mirror, roi_tracking=True)
+    roi.find_hands(frame, draw=False)
+    x0, y0, x1, y1 = roi.roi
+    assert 0 <= x0 and x1 <= 320 and 0 <= y0 and y1 <= 240
+    roi.find_hands(frame, draw=False)
+    # The second frame ran on the crop, and the crop was smaller than the frame
+    assert (roi.roi_frames, roi.full_frames) == (1, 1)
+    assert roi.roi_hands.calls == [(x1 - x0, y1 - y0)]
+
+    np.testing.assert_allclose(roi.landmarks[0], full.landmarks[0], atol=1e-6)
+    np.testing.assert_allclose(roi.landmarks_px[0], full.landmarks_px[0], atol=1e-3)
+    assert roi.find_position(None, draw=False) == full.find_position(None, draw=False)
+    assert roi.handedness[0] == full.handedness[0]
+
+
+def test_roi_box_is_clamped_at_the_frame_edge(spots):
+    # Spots at the raw left edge are at the right edge once mirrored
+    detector = HandDetector(max_hands=1, backend="spots", mirror=True, roi_tracking=True)
+    detector.find_hands(spot_frame(2, 2), draw=False)
+    x0, y0, x1, y1 = detector.roi
+    assert (x1, y0) == (320, 0)
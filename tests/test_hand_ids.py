@@ -0,0 +1,67 @@
+import numpy as np
+
+from gesture_eval import synthetic_hand
+from hand_ids import HandIdTracker
+from hand_detector import LandmarkFeed
+
+LEFT, RIGHT = 0, 1
+
+
+def hands(*centers):
+    return np.stack([synthetic_hand([0, 1, 0, 0, 0], x, y) for x, y in centers])
+
+
+def test_ids_follow_the_hands_when_the_detector_reorders_them():
+    tracker = HandIdTracker()
+    first = tracker.update(hands((0.3, 0.5), (0.7, 0.5)), np.array([LEFT, RIGHT]), 0.0)
+    swapped = tracker.update(hands((0.71, 0.5), (0.31, 0.5)), np.array([RIGHT, LEFT]), 0.033)
+    assert list(swapped) == [first[1], first[0]]
+
+
+def test_handedness_breaks_a_tie_between_equally_close_tracks():
+    tracker = HandIdTracker(handedness_penalty=0.15)
+    ids = tracker.update(hands((0.4, 0.5), (0.6, 0.5)), np.array([LEFT, RIGHT]), 0.0)
+    # Both hands jump to the middle; the labels decide which is which
+    again = tracker.update(hands((0.5, 0.5), (0.5, 0.5)), np.array([RIGHT, LEFT]), 0.033)
+    assert list(again) == [ids[1], ids[0]]
+
+
+def test_a_far_away_hand_gets_a_new_id():
+    tracker = HandIdTracker(max_distance=0.25)
+    (a,) = tracker.update(hands((0.2, 0.5)), np.array([RIGHT]), 0.0)
+    (b,) = tracker.update(hands((0.8, 0.5)), np.array([RIGHT]), 0.033)
+    assert b != a
+
+
+def test_a_brief_dropout_keeps_the_id_and_a_long_one_drops_it():
+    tracker = HandIdTracker(max_missing=0.5)
+    (a,) = tracker.update(hands((0.5, 0.5)), np.array([RIGHT]), 0.0)
+    tracker.expire(0.3)
+    assert tracker.dropped == []
+    (b,) = tracker.update(hands((0.5, 0.5)), np.array([RIGHT]), 0.4)
+    assert b == a
+    tracker.expire(1.0)
+    assert tracker.dropped == [a]
+    (c,) = tracker.update(hands((0.5, 0.5)), np.array([RIGHT]), 1.1)
+    assert c != a
+
+
+def test_controller_forgets_hands_that_left_the_frame():
+    from app import GestureController
+    from input_backend import RecordingBackend
+    feed = LandmarkFeed(2)
+    controller = GestureController(source=object(), backend=RecordingBackend(), display=False,
+                                   detector=feed, async_input=False)
+    frame_size = (640, 480)
+    feed.set_landmarks(hands((0.5, 0.5)), frame_size, np.array([RIGHT]), np.ones(1))
+    controller.execute_hands(None, now=0.0, frame_size=frame_size)
+    (old,) = controller.hand_engines
+    # One second with nobody in view, then a hand at the same spot
+    for t in np.arange(1, 31) / 30:
+        feed.set_landmarks(np.zeros((0, 21, 3), dtype=np.float32), frame_size)
+        controller.release_hands(t)
+    assert controller.hand_engines == {}
+    feed.set_landmarks(hands((0.5, 0.5)), frame_size, np.array([RIGHT]), np.ones(1))
+    controller.execute_hands(None, now=1.1, frame_size=frame_size)
+    assert old not in controller.hand_engines
+    assert len(controller.hand_engines) == 1
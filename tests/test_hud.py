@@ -0,0 +1,63 @@
+import cv2
+import numpy as np
+
+from hud import HudLayer
+
+
+def draw_box(canvas, label):
+    # Hard-edged: no anti-aliasing, so the layer can be pasted
+    cv2.rectangle(canvas, (10, 10), (40 + 10 * label, 30), (0, 255, 0), cv2.FILLED, cv2.LINE_8)
+
+
+def frame(value=80, shape=(60, 120, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def test_rerenders_only_when_the_key_or_shape_changes():
+    calls = []
+
+    def render(canvas, label):
+        calls.append(label)
+        draw_box(canvas, label)
+
+    layer = HudLayer(render)
+    for _ in range(5):
+        layer.composite(frame(), (1,))
+    assert layer.renders == 1
+    layer.composite(frame(), (2,))
+    layer.composite(frame(), (2,))
+    assert layer.renders == 2
+    layer.composite(frame(shape=(80, 160, 3)), (2,))
+    assert layer.renders == 3
+    layer.invalidate()
+    layer.composite(frame(shape=(80, 160, 3)), (2,))
+    assert layer.renders == 4
+    # Two draws per render (on black and on white), none per pasted frame
+    assert len(calls) == 2 * layer.renders
+
+
+def test_pasted_layer_matches_drawing_directly():
+    layer = HudLayer(draw_box)
+    for label in (1, 3):
+        img, expected = frame(), frame()
+        layer.composite(img, (label,))
+        draw_box(expected, label)
+        assert layer.mask is not None
+        np.testing.assert_array_equal(img, expected)
+
+
+def test_anti_aliased_layer_is_drawn_onto_every_frame():
+    calls = []
+
+    def render(canvas, label):
+        calls.append(label)
+        cv2.circle(canvas, (60, 30), 15, (255, 255, 255), 2, cv2.LINE_AA)
+
+    layer = HudLayer(render)
+    for _ in range(3):
+        img, expected = frame(), frame()
+        layer.composite(img, ("x",))
+        render(expected, "x")
+        np.testing.assert_array_equal(img, expected)
+    assert layer.mask is None
+    assert layer.renders == 1
@@ -0,0 +1,32 @@
+import time
+
+import numpy as np
+
+from idle_monitor import IdleMonitor
+
+
+class ScriptedMotion:
+    def __init__(self):
+        self.moving = False
+
+    def detect(self, img):
+        return self.moving
+
+    def reset(self):
+        pass
+
+
+def test_wake_latency_counts_from_the_last_still_frame():
+    motion = ScriptedMotion()
+    monitor = IdleMonitor(idle_after=0.0, idle_fps=5, motion=motion)
+    now = time.time()
+    monitor.update(now, hand_present=False)
+    assert monitor.idle
+    frame = np.zeros((4, 4, 3), dtype=np.uint8)
+    # Idle frames 0.2 s apart; motion shows up on the second one, captured 10 ms ago
+    assert monitor.skip_frame(frame, now, timestamp=now - 0.2)
+    motion.moving = True
+    assert not monitor.skip_frame(frame, now, timestamp=now - 0.01)
+    monitor.update(now, hand_present=True)
+    assert monitor.stats()["wake_latency_max_ms"] >= 200
+    assert monitor.stats()["wakes"] == 1
@@ -0,0 +1,93 @@
+import threading
+
+from input_backend import RecordingBackend
+from input_injector import InputInjector
+
+
+class GatedBackend(RecordingBackend):
+    """Holds the first action until `gate` opens, so the actions after it pile up in the queue"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.entered = threading.Event()
+
+    def _record(self, action, *args):
+        self.entered.set()
+        self.gate.wait(5.0)
+        super()._record(action, *args)
+
+
+def blocked_injector():
+    backend = GatedBackend()
+    injector = InputInjector(backend)
+    injector.move_to(0, 0)
+    assert backend.entered.wait(5.0)  # The worker is now stuck applying the first move
+    return injector, backend
+
+
+def applied(backend):
+    return [(action, args) for _, action, args in backend.actions]
+
+
+def test_consecutive_moves_keep_only_the_newest_target():
+    injector, backend = blocked_injector()
+    for x in range(1, 6):
+        injector.move_to(x, 2 * x)
+    backend.gate.set()
+    assert injector.flush()
+    assert applied(backend) == [("move_to", (0, 0)), ("move_to", (5, 10))]
+    assert injector.metrics()["coalesced"] == 4
+    injector.close()
+
+
+def test_consecutive_scrolls_are_summed():
+    injector, backend = blocked_injector()
+    injector.scroll(3)
+    injector.scroll(2)
+    injector.hscroll(-1)
+    injector.hscroll(-4)
+    injector.scroll(-1)
+    backend.gate.set()
+    assert injector.flush()
+    assert applied(backend)[1:] == [("scroll", (5,)), ("hscroll", (-5,)), ("scroll", (-1,))]
+    injector.close()
+
+
+def test_clicks_keep_their_place_between_moves():
+    injector, backend = blocked_injector()
+    injector.move_to(1, 1)
+    injector.move_to(2, 2)
+    injector.click()
+    injector.move_to(3, 3)
+    injector.hotkey("ctrl", "w")
+    injector.right_click()
+    injector.move_to(4, 4)
+    injector.move_to(5, 5)
+    backend.gate.set()
+    assert injector.flush()
+    assert applied(backend) == [
+        ("move_to", (0, 0)), ("move_to", (2, 2)), ("click", ()), ("move_to", (3, 3)),
+        ("hotkey", ("ctrl", "w")), ("right_click", ()), ("move_to", (5, 5)),
+    ]
+    injector.close()
+
+
+def test_every_queued_action_is_applied_exactly_once():
+    injector, backend = blocked_injector()
+    for i in range(20):
+        injector.click()
+        injector.scroll(1)
+    backend.gate.set()
+    assert injector.flush()
+    injector.click()
+    injector.hotkey("alt", "tab")
+    # close() drains what is still queued before the worker stops
+    injector.close()
+    counts = backend.counts()
+    assert counts == {"move_to": 1, "click": 21, "scroll": 20, "hotkey": 1}
+    metrics = injector.metrics()
+    assert metrics["applied"] == len(backend.actions)
+    assert metrics["submitted"] == metrics["applied"] + metrics["coalesced"]
+    assert metrics["queue_depth"] == 0
+    assert not injector.thread.is_alive()
@@ -0,0 +1,169 @@
+import time
+
+import numpy as np
+import pytest
+
+import landmark_stream as ls
+from gesture_eval import FRAME_SIZE, synthetic_hand, synthetic_sequence
+from hand_detector import LandmarkFeed
+from input_backend import RecordingBackend
+from landmark_trace import make_replay_controller, replay_trace
+
+
+class LossySocket:
+    """Socket stand-in that drops or holds back chosen datagrams (1-based send count)"""
+
+    def __init__(self, sock, drop=(), hold=()):
+        self.sock = sock
+        self.drop = set(drop)
+        self.hold = set(hold)
+        self.held = []
+        self.count = 0
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
+
+    def sendto(self, data, address):
+        self.count += 1
+        if self.count in self.drop:
+            return len(data)
+        if self.count in self.hold:
+            self.held.append((data, address))
+            return len(data)
+        return self.sock.sendto(data, address)
+
+    def release(self):
+        for data, address in self.held:
+            self.sock.sendto(data, address)
+        self.held.clear()
+
+
+def link(backend=None, controller=False, heartbeat=0.0):
+    backend = backend if backend is not None else RecordingBackend()
+    if controller:
+        receiver = ls.make_receiver("127.0.0.1:0", backend, async_input=False)
+    else:
+        receiver = ls.StreamReceiver("127.0.0.1:0", backend)
+    sender = ls.StreamSender("127.0.0.1:%d" % receiver.sock.getsockname()[1])
+    return receiver, sender, ls.ActionStreamBackend(sender, heartbeat=heartbeat)
+
+
+def drain(receiver, duration=0.05):
+    end = time.time() + duration
+    while time.time() < end:
+        receiver.poll(0.005)
+
+
+def test_landmark_packets_round_trip_within_quantization():
+    feed = LandmarkFeed(2)
+    hands = np.stack([synthetic_hand([0, 1, 0, 0, 0], 0.3, 0.5), synthetic_hand([1, 1, 1, 1, 1], 0.7, 0.4)])
+    feed.set_landmarks(hands, FRAME_SIZE, np.array([0, 1]), np.array([0.9, 0.5]))
+    receiver, sender, _ = link()
+    captured = []
+    receiver.apply = captured.extend
+    sender.send_landmarks(12.5, feed, FRAME_SIZE)
+    drain(receiver)
+    (packet,) = captured
+    frame_size, handedness, scores, landmarks = packet.landmarks()
+    assert packet.kind == ls.KIND_LANDMARKS and packet.timestamp == 12.5
+    assert frame_size == FRAME_SIZE
+    assert list(handedness) == [0, 1]
+    np.testing.assert_allclose(scores, [0.9, 0.5], atol=1 / 255)
+    np.testing.assert_allclose(landmarks[:, :, :2], hands[:, :, :2], atol=1 / ls.XY_SCALE)
+
+
+def test_link_stats_count_loss_reordering_and_restarts():
+    class P:
+        def __init__(self, seq):
+            self.seq, self.sent, self.timestamp = seq, 0.0, 0.0
+
+    stats = ls.LinkStats()
+    newest = [stats.add(P(seq), 0.0, 10) for seq in (0, 1, 3, 4, 2, 4)]
+    assert newest == [True, True, True, True, False, False]
+    assert (stats.lost, stats.late, stats.duplicates) == (0, 1, 1)
+    stats.add(P(7), 0.0, 10)
+    assert stats.lost == 2
+    assert not stats.add(P(0), 0.0, 10)
+    # Far behind the newest: the sender restarted
+    stats.add(P(1000), 0.0, 10)
+    assert stats.add(P(0), 0.0, 10)
+
+
+def test_streamed_landmarks_drive_the_same_actions_as_a_replay():
+    sequence = synthetic_sequence(1)
+    reference = make_replay_controller(sequence)
+    replay_trace(sequence, reference)
+
+    backend = RecordingBackend()
+    receiver, sender, _ = link(backend, controller=True)
+    feed = LandmarkFeed(2)
+    for rec in sequence.records:
+        n = int(rec["num_hands"])
+        feed.set_landmarks(rec["landmarks"][:n], FRAME_SIZE, rec["handedness"][:n], rec["scores"][:n])
+        sender.send_landmarks(float(rec["timestamp"]), feed, FRAME_SIZE)
+        receiver.poll(0.05)
+    assert [a[1:] for a in backend.actions] == [a[1:] for a in reference.backend.actions]
+    assert receiver.stats.lost == 0
+
+
+def test_actions_survive_loss_and_reordering():
+    backend = RecordingBackend()
+    receiver, sender, actions = link(backend)
+    sender.sock = LossySocket(sender.sock, drop=range(5, 400, 5), hold=range(7, 400, 7))
+    clicks = 0
+    for i in range(200):
+        actions.move_to(i, i)
+        if i % 10 == 3:
+            actions.click()
+            clicks += 1
+        if i % 20 == 9:
+            sender.sock.release()
+        receiver.poll(0.005)
+    sender.sock.release()
+    drain(receiver)
+    assert backend.counts()["click"] == clicks
+    assert receiver.stats.lost_events == 0
+    assert receiver.stats.late > 0
+    # Late cursor positions never overwrite newer ones
+    moves = [a[2][0] for a in backend.actions if a[1] == "move_to"]
+    assert moves == sorted(moves) and moves[-1] >= 198
+
+
+def test_heartbeat_delivers_a_click_whose_only_datagram_was_lost():
+    backend = RecordingBackend()
+    receiver, sender, actions = link(backend, heartbeat=0.02)
+    try:
+        sender.sock = LossySocket(sender.sock, drop={2})
+        actions.move_to(1, 1)
+        actions.click()  # Dropped, and nothing else is sent afterwards
+        drain(receiver, 0.2)
+    finally:
+        actions.close()
+    assert backend.counts().get("click") == 1
+    assert receiver.stats.lost_events == 0
+
+
+def test_receiver_reports_its_monitors_to_the_sender():
+    monitors = [(0, 0, 1920, 1080), (1920, 0, 1280, 1024)]
+    receiver, sender, actions = link(RecordingBackend(monitors=monitors))
+    actions.move_to(5, 5)
+    drain(receiver)
+    deadline = time.time() + 1.0
+    while actions.monitors() != monitors and time.time() < deadline:
+        time.sleep(0.01)
+    assert actions.monitors() == monitors
+
+
+@pytest.mark.skipif(not hasattr(ls.socket, "AF_UNIX"), reason="no Unix sockets")
+def test_unix_socket_link(tmp_path):
+    path = str(tmp_path / "stream.sock")
+    backend = RecordingBackend()
+    receiver = ls.StreamReceiver(path, backend)
+    sender = ls.StreamSender(path)
+    actions = ls.ActionStreamBackend(sender, heartbeat=0)
+    actions.move_to(3, 4)
+    actions.hotkey("ctrl", "=")
+    drain(receiver)
+    sender.close()
+    receiver.close()
+    assert [a[1:] for a in backend.actions] == [("move_to", (3, 4)), ("hotkey", ("ctrl", "="))]
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from gesture_eval import FPS, FRAME_SIZE, synthetic_hand
+from hand_detector import LandmarkFeed
+from input_backend import RecordingBackend
+from landmark_trace import MAX_ACTIONS, TraceReader, TraceRecorder, make_replay_controller, replay_trace
+
+
+def record(path, frames):
+    """Write (landmarks or None, [(action, args)]) frames through a recorder and its backend tap"""
+    recorder = TraceRecorder(str(path))
+    backend = recorder.wrap(RecordingBackend())
+    feed = LandmarkFeed(2)
+    for i, (hands, actions) in enumerate(frames):
+        for action, args in actions:
+            getattr(backend, action)(*args)
+        if hands is None:
+            feed.set_landmarks(np.zeros((0, 21, 3)), FRAME_SIZE)
+        else:
+            feed.set_landmarks(np.asarray(hands), FRAME_SIZE, np.array([1, 0], dtype=np.int8)[:len(hands)])
+        recorder.record_frame(i / FPS, feed, FRAME_SIZE)
+    recorder.close()
+    return backend.backend
+
+
+def test_round_trip_keeps_landmarks_and_actions(tmp_path):
+    open_hand = synthetic_hand([1, 1, 1, 1, 1], 0.4, 0.5)
+    fist = synthetic_hand([0, 0, 0, 0, 0], 0.6, 0.5)
+    frames = [
+        ([open_hand], [("move_to", (100, 200))]),
+        ([open_hand, fist], [("hotkey", ("ctrl", "shift", "t")), ("scroll", (-3,)), ("click", ())]),
+        (None, []),
+        ([fist], [("move_to", (1, 2))] * (MAX_ACTIONS + 2)),
+    ]
+    injected = record(tmp_path / "a.trace", frames)
+    reader = TraceReader(str(tmp_path / "a.trace"))
+
+    assert len(reader) == 4
+    np.testing.assert_allclose(reader.timestamps, np.arange(4) / FPS)
+    assert reader.num_hands.tolist() == [1, 2, 0, 1]
+    np.testing.assert_allclose(reader.landmarks[1, :2], [open_hand, fist])
+    assert reader.handedness[1].tolist() == [1, 0]
+    assert reader.fingers[1].tolist() == [[1, 1, 1, 1, 1], [0, 0, 0, 0, 0]]
+    assert reader.actions(0) == [("move_to", (100, 200))]
+    assert reader.actions(1) == [("hotkey", ("ctrl", "shift", "t")), ("scroll", (-3,)), ("click", ())]
+    assert reader.actions(2) == []
+    assert len(reader.actions(3)) == MAX_ACTIONS
+    assert reader.dropped_actions.tolist() == [0, 0, 0, 2]
+    # The tap forwards every call, including the ones the record had no room for
+    assert len(injected.actions) == 1 + 3 + MAX_ACTIONS + 2
+    reader.release()
+
+
+def test_rejects_files_that_are_not_traces(tmp_path):
+    path = tmp_path / "junk.trace"
+    path.write_bytes(b"not a trace at all")
+    with pytest.raises(ValueError, match="Not a landmark trace"):
+        TraceReader(str(path))
+
+
+def test_replay_reproduces_the_recorded_gesture(tmp_path):
+    frames = [([synthetic_hand([0, 1, 0, 0, 0], 0.3 + 0.01 * i, 0.5)], []) for i in range(20)]
+    frames += [(None, [])] * 10
+    frames += [([synthetic_hand([0, 0, 0, 0, 0], 0.5, 0.5)], []) for _ in range(45)]
+    record(tmp_path / "b.trace", frames)
+    reader = TraceReader(str(tmp_path / "b.trace"))
+
+    fired = []
+    backend = replay_trace(reader, make_replay_controller(reader),
+                           on_frame=lambda i, t, name: name and fired.append(name))
+    moves = [args for _, action, args in backend.actions if action == "move_to"]
+    assert moves, "pointing should move the cursor"
+    assert moves[-1][0] > moves[0][0]
+    assert fired.count("MINIMIZE") == 1
+    reader.release()
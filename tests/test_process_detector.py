@@ -0,0 +1,77 @@
+import time
+
+import numpy as np
+
+from frame_capture import SharedFrameRing
+from process_detector import ProcessDetector, SharedResultRing
+
+
+class _Frame:
+    """What SharedResultRing.write reads from a detector"""
+
+    def __init__(self, max_hands, value):
+        self.num_hands = 1
+        self.landmarks = np.full((max_hands, 21, 3), value, dtype=np.float32)
+        self.handedness = np.ones(max_hands, dtype=np.int8)
+        self.scores = np.ones(max_hands, dtype=np.float32)
+
+
+def stub_worker(frame_ring_name, result_ring_name, shape, slots, max_hands, detector_args, tasks, ready):
+    """Reports each frame's first pixel as its landmarks, after a delay that makes even frames
+    finish after the odd ones, and only reads the frame once the delay is over"""
+    frames = SharedFrameRing(shape, slots=slots, name=frame_ring_name, create=False)
+    results = SharedResultRing(slots, max_hands, name=result_ring_name, create=False)
+    ready.set()
+    try:
+        while True:
+            seq = tasks.get()
+            if seq is None:
+                break
+            time.sleep(0.03 if seq % 2 == 0 else 0.005)
+            value = float(frames.frames[seq % slots][0, 0, 0]) / 255
+            results.write(seq, _Frame(max_hands, value), 1.0)
+    finally:
+        results.close()
+        frames.close()
+
+
+def make_detector(workers=2):
+    detector = ProcessDetector(workers=workers)
+    detector.worker = stub_worker
+    return detector
+
+
+def frame(value, shape=(24, 32, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def test_results_come_back_in_frame_order_without_reusing_pending_slots():
+    detector = make_detector(workers=2)
+    try:
+        seen = []
+        for i in range(12):
+            detector.find_hands(frame(10 * i), draw=False)
+            assert detector.in_flight() <= detector.depth < detector.slots
+            if detector.inference_frames:
+                seen.append(round(float(detector.landmarks[0, 0, 0]) * 255))
+        seen += [round(float(detector.landmarks[0, 0, 0]) * 255) for _ in detector.flush()]
+        # Every frame once, in order, each with the pixels it was submitted with
+        assert seen == [10 * i for i in range(12)]
+        assert detector.inference_frames == 12
+    finally:
+        detector.close()
+
+
+def test_workers_restart_when_the_frame_size_changes():
+    detector = make_detector(workers=1)
+    try:
+        detector.find_hands(frame(50), draw=False)
+        first = [p.pid for p, _ in detector.processes]
+        detector.find_hands(frame(70, shape=(48, 64, 3)), draw=False)
+        assert detector.frame_shape == (48, 64, 3)
+        assert [p.pid for p, _ in detector.processes] != first
+        assert [round(float(detector.landmarks[0, 0, 0]) * 255)] == [70]
+        assert detector.landmarks_px[0, 0, 0] == np.float32(70 / 255) * 64
+    finally:
+        detector.close()
+    detector.close()
@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+
+from profiler import NULL_SPAN, Profiler, RollingHistogram
+
+
+def test_histogram_keeps_the_last_window_of_samples():
+    histogram = RollingHistogram(window=4)
+    assert histogram.stats() is None
+    for ms in (100, 1, 2, 3, 4):
+        histogram.add(ms / 1000)
+    stats = histogram.stats()
+    assert stats["count"] == 5
+    assert stats["max_ms"] == 4.0
+    assert stats["mean_ms"] == 2.5
+    assert stats["p50_ms"] == 2.5
+
+
+def test_spans_and_records_aggregate_per_stage():
+    profiler = Profiler()
+    for _ in range(3):
+        with profiler.span("inference"):
+            pass
+    assert profiler.span("inference") is profiler.span("inference")
+    for ms in (10, 20, 30):
+        profiler.record("injection", ms / 1000)
+    snapshot = profiler.snapshot()
+    assert set(snapshot) == {"inference", "injection"}
+    assert snapshot["inference"]["count"] == 3
+    assert snapshot["injection"]["p50_ms"] == 20.0
+    assert snapshot["injection"]["max_ms"] == 30.0
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler(enabled=False)
+    assert profiler.span("inference") is NULL_SPAN
+    with profiler.span("inference"):
+        pass
+    profiler.record("injection", 0.01)
+    assert profiler.snapshot() == {}
+
+
+def test_exports_jsonl_and_prometheus(tmp_path):
+    jsonl, prom = tmp_path / "latency.jsonl", tmp_path / "latency.prom"
+    profiler = Profiler(jsonl_path=str(jsonl), prom_path=str(prom), export_interval=5.0)
+    for ms in (1, 2, 3, 4):
+        profiler.record("capture", ms / 1000)
+    profiler.export(now=100.0)
+    profiler.export(now=105.0)
+
+    lines = [json.loads(line) for line in jsonl.read_text().splitlines()]
+    assert [line["timestamp"] for line in lines] == [100.0, 105.0]
+    assert lines[0]["stages"]["capture"]["count"] == 4
+    np.testing.assert_allclose(lines[0]["stages"]["capture"]["max_ms"], 4.0)
+
+    text = prom.read_text()
+    assert "# TYPE gesture_stage_latency_ms summary" in text
+    assert 'gesture_stage_latency_ms{stage="capture",quantile="1"} 4.0000' in text
+    assert 'gesture_stage_latency_ms_count{stage="capture"} 4' in text
+    assert not (tmp_path / "latency.prom.tmp").exists()
+
+
+def test_maybe_export_waits_for_the_interval(tmp_path):
+    jsonl = tmp_path / "latency.jsonl"
+    profiler = Profiler(jsonl_path=str(jsonl), export_interval=60.0)
+    profiler.record("capture", 0.001)
+    profiler.maybe_export()
+    assert not jsonl.exists()
+    profiler.last_export -= 61.0
+    profiler.maybe_export()
+    assert len(jsonl.read_text().splitlines()) == 1
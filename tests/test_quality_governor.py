@@ -0,0 +1,70 @@
+from quality_governor import QualityGovernor
+
+
+class FakeDetector:
+    def __init__(self):
+        self.settings = []
+
+    def set_quality(self, **settings):
+        self.settings.append(settings)
+
+
+def feed(governor, latency_ms, start, seconds, fps=30):
+    """Samples at `fps` for `seconds` from `start`; returns the time after the last one"""
+    for i in range(int(seconds * fps)):
+        governor.update(latency_ms / 1000, start + i / fps)
+    return start + seconds
+
+
+def make_governor(**options):
+    return QualityGovernor(FakeDetector(), target_ms=40.0, verbose=False, **options)
+
+
+def test_starts_at_full_quality():
+    governor = make_governor()
+    assert governor.name == "full"
+    assert governor.detector.settings == [{"model_complexity": 1, "input_size": None, "inference_interval": 1}]
+
+
+def test_steps_down_one_level_per_slow_window():
+    governor = make_governor()
+    t = feed(governor, 80, 0.0, 1.1)
+    assert governor.name == "high"
+    # Samples inside the settle period after a switch are ignored
+    t = feed(governor, 80, t, 0.5)
+    assert governor.name == "high"
+    feed(governor, 80, t, 2.0)
+    assert governor.name == "medium"
+    assert [d["to"] for d in governor.decisions] == ["high", "medium"]
+
+
+def test_steps_up_after_consecutive_fast_windows():
+    governor = make_governor()
+    t = feed(governor, 80, 0.0, 1.1)
+    assert governor.name == "high"
+    # Two fast windows are not enough, the third one steps up
+    t = feed(governor, 10, t + 1.0, 2.5)
+    assert governor.name == "high"
+    feed(governor, 10, t, 1.5)
+    assert governor.name == "full"
+
+
+def test_level_that_cannot_be_held_is_locked_out():
+    governor = make_governor(retry_after=10.0)
+    t = feed(governor, 80, 0.0, 1.1)
+    t = feed(governor, 10, t + 1.0, 4.0)
+    assert governor.name == "full"
+    # Slow again right after stepping up: back down, and "full" is locked out for a while
+    t = feed(governor, 80, t + 1.0, 1.1)
+    assert governor.name == "high"
+    t = feed(governor, 10, t + 1.0, 5.0)
+    assert governor.name == "high"
+    feed(governor, 10, t, 10.0)
+    assert governor.name == "full"
+
+
+def test_stats_without_samples():
+    stats = make_governor().stats(5.0)
+    assert stats["level"] == "full"
+    assert stats["changes"] == 0
+    assert not any(stats["level_s"].values())
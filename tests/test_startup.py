@@ -0,0 +1,20 @@
+import time
+
+from startup import StartupReport, process_origin
+
+
+def test_process_origin_is_in_the_past():
+    elapsed = time.perf_counter() - process_origin()
+    assert 0.0 <= elapsed < 3600.0
+
+
+def test_report_counts_from_the_origin():
+    report = StartupReport(origin=time.perf_counter() - 1.0)
+    report.mark("imports")
+    report.mark("imports")
+    with report.phase("model_load"):
+        pass
+    data = report.to_dict()
+    assert 1000.0 <= data["milestones_ms"]["imports"] < 2000.0
+    assert [p["name"] for p in data["phases"]] == ["model_load"]
+    assert data["phases"][0]["start_ms"] >= 1000.0